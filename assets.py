@@ -0,0 +1,74 @@
+import os
+import random
+from io import BytesIO
+from functools import lru_cache
+from PIL import Image
+
+# 專案內附的圖片目錄
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PIC_DIR = os.path.join(BASE_DIR, 'pic')
+THUMBNAIL_DIR = os.path.join(BASE_DIR, 'thumbnails')
+
+# 各圖片在頁面上的顯示寬度（像素），預先縮放到這個寬度
+HEADER_WIDTH = 1033
+DRINK_WIDTH = 240
+THUMBNAIL_WIDTH = 64
+
+# 記憶體中最多保留的已縮放圖片數量（16 款調酒 + 標頭 + 股票縮圖）
+CACHE_SIZE = 64
+
+# 標頭圖片候選
+HEADER_IMAGES = ['Cyberpunk_bar_02.jpg', 'Cyberpunk_bar_03.jpg']
+
+# 調酒圖片檔名
+DRINK_IMAGES = {
+    "Vodka_Soda": "cocktail_01_Vodka Soda.jpg",
+    "Vodka_Martini": "cocktail_02_Vodka Martini.jpg",
+    "Whiskey_Sour": "cocktail_03_Whiskey Sour.jpg",
+    "Whiskey_Neat": "cocktail_04_Whiskey Neat.jpg",
+    "Moscow_Mule": "cocktail_05_Moscow Mule.jpg",
+    "Bloody_Mary": "cocktail_06_Bloody Mary.jpg",
+    "Old_Fashioned": "cocktail_07_Old Fashioned.jpg",
+    "Manhattan": "cocktail_08_Manhattan.jpg",
+    "Screwdriver": "cocktail_09_Screwdriver.jpg",
+    "Vodka_Collins": "cocktail_10_Vodka Collins.jpg",
+    "Rob_Roy": "cocktail_11_Rob Roy.jpg",
+    "Sazerac": "cocktail_12_Sazerac.jpg",
+    "Aperol_Spritz": "cocktail_13_Aperol Spritz.jpg",
+    "Cosmopolitan": "cocktail_14_Cosmopolitan.jpg",
+    "Boulevardier": "cocktail_15_Boulevardier.jpg",
+    "Vieux_Carré": "cocktail_16_Vieux Carré.jpg",
+}
+
+
+# 函數：讀取本地圖片並縮放到顯示寬度，結果以 LRU 保留在記憶體中
+@lru_cache(maxsize=CACHE_SIZE)
+def load_image(path, width):
+    with Image.open(path) as image:
+        if image.width > width:
+            height = round(image.height * width / image.width)
+            image = image.resize((width, height), Image.LANCZOS)
+        buffer = BytesIO()
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image.save(buffer, format='PNG', optimize=True)
+        else:
+            image.convert('RGB').save(buffer, format='JPEG', quality=85, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+# 函數：隨機取得一張標頭圖片
+def header_image():
+    return load_image(os.path.join(PIC_DIR, random.choice(HEADER_IMAGES)), HEADER_WIDTH)
+
+
+# 函數：取得調酒圖片
+def drink_image(drink_name):
+    return load_image(os.path.join(PIC_DIR, DRINK_IMAGES[drink_name]), DRINK_WIDTH)
+
+
+# 函數：取得股票縮圖，沒有對應檔案時回傳 None
+def ticker_thumbnail(ticker):
+    path = os.path.join(THUMBNAIL_DIR, f"{os.path.basename(ticker)}.png")
+    if not os.path.exists(path):
+        return None
+    return load_image(path, THUMBNAIL_WIDTH)
@@ -0,0 +1,412 @@
+import time
+import backtrader as bt
+import checkpoint
+from feeds import ArrayData
+from indicators import PrecomputedSMAData
+from strategies import (PeriodicInvestmentStrategy, MACDStrategy, FixedCashSizer, RSIStrategy,
+                        BollingerBandsStrategy, TestStrategy, FixedAmountSizer)
+
+# 策略名稱與預設參數（與各頁面滑桿的預設值相同）
+STRATEGY_DEFAULTS = {
+    "PeriodicInvestment": {"monthly_investment": 1000, "investment_day": 1},
+    "MACD": {"fast": 12, "slow": 26, "signal": 9, "trade_amount": 1000},
+    "RSI": {"rsi_period": 14, "rsi_overbought": 70, "rsi_oversold": 30, "trade_amount": 1000},
+    "Bollinger": {"period": 20, "devfactor": 2.0, "trade_amount": 1000},
+    "TripleMA": {"short_period": 5, "median_period": 20, "long_period": 60, "trade_amount": 1000},
+    "LSTM": {"short_period": 5, "long_period": 60, "num_epochs": 200},
+    "RF": {"short_period": 5, "long_period": 60},
+    "SVM": {"short_period": 5, "long_period": 60},
+}
+
+# 需要先訓練模型的策略
+ML_STRATEGIES = ("LSTM", "RF", "SVM")
+
+# 手續費滑桿的數值換算為 broker 手續費率的倍數：各策略頁面以百分比輸入（除以 100），
+# 定期定額（homepage.py）從原版起就直接使用滑桿的數值
+COMMISSION_SCALE = {"PeriodicInvestment": 1.0}
+DEFAULT_COMMISSION_SCALE = 0.01
+
+
+# 省記憶體模式下，每隔多少根 K 線清除一次已完成的訂單與交易
+PRUNE_EVERY_BARS = 256
+
+
+# 分析器：省記憶體模式下定期清除已完成的訂單與已平倉的交易
+# backtrader 會保留每一筆訂單與交易，長期的分鐘數據下記憶體會隨交易次數增加
+class OrderPruner(bt.Analyzer):
+
+    def next(self):
+        if len(self.strategy) % PRUNE_EVERY_BARS:
+            return
+        strategy = self.strategy
+        # 策略保留的是每次通知時的訂單副本，backtrader 本身不會再讀取
+        strategy._orders.clear()
+        strategy.broker.orders = [order for order in strategy.broker.orders if order.alive()]
+        # 只保留每個 tradeid 最後一筆（可能尚未平倉）的交易
+        for datatrades in strategy._trades.values():
+            for trades in datatrades.values():
+                del trades[:-1]
+
+
+# 函數：建立 cerebro；lean=True 時使用有界的數據線緩衝區（exactbars）並逐根載入數據，
+# 指標只保留計算所需的最近幾根 K 線，圖表與績效由分析器記錄在預先配置的陣列中
+def make_cerebro(lean=False):
+    cerebro = bt.Cerebro(stdstats=False, exactbars=lean)
+    if lean:
+        cerebro.addanalyzer(OrderPruner)
+    return cerebro
+
+
+# 函數：將使用者輸入的策略名稱（例如 "Triple MA"、"macd"）轉換為標準名稱
+def resolve_strategy_name(name):
+    key = name.replace(' ', '').replace('_', '').lower()
+    for strategy_name in STRATEGY_DEFAULTS:
+        if strategy_name.lower() == key:
+            return strategy_name
+    raise ValueError("未知的策略: %s（可用: %s）" % (name, ', '.join(STRATEGY_DEFAULTS)))
+
+
+# 函數：頁面與批次回測輸入的手續費換算為 broker 的手續費率
+def broker_commission(name, commission):
+    return commission * COMMISSION_SCALE.get(resolve_strategy_name(name), DEFAULT_COMMISSION_SCALE)
+
+
+# 函數：合併預設參數與使用者參數
+def strategy_params(name, params=None):
+    merged = dict(STRATEGY_DEFAULTS[name])
+    merged.update(params or {})
+    return merged
+
+
+# 函數：機器學習策略使用的數據（加上均線欄位並去除暖身期）
+def _ml_frame(df, p):
+    df = df.sort_index(ascending=True).copy()
+    df['SMA_10'] = df['Close'].rolling(window=p["short_period"]).mean()
+    df['SMA_20'] = df['Close'].rolling(window=p["long_period"]).mean()
+    return df.dropna()
+
+
+# 函數：訓練機器學習模型，回傳加上均線欄位的數據與策略參數
+# on_epoch(epoch, num_epochs, loss) 在 LSTM 每個 epoch 結束時呼叫（頁面用來顯示訓練進度）
+def _prepare_ml_strategy(name, df, p, on_epoch=None):
+    from ml_strategies import create_dataset
+    df = _ml_frame(df, p)
+
+    window_size = 10
+    if name == "LSTM":
+        from lstm_strategy import LSTMStrategy, create_lstm_dataset, train_lstm_model
+        X, y, scaler = create_lstm_dataset(df, window_size)
+        model = train_lstm_model(X, y, num_epochs=p["num_epochs"], on_epoch=on_epoch)
+        strategy = LSTMStrategy
+    else:
+        from ml_strategies import RFStrategy, SVMStrategy, train_random_forest_model, train_svm_model
+        X, y, scaler = create_dataset(df, window_size)
+        if name == "RF":
+            model, strategy = train_random_forest_model(X, y), RFStrategy
+        else:
+            model, strategy = train_svm_model(X, y), SVMStrategy
+
+    kwargs = dict(scaler=scaler, model=model, short_period=p["short_period"], long_period=p["long_period"])
+    return df, strategy, kwargs
+
+
+# 函數：回傳非機器學習策略的 (策略類別, 策略參數, Sizer 類別, Sizer 參數)
+def strategy_spec(name, p, initial_cash=10000, commission=0.001):
+    if name == "PeriodicInvestment":
+        return (PeriodicInvestmentStrategy,
+                dict(initial_cash=initial_cash, monthly_investment=p["monthly_investment"],
+                     commission=commission, investment_day=p["investment_day"], printlog=False),
+                None, None)
+    if name == "MACD":
+        return (MACDStrategy, dict(fast=p["fast"], slow=p["slow"], signal=p["signal"], printlog=False),
+                FixedCashSizer, dict(cash=p["trade_amount"]))
+    if name == "RSI":
+        return (RSIStrategy,
+                dict(rsi_period=p["rsi_period"], rsi_overbought=p["rsi_overbought"],
+                     rsi_oversold=p["rsi_oversold"], trade_amount=p["trade_amount"], printlog=False),
+                None, None)
+    if name == "Bollinger":
+        return (BollingerBandsStrategy,
+                dict(period=p["period"], devfactor=p["devfactor"], trade_amount=p["trade_amount"]),
+                None, None)
+    if name == "TripleMA":
+        return (TestStrategy,
+                dict(short_period=p["short_period"], median_period=p["median_period"],
+                     long_period=p["long_period"], initial_cash=initial_cash, printlog=False),
+                FixedAmountSizer, dict(amount=p["trade_amount"]))
+    raise ValueError("%s 需要先訓練模型，沒有固定的策略設定" % name)
+
+
+# 函數：回傳 (實際餵入的數據, (策略類別, 策略參數, Sizer 類別, Sizer 參數))
+def _setup(name, df, p, initial_cash=10000, commission=0.001, on_epoch=None):
+    if name in ML_STRATEGIES:
+        df, strategy, kwargs = _prepare_ml_strategy(name, df, p, on_epoch)
+        return df, (strategy, kwargs, None, None)
+    return df, strategy_spec(name, p, initial_cash, commission)
+
+
+# 函數：依策略名稱把策略與 Sizer 加入 cerebro，回傳實際餵入的數據
+def add_strategy(cerebro, name, df, params=None, initial_cash=10000, commission=0.001):
+    df, (strategy, kwargs, sizer, sizer_kwargs) = _setup(name, df, strategy_params(name, params),
+                                                         initial_cash, commission)
+    cerebro.addstrategy(strategy, **kwargs)
+    if sizer is not None:
+        cerebro.addsizer(sizer, **sizer_kwargs)
+    return df
+
+
+# 函數：執行回測，resume 為檢查點時從檢查點接續（沿用保存的策略設定與已訓練的模型）；
+# setup 為 _setup 回傳的策略設定時直接使用，不重新訓練模型；feed 為已建立的數據來源
+# （例如 store.intraday_feed 逐個分區讀取的日內數據）時取代 df
+# 回傳 (摘要, 策略, (實際餵入的數據, 策略設定))
+def _run(name, df, params, initial_cash, commission, analyzers, lean, resume=None, setup=None, feed=None):
+    name = resolve_strategy_name(name)
+    p = strategy_params(name, params)
+    start_time = time.perf_counter()
+
+    if resume is not None:
+        setup = resume["setup"]
+    if setup is None:
+        df, setup = _setup(name, df, p, initial_cash, commission)
+    else:
+        df = _ml_frame(df, p) if name in ML_STRATEGIES else df
+    strategy = setup[0] if resume is None else checkpoint.resumable(setup[0], resume)
+    _, kwargs, sizer, sizer_kwargs = setup
+
+    cerebro = make_cerebro(lean)
+    for analyzer, analyzer_name in analyzers:
+        cerebro.addanalyzer(analyzer, _name=analyzer_name)
+    cerebro.addstrategy(strategy, **kwargs)
+    if sizer is not None:
+        cerebro.addsizer(sizer, **sizer_kwargs)
+    if feed is not None:
+        cerebro.adddata(feed)
+    elif name in ML_STRATEGIES:
+        cerebro.adddata(PrecomputedSMAData(dataname=df, short_period=p["short_period"], long_period=p["long_period"]))
+    else:
+        cerebro.adddata(ArrayData(dataname=df))
+    cerebro.broker.setcash(initial_cash)
+    cerebro.broker.setcommission(commission=broker_commission(name, commission))
+
+    results = cerebro.run()
+    final_value = cerebro.broker.getvalue()
+
+    summary = {
+        "strategy": name,
+        "bars": len(df) if feed is None else len(results[0]),
+        "initial_cash": initial_cash,
+        "final_value": final_value,
+        "pnl": final_value - initial_cash,
+        "roi_pct": (final_value - initial_cash) / initial_cash * 100 if initial_cash else float('nan'),
+        "elapsed_s": time.perf_counter() - start_time,
+    }
+    return summary, results[0], (df, setup)
+
+
+# 函數：在數據上執行單一策略的回測，commission 以百分比表示（與頁面滑桿相同）
+# lean=True 為省記憶體模式（見 make_cerebro）；setup 為已訓練好的策略設定（見 _setup）
+def run_backtest(name, df, params=None, initial_cash=10000, commission=0.001, analyzers=(), lean=False, setup=None):
+    summary, strat, _ = _run(name, df, params, initial_cash, commission, analyzers, lean, setup=setup)
+    return summary, strat
+
+
+# 函數：以檢查點做每日的增量回測
+# 檢查點的設定相同、且數據中檢查點之前的部分沒有變動時，從檢查點接續，只處理新增的 K 線；
+# 否則完整重跑。結束後把最後一根 K 線的狀態寫回檢查點
+def update_backtest(path, name, df, params=None, initial_cash=10000, commission=0.001, analyzers=(), lean=False):
+    name = resolve_strategy_name(name)
+    p = strategy_params(name, params)
+    config = {
+        "strategy": name,
+        "params": p,
+        "initial_cash": initial_cash,
+        "commission": commission,
+        "analyzers": [analyzer_name for _, analyzer_name in analyzers],
+    }
+
+    resume = checkpoint.load(path)
+    if resume is not None:
+        fed = _ml_frame(df, p) if name in ML_STRATEGIES else df
+        if (resume["config"] != config or len(fed) < resume["rows"]
+                or checkpoint.data_digest(fed, resume["rows"]) != resume["digest"]):
+            resume = None
+
+    summary, strat, (fed, setup) = _run(name, df, params, initial_cash, commission, analyzers, lean, resume)
+
+    state = checkpoint.snapshot(strat)
+    state.update(config=config, setup=setup, rows=len(fed), digest=checkpoint.data_digest(fed))
+    checkpoint.save(path, state)
+    summary["resumed_bars"] = resume["bars"] if resume is not None else 0
+    return summary, strat
+
+
+# broker：比較模式下每個策略一個獨立的 BackBroker 帳戶（各自的資金、持倉與手續費）
+# cerebro 每根 K 線推進所有帳戶，再把各帳戶的訂單通知交給下單的策略
+class Accounts(bt.BrokerBase):
+
+    def __init__(self):
+        super(Accounts, self).__init__()
+        self.accounts = []
+
+    # 函數：新增一個帳戶，回傳該帳戶的 broker
+    def add_account(self, cash, commission):
+        broker = bt.brokers.BackBroker()
+        broker.setcash(cash)
+        broker.setcommission(commission=commission)
+        self.accounts.append(broker)
+        return broker
+
+    def start(self):
+        super(Accounts, self).start()
+        for broker in self.accounts:
+            broker.start()
+
+    def stop(self):
+        for broker in self.accounts:
+            broker.stop()
+        super(Accounts, self).stop()
+
+    def next(self):
+        for broker in self.accounts:
+            broker.next()
+
+    def get_notification(self):
+        for broker in self.accounts:
+            order = broker.get_notification()
+            if order is not None:
+                return order
+        return None
+
+    def getcash(self):
+        return sum(broker.getcash() for broker in self.accounts)
+
+    def getvalue(self, datas=None):
+        return sum(broker.getvalue(datas) for broker in self.accounts)
+
+
+# 函數：依名稱建立策略實例，下單、持倉與 Sizer 都使用 account 這個帳戶
+def make_strategy(*datas, which, params, initial_cash, commission, account):
+    p = strategy_params(which, params)
+    strategy, kwargs, sizer, sizer_kwargs = strategy_spec(which, p, initial_cash, commission)
+    strat = strategy(*datas, **kwargs)
+    strat.broker = account
+    strat.setsizer(sizer(**sizer_kwargs) if sizer is not None else strat.getsizer())
+    return strat
+
+
+# 函數：在同一份數據上比較多個策略
+# 所有策略加入同一個 cerebro，數據只載入一次，逐根 K 線一起執行；
+# 指標登記表由所有策略共用，相同的均線（例如布林通道與三均線的 20 日 SMA）只計算一次。
+# 每個策略有獨立的資金帳戶，結果由各自的分析器回傳
+def run_comparison(names, df, params_by_name=None, initial_cash=10000, commission=0.001, analyzers=()):
+    names = [resolve_strategy_name(name) for name in names]
+    for name in names:
+        if name in ML_STRATEGIES:
+            raise ValueError("比較模式不支援需要訓練模型的策略: %s" % name)
+
+    start_time = time.perf_counter()
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.broker = accounts = Accounts()
+    for analyzer, analyzer_name in analyzers:
+        cerebro.addanalyzer(analyzer, _name=analyzer_name)
+    cerebro.adddata(ArrayData(dataname=df))
+    for name in names:
+        account = accounts.add_account(initial_cash, broker_commission(name, commission))
+        cerebro.addstrategy(make_strategy, which=name, params=(params_by_name or {}).get(name),
+                            initial_cash=initial_cash, commission=commission, account=account)
+
+    # 結果依 names 的順序回傳
+    results = dict(zip(names, cerebro.run()))
+    return results, time.perf_counter() - start_time
+
+
+# 函數：首頁與各策略頁面共用的回測流程
+# 相同設定的結果由所有使用者共用，已有結果時直接讀取，不重新下載、訓練與回測；
+# 否則載入數據（日線預設以 download_prices 下載，daily 可改為回傳日線數據的函數；
+# 日內週期從本地資料庫逐個月份分區讀取），需要時先訓練模型，回測後保存結果
+# 回傳 (圖表記錄, 交易日誌記錄)，journal 為 False 時交易日誌為 None
+def run_page_backtest(name, params, symbol, start, end, interval="1d", initial_cash=10000, commission=0.001,
+                      lean=False, journal=False, daily=None):
+    import streamlit as st
+    from charts import ChartRecorder
+    from journal import TradeJournal
+    from instrument import span, annotate
+    from result_store import result_config, result_key, load_result, save_result
+
+    name = resolve_strategy_name(name)
+    config = result_config(name, params, symbol, start, end, interval, initial_cash, commission)
+    annotate(**config)  # 取樣分析時與結果一併保存
+    key = result_key(config)
+    with span("result_store") as s:
+        cached = load_result(key, journal=journal)
+        s["hit"] = cached is not None
+    if cached is not None:
+        st.caption("相同設定已有回測結果，直接顯示保存的結果")
+        return cached
+
+    df = feed = None
+    if interval == "1d":
+        if daily is None:
+            from data import download_prices
+            df = download_prices(symbol, start, end)  # 同時請求相同數據時共用一次下載
+        else:
+            df = daily()
+        if df.empty:
+            st.error("無法獲取股票數據，請檢查股票代碼或日期範圍")
+            st.stop()
+    else:
+        from store import intraday_feed
+        feed = intraday_feed(symbol, interval, start, end)  # 從本地資料庫逐個月份分區讀取
+        if feed is None:
+            st.error("沒有這段期間的日內數據（Yahoo 只提供最近的日內數據，較長的歷史請用 store.py 匯入）")
+            st.stop()
+
+    setup = None
+    if name in ML_STRATEGIES:
+        def report(epoch, num_epochs, loss):
+            st.write(f'Epoch [{epoch}/{num_epochs}], Loss: {loss:.4f}')
+
+        with st.spinner("訓練模型..."):
+            _, setup = _setup(name, df, strategy_params(name, params), initial_cash, commission, on_epoch=report)
+
+    analyzers = [(ChartRecorder, 'chart')]  # 記錄繪圖用的陣列
+    if journal:
+        analyzers.append((TradeJournal, 'journal'))  # 記錄訂單、成交與交易事件
+    with st.spinner("回測中..."), span("backtest") as s:
+        summary, strat, _ = _run(name, df, params, initial_cash, commission, analyzers, lean, setup=setup, feed=feed)
+        s["bars"] = summary["bars"]
+    analysis = strat.analyzers.chart.get_analysis()
+    journal_analysis = strat.analyzers.journal.get_analysis() if journal else None
+    with span("save_result"):
+        save_result(key, analysis, journal_analysis)
+    return analysis, journal_analysis
+
+
+# 函數：顯示回測結果（剛執行完或從結果庫讀取）：帳戶摘要、績效指標、互動圖表與交易紀錄
+# summary 為 False 時不顯示帳戶摘要（首頁以自己的卡片顯示）
+def show_backtest_results(analysis, journal_analysis, symbol, initial_cash, show_rolling=False, summary=True):
+    import streamlit as st
+    from charts import build_chart
+    from journal import journal_frame
+    from instrument import span
+    from metrics import account_summary, show_metrics
+
+    if summary:
+        account = account_summary(analysis, initial_cash)
+        st.write(f"初始投資組合價值: ${initial_cash:.2f}")
+        st.write(f"最終投資組合價值: ${account['final_value']:.2f}")
+        st.write(f"盈虧: ${account['pnl']:.2f}")
+        st.write(f"投資報酬率: {account['roi_pct']:.2f}%")
+
+    # 績效指標（由記錄的資產曲線與交易一次計算）
+    show_metrics(analysis, initial_cash, show_rolling)
+
+    with span("chart"):
+        st.plotly_chart(build_chart(analysis), use_container_width=True)  # 降採樣後的互動圖表
+
+    if journal_analysis is not None:
+        journal = journal_frame(journal_analysis)
+        st.subheader("交易紀錄")
+        st.dataframe(journal, use_container_width=True)
+        st.download_button("下載交易紀錄 (CSV)", journal.to_csv(index=False).encode('utf-8'),
+                           file_name=f"{symbol}_journal.csv", mime="text/csv")
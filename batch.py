@@ -0,0 +1,141 @@
+"""無需瀏覽器的批次回測工具
+
+範例：
+    python batch.py --universe tickers.txt --strategy MACD --param fast=8 --param slow=21 \
+        --start 2015-01-01 --output results.parquet --workers 8
+
+每天更新時加上 --checkpoint-dir，從上次的檢查點接續，只處理新增的 K 線：
+    python batch.py --universe tickers.txt --strategy MACD --start 2015-01-01 --checkpoint-dir .cache/checkpoints
+
+universe 檔案每行一個股票代碼（也接受逗號分隔，# 開頭為註解）。
+"""
+import os
+import sys
+import json
+import argparse
+import datetime
+import traceback
+import concurrent.futures
+import pandas as pd
+from backtest import STRATEGY_DEFAULTS, resolve_strategy_name, strategy_params
+
+
+# 函數：讀取股票清單
+def read_universe(path):
+    symbols = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0]
+            symbols.extend(s.strip() for s in line.split(',') if s.strip())
+    # 保留順序並去除重複
+    return list(dict.fromkeys(symbols))
+
+
+# 函數：解析 key=value 形式的策略參數，數值自動轉型
+def parse_params(items):
+    params = {}
+    for item in items or []:
+        key, _, value = item.partition('=')
+        if not _:
+            raise ValueError("參數格式應為 key=value: %s" % item)
+        for cast in (int, float):
+            try:
+                value = cast(value)
+                break
+            except ValueError:
+                continue
+        params[key.strip()] = value
+    return params
+
+
+# 函數：在工作行程中執行單一股票的回測（必須是模組層級函數才能傳給行程池）
+def run_job(job):
+    from data import download_prices
+    from backtest import run_backtest, update_backtest
+
+    row = {
+        "symbol": job["symbol"],
+        "strategy": job["strategy"],
+        "params": json.dumps(job["params"], sort_keys=True),
+        "start": job["start"],
+        "end": job["end"],
+        "error": None,
+    }
+    try:
+        df = download_prices(job["symbol"], job["start"], job["end"])
+        if df.empty:
+            raise ValueError("沒有數據")
+        if job["checkpoint"]:
+            summary, _ = update_backtest(job["checkpoint"], job["strategy"], df, job["params"],
+                                         job["initial_cash"], job["commission"], lean=job["lean"])
+        else:
+            summary, _ = run_backtest(job["strategy"], df, job["params"], job["initial_cash"], job["commission"],
+                                      lean=job["lean"])
+        row.update(summary)
+    except Exception as e:
+        row["error"] = "%s: %s" % (type(e).__name__, e)
+        traceback.print_exc()
+    return row
+
+
+# 函數：依副檔名寫出欄式檔案（Parquet），.csv 則寫出 CSV
+def write_results(rows, path):
+    df = pd.DataFrame(rows)
+    if path.endswith('.csv'):
+        df.to_csv(path, index=False)
+    else:
+        df.to_parquet(path, index=False)
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批次回測：對股票清單中的每一檔股票執行同一個策略")
+    parser.add_argument('--universe', required=True, help="股票清單檔案")
+    parser.add_argument('--strategy', required=True, help="策略名稱: %s" % ', '.join(STRATEGY_DEFAULTS))
+    parser.add_argument('--param', action='append', default=[], help="策略參數 key=value，可重複指定")
+    parser.add_argument('--start', default="2020-01-01", help="開始日期")
+    parser.add_argument('--end', default=datetime.date.today().isoformat(), help="結束日期")
+    parser.add_argument('--cash', type=float, default=10000, help="初始現金")
+    parser.add_argument('--commission', type=float, default=0.001, help="交易手續費，與頁面的手續費滑桿相同的數值（換算見 backtest.COMMISSION_SCALE）")
+    parser.add_argument('--lean', action='store_true', help="省記憶體模式（適用於很長的歷史或分鐘數據）")
+    parser.add_argument('--checkpoint-dir', help="檢查點目錄：每檔股票保存最後的策略狀態，下次只處理新增的 K 線")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="工作行程數")
+    parser.add_argument('--output', default="results.parquet", help="輸出檔案（.parquet 或 .csv）")
+    args = parser.parse_args(argv)
+
+    strategy = resolve_strategy_name(args.strategy)
+    params = strategy_params(strategy, parse_params(args.param))
+    symbols = read_universe(args.universe)
+    if args.checkpoint_dir:
+        os.makedirs(args.checkpoint_dir, exist_ok=True)
+    jobs = [
+        {
+            "symbol": symbol,
+            "strategy": strategy,
+            "params": params,
+            "start": args.start,
+            "end": args.end,
+            "initial_cash": args.cash,
+            "commission": args.commission,
+            "lean": args.lean,
+            "checkpoint": os.path.join(args.checkpoint_dir, "%s_%s.ckpt" % (symbol, strategy)) if args.checkpoint_dir else None,
+        }
+        for symbol in symbols
+    ]
+
+    rows = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(run_job, job) for job in jobs]
+        for future in concurrent.futures.as_completed(futures):
+            row = future.result()
+            rows.append(row)
+            status = row["error"] or "最終價值 %.2f" % row["final_value"]
+            print("[%d/%d] %s: %s" % (len(rows), len(jobs), row["symbol"], status), file=sys.stderr)
+
+    write_results(rows, args.output)
+    print("已寫出 %d 筆結果到 %s" % (len(rows), args.output), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""離線效能基準測試：以幾何布朗運動產生的 K 線分別量測各個熱點路徑
+
+不需要網路；相同的 --seed 產生相同的數據與模型。每個（項目, K 線數）的結果以一行 JSON
+附加到輸出檔（含 git commit 與執行環境），可以跨版本比較。
+
+範例：
+    python bench.py                                   # 1k、10k、100k、1M 根 K 線，全部項目
+    python bench.py --bars 10000 --only backtest_MACD chart --repeat 5
+    python bench.py --list
+
+SVM、LSTM、Prophet 與機器學習策略的回測在大量 K 線下需要數分鐘到數小時，
+超過 MAX_BARS 的組合會略過（記錄為 skipped），加上 --no-limits 強制執行。
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import datetime
+import subprocess
+import statistics
+import numpy as np
+import pandas as pd
+
+DEFAULT_BARS = (1000, 10000, 100000, 1000000)
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'bench', 'results.jsonl')
+
+# 模型的視窗長度（與 backtest.py 相同）
+WINDOW_SIZE = 10
+
+# 每年的交易日與每天的交易分鐘數（換算幾何布朗運動的時間間隔）
+TRADING_DAYS = 252
+MINUTES_PER_DAY = 390
+
+# 日線的 K 線數上限（pandas 的日期範圍到 2262 年），超過時改用一分鐘 K 線
+MAX_DAILY_BARS = 50000
+
+# 各項目執行的 K 線數上限，None 為不限制
+MAX_BARS = {
+    "train_rf": 100000,
+    "predict_rf": 100000,
+    "train_svm": 20000,
+    "predict_svm": 20000,
+    "train_lstm": 100000,
+    "predict_lstm": 100000,
+    "backtest_LSTM": 10000,
+    "backtest_RF": 10000,
+    "backtest_SVM": 10000,
+    "prophet_fit": 10000,
+    "prophet_predict": 10000,
+}
+
+
+# 函數：以幾何布朗運動產生 OHLCV（欄位與 yfinance 相同），freq 預設依 K 線數選擇日線或一分鐘
+def synthetic_ohlcv(bars, seed=0, mu=0.08, sigma=0.25, start="2000-01-03", freq=None):
+    freq = freq or ('B' if bars <= MAX_DAILY_BARS else 'min')
+    dt = 1 / TRADING_DAYS if freq == 'B' else 1 / (TRADING_DAYS * MINUTES_PER_DAY)
+    rng = np.random.default_rng(seed)
+    step = sigma * np.sqrt(dt)
+    close = 100 * np.exp(np.cumsum((mu - sigma ** 2 / 2) * dt + step * rng.standard_normal(bars)))
+    # 開盤價為前一根收盤價加上小幅跳空，最高與最低價向外延伸
+    open_ = np.concatenate(([100.0], close[:-1])) * np.exp(0.1 * step * rng.standard_normal(bars))
+    spread = 0.5 * step * np.abs(rng.standard_normal((2, bars)))
+    return pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) * (1 + spread[0]),
+        "Low": np.minimum(open_, close) * (1 - spread[1]),
+        "Close": close,
+        "Volume": rng.lognormal(13, 0.5, bars).round(),
+    }, index=pd.date_range(start, periods=bars, freq=freq, name='Date'))
+
+
+# 函數：同一個 K 線數的各項目共用的中間結果（數據集、已訓練的模型），只計算一次
+def _shared(context, key, compute):
+    if key not in context:
+        context[key] = compute()
+    return context[key]
+
+
+def _ml_frame(context):
+    from backtest import _ml_frame, strategy_params
+    return _shared(context, "ml_frame", lambda: _ml_frame(context["df"], strategy_params("RF")))
+
+
+def _dataset(context):
+    from ml_strategies import create_dataset
+    return _shared(context, "dataset", lambda: create_dataset(_ml_frame(context), WINDOW_SIZE))
+
+
+def _model(context, name):
+    def train():
+        X, y, _ = _dataset(context)
+        if name == "lstm":
+            import torch
+            from lstm_strategy import train_lstm_model
+            torch.manual_seed(context["seed"])
+            return train_lstm_model(torch.from_numpy(X).float(), torch.from_numpy(y).long(),
+                                    num_epochs=context["lstm_epochs"])
+        from ml_strategies import train_random_forest_model, train_svm_model
+        return (train_random_forest_model if name == "rf" else train_svm_model)(X, y)
+    return _shared(context, "model_" + name, train)
+
+
+# 每個項目回傳要計時的函數（準備工作不計時）
+def case_create_dataset(context):
+    from ml_strategies import create_dataset
+    df = _ml_frame(context)
+    return lambda: create_dataset(df, WINDOW_SIZE)
+
+
+def _train_case(name):
+    def case(context):
+        _dataset(context)
+
+        def train():
+            context.pop("model_" + name, None)
+            return _model(context, name)
+        return train
+    return case
+
+
+def _predict_case(name):
+    def case(context):
+        X, _, _ = _dataset(context)
+        model = _model(context, name)
+        if name == "lstm":
+            import torch
+            inputs = torch.from_numpy(X).float()
+
+            def predict():
+                model.eval()
+                with torch.no_grad():
+                    return model(inputs).argmax(dim=1)
+            return predict
+        flat = X.reshape(X.shape[0], -1)
+        return lambda: model.predict(flat)
+    return case
+
+
+def _backtest_case(name):
+    def case(context):
+        from backtest import run_backtest, _setup, strategy_params, ML_STRATEGIES
+        from charts import ChartRecorder
+        df = context["df"]
+        params = {"num_epochs": context["lstm_epochs"]} if name == "LSTM" else None
+        # 機器學習策略先訓練好模型，只量測 cerebro.run
+        setup = None
+        if name in ML_STRATEGIES:
+            setup = _shared(context, "setup_" + name, lambda: _setup(name, df, strategy_params(name, params))[1])
+        return lambda: run_backtest(name, df, params, analyzers=[(ChartRecorder, 'chart')], setup=setup)
+    return case
+
+
+def _prophet_train(context):
+    from forecast import prepare_training_data, DEFAULT_PROFILE
+    return prepare_training_data(context["df"].reset_index(), None, DEFAULT_PROFILE["weekly"])
+
+
+def case_prophet_fit(context):
+    from forecast import build_model, DEFAULT_PROFILE
+    train = _prophet_train(context)
+    return lambda: build_model(DEFAULT_PROFILE).fit(train)
+
+
+def case_prophet_predict(context):
+    from forecast import build_model, DEFAULT_PROFILE
+    m = build_model(DEFAULT_PROFILE).fit(_prophet_train(context))
+    future = m.make_future_dataframe(periods=365)
+    return lambda: m.predict(future)
+
+
+# 圖表：建立 plotly 圖表並序列化為 JSON（Streamlit 傳給瀏覽器的內容）
+def case_chart(context):
+    from backtest import run_backtest
+    from charts import ChartRecorder, build_chart
+    _, strat = run_backtest("MACD", context["df"], analyzers=[(ChartRecorder, 'chart')])
+    analysis = strat.analyzers.chart.get_analysis()
+    return lambda: build_chart(analysis).to_json()
+
+
+# 函數：所有測試項目 {名稱: 準備函數}
+def cases():
+    from backtest import STRATEGY_DEFAULTS
+    result = {"create_dataset": case_create_dataset}
+    for name in ("rf", "svm", "lstm"):
+        result["train_" + name] = _train_case(name)
+        result["predict_" + name] = _predict_case(name)
+    for name in STRATEGY_DEFAULTS:
+        result["backtest_" + name] = _backtest_case(name)
+    result["prophet_fit"] = case_prophet_fit
+    result["prophet_predict"] = case_prophet_predict
+    result["chart"] = case_chart
+    return result
+
+
+# 函數：目前的 git commit（不在 git 目錄中時為 None）
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# 函數：執行基準測試，每個結果寫入一行 JSON 並回傳所有結果
+def run(bars_list=DEFAULT_BARS, only=None, repeat=1, seed=0, lstm_epochs=1, output=DEFAULT_OUTPUT, limits=True):
+    from resources import TOTAL_CORES
+    registry = cases()
+    unknown = set(only or ()) - set(registry)
+    if unknown:
+        raise ValueError("未知的測試項目: %s（可用: %s）" % (', '.join(sorted(unknown)), ', '.join(registry)))
+
+    environment = {
+        "run": datetime.datetime.now().isoformat(timespec='seconds'),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "cpu_budget": TOTAL_CORES,
+        "seed": seed,
+        "lstm_epochs": lstm_epochs,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    rows = []
+    for bars in bars_list:
+        df = synthetic_ohlcv(bars, seed)
+        context = {"df": df, "seed": seed, "lstm_epochs": lstm_epochs}
+        for name, prepare in registry.items():
+            if only and name not in only:
+                continue
+            row = dict(environment, case=name, bars=bars, freq=df.index.freqstr, repeat=repeat)
+            limit = MAX_BARS.get(name)
+            if limits and limit is not None and bars > limit:
+                row.update(status="skipped", error="超過 %d 根 K 線的上限" % limit)
+            else:
+                try:
+                    func = prepare(context)
+                    times = []
+                    for _ in range(repeat):
+                        start_time = time.perf_counter()
+                        func()
+                        times.append(time.perf_counter() - start_time)
+                    row.update(status="ok", min_s=min(times), median_s=statistics.median(times), times_s=times)
+                except Exception as error:
+                    row.update(status="error", error="%s: %s" % (type(error).__name__, error))
+            rows.append(row)
+            with open(output, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(row, ensure_ascii=False) + '\n')
+            print("%-22s %8d  %s" % (name, bars, "%.4f s" % row["min_s"] if row["status"] == "ok" else row["status"]),
+                  file=sys.stderr)
+    return rows
+
+
+# 函數：把結果整理為表格（項目 × K 線數，數值為最短耗時秒數）
+def summary(rows):
+    df = pd.DataFrame(rows)
+    if "min_s" not in df:
+        return df
+    return df.pivot_table(index="case", columns="bars", values="min_s", sort=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="離線效能基準測試")
+    parser.add_argument("--bars", type=int, nargs="+", default=list(DEFAULT_BARS), help="K 線數（可多個）")
+    parser.add_argument("--only", nargs="+", help="只執行指定的項目（見 --list）")
+    parser.add_argument("--repeat", type=int, default=1, help="每個項目重複次數，記錄最短與中位數耗時")
+    parser.add_argument("--seed", type=int, default=0, help="隨機種子（數據與模型）")
+    parser.add_argument("--lstm-epochs", type=int, default=1, help="LSTM 訓練的 epoch 數")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="結果檔（JSON Lines，附加寫入）")
+    parser.add_argument("--no-limits", action="store_true", help="不略過超過 MAX_BARS 的組合")
+    parser.add_argument("--list", action="store_true", help="列出所有測試項目")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print('\n'.join(cases()))
+        return 0
+    rows = run(args.bars, args.only, args.repeat, args.seed, args.lstm_epochs, args.output, not args.no_limits)
+    print(summary(rows).round(4).to_string())
+    print("結果已附加到 %s" % args.output, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
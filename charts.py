@@ -0,0 +1,233 @@
+import numpy as np
+import pandas as pd
+import backtrader as bt
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+# 每條曲線最多傳送到瀏覽器的點數，圖表成本不隨歷史長度增加
+MAX_POINTS = 1500
+# 買賣點標記的上限
+MAX_MARKERS = 500
+
+# backtrader 的日期數值以西元 1 年為起點，1970-01-01 對應的序數
+_EPOCH_ORDINAL = 719163.0
+
+
+# 函數：將 backtrader 的日期數值陣列轉換為 pandas 日期
+def num2datetime(values):
+    return pd.to_datetime((np.asarray(values) - _EPOCH_ORDINAL) * 86400.0, unit='s').round('s')
+
+
+# 函數：Largest-Triangle-Three-Buckets 降採樣，回傳保留點的索引
+def lttb(x, y, n_out):
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    # 第一個與最後一個點固定保留，中間的點平均分到 n_out - 2 個桶
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # 下一個桶的平均點（最後一個桶則使用最後一個點）
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # 選出與前一個保留點、下一桶平均點構成最大三角形面積的點
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+
+    return indices
+
+
+# 函數：對含有 NaN（指標暖身期）的序列降採樣
+def downsample(x, y, n_out=MAX_POINTS):
+    valid = ~np.isnan(y)
+    x, y = x[valid], y[valid]
+    idx = lttb(x, y, n_out)
+    return x[idx], y[idx]
+
+
+# 分析器：回測期間把價格、指標、成交與資產曲線記錄為陣列
+class ChartRecorder(bt.Analyzer):
+
+    def start(self):
+        # 預載入的數據已知長度，直接預先配置陣列；
+        # 省記憶體模式（exactbars）下數據線只保留最近幾根 K 線，改用數據源的總長度
+        data = self.strategy.data
+        capacity = max(data.source_len() if hasattr(data, 'source_len') else data.buflen(), 16)
+        self.count = 0
+        self.datetime = np.empty(capacity)
+        self.close = np.empty(capacity)
+        self.equity = np.empty(capacity)
+        self.position = np.empty(capacity)
+
+        # 依照指標本身的 plotinfo 決定疊加在價格上或獨立子圖
+        self.indicator_lines = []
+        for ind in self.strategy.getindicators():
+            if not ind.plotinfo.plot:
+                continue
+            label = ind.plotlabel()
+            for i in range(ind.lines.size()):
+                alias = ind.lines._getlinealias(i)
+                name = label if ind.lines.size() == 1 else f"{label} {alias}"
+                self.indicator_lines.append((label, name, bool(ind.plotinfo.subplot), ind.lines[i]))
+        # 數據源中預先計算的指標欄位（見 indicators.PrecomputedSMAData）疊加在價格上
+        if hasattr(self.strategy.data, 'precomputed'):
+            for line, indicator, params in self.strategy.data.precomputed():
+                label = "%s (%s)" % (indicator.__name__, ', '.join(str(v) for v in params.values()))
+                self.indicator_lines.append((label, label, False, line))
+        self.indicators = np.empty((len(self.indicator_lines), capacity))
+
+        self.fills = []
+        self.trades = []  # 已平倉交易的淨損益
+
+    def _grow(self):
+        capacity = len(self.datetime) * 2
+        self.datetime = np.resize(self.datetime, capacity)
+        self.close = np.resize(self.close, capacity)
+        self.equity = np.resize(self.equity, capacity)
+        self.position = np.resize(self.position, capacity)
+        indicators = np.empty((len(self.indicator_lines), capacity))
+        indicators[:, :self.count] = self.indicators[:, :self.count]
+        self.indicators = indicators
+
+    def next(self):
+        if self.count == len(self.datetime):
+            self._grow()
+        i = self.count
+        self.datetime[i] = self.strategy.data.datetime[0]
+        self.close[i] = self.strategy.data.close[0]
+        self.equity[i] = self.strategy.broker.getvalue()
+        self.position[i] = self.strategy.position.size
+        for row, (_, _, _, line) in enumerate(self.indicator_lines):
+            self.indicators[row, i] = line[0]
+        self.count += 1
+
+    def notify_order(self, order):
+        if order.status == order.Completed:
+            self.fills.append((order.executed.dt, order.executed.price, order.executed.size, order.isbuy()))
+
+    def notify_trade(self, trade):
+        if trade.isclosed:
+            self.trades.append(trade.pnlcomm)
+
+    # 函數：從檢查點接續時，以保存的結果取代檢查點之前的紀錄（這段期間沒有執行策略邏輯）
+    def restore(self, analysis):
+        n = min(self.count, len(analysis["equity"]))
+        self.equity[:n] = analysis["equity"][:n]
+        self.position[:n] = analysis["position"][:n]
+        self.fills = list(analysis["fills"])
+        self.trades = list(analysis["trades"])
+
+    def stop(self):
+        # 只保留陣列，釋放對指標線的參考，結果可以在行程之間傳遞
+        self.indicator_lines = [(label, name, subplot, None) for label, name, subplot, _ in self.indicator_lines]
+
+    def get_analysis(self):
+        n = self.count
+        return {
+            "datetime": self.datetime[:n],
+            "close": self.close[:n],
+            "equity": self.equity[:n],
+            "position": self.position[:n],
+            "indicators": [
+                (label, name, subplot, self.indicators[row, :n])
+                for row, (label, name, subplot, _) in enumerate(self.indicator_lines)
+            ],
+            "fills": self.fills,
+            "trades": np.array(self.trades),
+        }
+
+
+# 函數：依記錄的陣列建立降採樣後的互動圖表
+def build_chart(analysis, title=None, max_points=MAX_POINTS):
+    x = analysis["datetime"]
+    subplot_labels = []
+    for label, _, subplot, _ in analysis["indicators"]:
+        if subplot and label not in subplot_labels:
+            subplot_labels.append(label)
+
+    rows = 2 + len(subplot_labels)
+    row_heights = [0.5] + [0.5 / (rows - 1)] * (rows - 1)
+    fig = make_subplots(rows=rows, cols=1, shared_xaxes=True, vertical_spacing=0.02,
+                        row_heights=row_heights, subplot_titles=[title or "Price"] + subplot_labels + ["Equity"])
+
+    # 價格
+    px, py = downsample(x, analysis["close"], max_points)
+    fig.add_trace(go.Scattergl(x=num2datetime(px), y=py, mode='lines', name='Close',
+                               line=dict(color='#00BFFF', width=1)), row=1, col=1)
+
+    # 指標
+    for label, name, subplot, values in analysis["indicators"]:
+        row = 2 + subplot_labels.index(label) if subplot else 1
+        ix, iy = downsample(x, values, max_points)
+        fig.add_trace(go.Scattergl(x=num2datetime(ix), y=iy, mode='lines', name=name,
+                                   line=dict(width=1)), row=row, col=1)
+
+    # 買賣點（超過上限時平均抽樣）
+    fills = analysis["fills"]
+    if len(fills) > MAX_MARKERS:
+        fills = [fills[i] for i in np.linspace(0, len(fills) - 1, MAX_MARKERS).astype(int)]
+    for isbuy, symbol, color, name in ((True, 'triangle-up', '#00FF00', 'Buy'), (False, 'triangle-down', '#FF0000', 'Sell')):
+        points = [(dt, price) for dt, price, _, buy in fills if buy == isbuy]
+        if points:
+            dts, prices = zip(*points)
+            fig.add_trace(go.Scattergl(x=num2datetime(dts), y=prices, mode='markers', name=name,
+                                       marker=dict(symbol=symbol, color=color, size=9)), row=1, col=1)
+
+    # 資產曲線
+    ex, ey = downsample(x, analysis["equity"], max_points)
+    fig.add_trace(go.Scattergl(x=num2datetime(ex), y=ey, mode='lines', name='Equity',
+                               line=dict(color='#FF00FF', width=1)), row=rows, col=1)
+
+    fig.update_layout(template='plotly_dark', height=300 + 180 * (rows - 1),
+                      margin=dict(l=40, r=20, t=40, b=20), showlegend=True)
+    return fig
+
+
+# 函數：把多個策略的資產曲線畫在同一張圖上，analyses 為 {策略名稱: ChartRecorder 的結果}
+def build_comparison_chart(analyses, title=None, max_points=MAX_POINTS):
+    fig = go.Figure()
+    for name, analysis in analyses.items():
+        ex, ey = downsample(analysis["datetime"], analysis["equity"], max_points)
+        fig.add_trace(go.Scattergl(x=num2datetime(ex), y=ey, mode='lines', name=name, line=dict(width=1)))
+
+    fig.update_layout(template='plotly_dark', height=450, title=title, yaxis_title='Equity',
+                      margin=dict(l=40, r=20, t=40, b=20), showlegend=True)
+    return fig
+
+
+# 函數：滾動指標（年化報酬、波動率、Sharpe 與回撤）的降採樣圖表，window 為 K 線數
+def build_rolling_chart(analysis, window, initial_cash=None, max_points=MAX_POINTS):
+    from metrics import rolling
+    x = np.asarray(analysis["datetime"], dtype=float)
+    frame = rolling(analysis, window, initial_cash)
+    rows = (("滾動年化報酬率 / 波動率 (%)", ("return_pct", "volatility_pct")),
+            ("滾動 Sharpe", ("sharpe",)),
+            ("回撤 (%)", ("drawdown_pct",)))
+    fig = make_subplots(rows=len(rows), cols=1, shared_xaxes=True, vertical_spacing=0.05,
+                        subplot_titles=[label for label, _ in rows])
+    for row, (_, columns) in enumerate(rows, start=1):
+        for column in columns:
+            rx, ry = downsample(x, frame[column].to_numpy(), max_points)
+            fig.add_trace(go.Scattergl(x=num2datetime(rx), y=ry, mode='lines', name=column,
+                                       line=dict(width=1)), row=row, col=1)
+
+    fig.update_layout(template='plotly_dark', height=600, title="滾動指標（%d 根 K 線）" % window,
+                      margin=dict(l=40, r=20, t=60, b=20), showlegend=True)
+    return fig
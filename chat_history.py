@@ -0,0 +1,83 @@
+"""聊天紀錄：session 中只保留最近 HISTORY_MAX 則訊息，較早的訊息附加寫入磁碟上的封存檔
+
+每個聊天（session）一個 JSON Lines 封存檔（ARCHIVE_DIR/<聊天 ID>.jsonl），一行一則訊息；
+環境變數 CHAT_HISTORY_MAX 調整保留的訊息數，CHAT_ARCHIVE=0 時超過的訊息直接捨棄不寫入。
+封存檔超過 CHAT_ARCHIVE_DAYS 天沒有更新時刪除，檔案數超過 ARCHIVE_MAX_FILES 時先刪除最舊的。
+頁面每次只顯示最近 RENDER_WINDOW 則訊息（可逐頁展開較早的訊息），重新執行的成本不隨對話長度增加。
+"""
+import os
+import json
+import time
+import threading
+import contextlib
+
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'chat')
+HISTORY_MAX = max(1, int(os.environ.get("CHAT_HISTORY_MAX", 200)))
+ARCHIVE = os.environ.get("CHAT_ARCHIVE", "1") != "0"
+
+# 封存檔的保存期限（秒）與檔案數上限，以及兩次清理之間至少間隔的秒數
+ARCHIVE_TTL = float(os.environ.get("CHAT_ARCHIVE_DAYS", 30)) * 24 * 3600
+ARCHIVE_MAX_FILES = 1000
+CLEANUP_INTERVAL = 3600
+
+# 每次顯示的訊息數（也是每按一次「顯示較早的訊息」增加的數量）
+RENDER_WINDOW = 20
+
+_lock = threading.Lock()
+_last_cleanup = 0.0
+
+
+# 函數：聊天的封存檔路徑
+def archive_path(chat_id):
+    return os.path.join(ARCHIVE_DIR, "%s.jsonl" % chat_id)
+
+
+# 函數：訊息超過 keep 則時，把最舊的訊息移到封存檔，回傳移出的訊息數
+def trim(messages, chat_id, keep=HISTORY_MAX):
+    overflow = len(messages) - keep
+    if overflow <= 0:
+        return 0
+    old = messages[:overflow]
+    del messages[:overflow]
+    if ARCHIVE:
+        lines = ''.join(json.dumps(dict(message, archived=time.time()), ensure_ascii=False) + '\n'
+                        for message in old)
+        with _lock:
+            os.makedirs(ARCHIVE_DIR, exist_ok=True)
+            with open(archive_path(chat_id), 'a', encoding='utf-8') as f:
+                f.write(lines)
+        if time.time() - _last_cleanup > CLEANUP_INTERVAL:
+            cleanup()
+    return overflow
+
+
+# 函數：刪除過期的封存檔，檔案數超過上限時再刪除最久沒有更新的檔案，回傳刪除的檔案數
+def cleanup(ttl=ARCHIVE_TTL, max_files=ARCHIVE_MAX_FILES):
+    global _last_cleanup
+    now = time.time()
+    with _lock:
+        _last_cleanup = now
+        try:
+            names = [name for name in os.listdir(ARCHIVE_DIR) if name.endswith('.jsonl')]
+        except FileNotFoundError:
+            return 0
+        files = []
+        for name in names:
+            path = os.path.join(ARCHIVE_DIR, name)
+            with contextlib.suppress(FileNotFoundError):
+                files.append((os.path.getmtime(path), path))
+        files.sort(reverse=True)
+        removed = [path for index, (mtime, path) in enumerate(files) if now - mtime > ttl or index >= max_files]
+        for path in removed:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+    return len(removed)
+
+
+# 函數：讀取封存的訊息（依時間順序），沒有封存檔時回傳空串列
+def load_archive(chat_id):
+    try:
+        with open(archive_path(chat_id), encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
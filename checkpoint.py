@@ -0,0 +1,185 @@
+"""回測檢查點：保存最後一根 K 線的策略與帳戶狀態，之後只處理新增的 K 線
+
+保存的內容：現金與資產價值、持倉、尚未成交的訂單、未平倉的交易、
+策略本身的狀態（公開的純量屬性，例如計數器、買入價格、目前的訂單），
+以及有 restore() 的分析器結果（見 charts.ChartRecorder、journal.TradeJournal）。
+
+接續回測時，檢查點之前的 K 線只推進數據、指標與計時器（指標以向量方式計算，
+EMA 這類依賴全部歷史的指標因此與完整重跑完全相同），不執行策略邏輯、
+模型預測與訂單撮合；到檢查點那根 K 線時還原狀態，之後的 K 線照常執行。
+"""
+import os
+import pickle
+import hashlib
+import numpy as np
+import pandas as pd
+import backtrader as bt
+
+CHECKPOINT_VERSION = 1
+
+# 需要保存的帳戶欄位（BackBroker 在每根 K 線更新的現金與資產價值）
+BROKER_FIELDS = ('cash', '_value', '_valuemkt', '_valuelever', '_valuemktlever',
+                 '_leverage', '_unrealized', '_fundval', '_fundshares')
+
+# 未平倉交易需要保存的欄位
+TRADE_FIELDS = ('tradeid', 'size', 'price', 'value', 'commission', 'pnl', 'pnlcomm',
+                'justopened', 'isopen', 'isclosed', 'status', 'baropen', 'dtopen', 'barlen')
+
+# 策略屬性中可以直接保存的型別
+PLAIN_TYPES = (type(None), bool, int, float, str, np.generic)
+
+
+# 函數：數據前 rows 列的指紋，用來確認歷史數據沒有變動（例如除權息調整）
+def data_digest(df, rows=None):
+    rows = len(df) if rows is None else rows
+    hashed = pd.util.hash_pandas_object(df.iloc[:rows], index=True).to_numpy()
+    return hashlib.sha1(hashed.tobytes()).hexdigest()
+
+
+# 函數：保存訂單的下單參數，接續回測時重新送出
+def _order_state(order):
+    return {
+        "ref": order.ref,
+        "data": order.data._id - 1,
+        "isbuy": order.isbuy(),
+        "size": abs(order.created.size),
+        "price": order.price,
+        "plimit": order.pricelimit,
+        "exectype": order.exectype,
+        "valid": order.valid,
+        "tradeid": order.tradeid,
+    }
+
+
+# 函數：回測結束後取得策略與帳戶的狀態
+def snapshot(strategy):
+    broker = strategy.broker
+    datas = strategy.datas
+    orders = [order for order in broker.orders if order.alive()]
+
+    attrs = {}
+    for name, value in vars(strategy).items():
+        if name.startswith('_'):
+            continue
+        if isinstance(value, PLAIN_TYPES):
+            attrs[name] = value
+        elif isinstance(value, bt.Order):
+            # 訂單以編號保存，還原時對應到重新送出的訂單
+            attrs[name] = ('order', value.ref if value.alive() else None)
+
+    trades = []
+    for i, data in enumerate(datas):
+        for tradeid, datatrades in strategy._trades[data].items():
+            if datatrades and not datatrades[-1].isclosed:
+                trade = datatrades[-1]
+                trades.append(dict(data=i, **{field: getattr(trade, field) for field in TRADE_FIELDS}))
+
+    return {
+        "version": CHECKPOINT_VERSION,
+        "datetime": strategy.datetime[0],
+        "bars": len(strategy),
+        "broker": {field: getattr(broker, field) for field in BROKER_FIELDS},
+        "positions": [(broker.getposition(data).size, broker.getposition(data).price) for data in datas],
+        "orders": [_order_state(order) for order in orders],
+        "trades": trades,
+        "attrs": attrs,
+        "analyzers": {name: analyzer.get_analysis()
+                      for name, analyzer in zip(strategy.analyzers.getnames(), strategy.analyzers)
+                      if hasattr(analyzer, 'restore')},
+    }
+
+
+# 函數：在檢查點那根 K 線把狀態還原到策略與帳戶
+def restore(strategy, state):
+    broker = strategy.broker
+    datas = strategy.datas
+    for field, value in state["broker"].items():
+        setattr(broker, field, value)
+    for data, (size, price) in zip(datas, state["positions"]):
+        broker.positions[data] = bt.Position(size, price)
+
+    for trade_state in state["trades"]:
+        trade_state = dict(trade_state)
+        data = datas[trade_state.pop("data")]
+        trade = bt.Trade(data=data, tradeid=trade_state["tradeid"])
+        for field, value in trade_state.items():
+            setattr(trade, field, value)
+        strategy._trades[data][trade.tradeid] = [trade]
+
+    # 重新送出尚未成交的訂單，與原本一樣在下一根 K 線撮合
+    orders = {}
+    for order_state in state["orders"]:
+        submit = strategy.buy if order_state["isbuy"] else strategy.sell
+        orders[order_state["ref"]] = submit(
+            data=datas[order_state["data"]], size=order_state["size"], price=order_state["price"],
+            plimit=order_state["plimit"], exectype=order_state["exectype"], valid=order_state["valid"],
+            tradeid=order_state["tradeid"])
+
+    for name, value in state["attrs"].items():
+        if isinstance(value, tuple) and value[:1] == ('order',):
+            value = orders.get(value[1])
+        setattr(strategy, name, value)
+
+    saved = state["analyzers"]
+    for name, analyzer in zip(strategy.analyzers.getnames(), strategy.analyzers):
+        if name in saved and hasattr(analyzer, 'restore'):
+            analyzer.restore(saved[name])
+
+
+# 函數：建立從檢查點接續的策略類別
+# 檢查點（含）之前的 K 線不執行策略邏輯與計時器，到檢查點那根 K 線時還原狀態
+def resumable(strategy, state):
+
+    class Resumed(strategy):
+
+        def _replayed(self):
+            dt = self.datas[0].datetime[0]
+            if getattr(self, '_checkpoint_restored', False):
+                return False
+            if dt < state["datetime"]:
+                return True
+            if dt > state["datetime"]:
+                raise ValueError("數據中沒有檢查點的 K 線 (%s)" % bt.num2date(state["datetime"]))
+            restore(self, state)
+            self._checkpoint_restored = True
+            return True
+
+        def prenext(self):
+            if not self._replayed():
+                super(Resumed, self).prenext()
+
+        def nextstart(self):
+            if not self._replayed():
+                super(Resumed, self).nextstart()
+
+        def next(self):
+            if not self._replayed():
+                super(Resumed, self).next()
+
+        def notify_timer(self, timer, when, *args, **kwargs):
+            # 計時器本身照常推進，檢查點（含）之前觸發的定期投資已反映在還原的狀態中
+            if getattr(self, '_checkpoint_restored', False):
+                super(Resumed, self).notify_timer(timer, when, *args, **kwargs)
+
+    Resumed.__name__ = strategy.__name__
+    return Resumed
+
+
+# 函數：寫入檢查點（先寫暫存檔再換名，不會留下寫到一半的檔案）
+def save(path, state):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+# 函數：讀取檢查點，檔案不存在或版本不符時回傳 None
+def load(path):
+    try:
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    if state.get("version") != CHECKPOINT_VERSION:
+        return None
+    return state
@@ -0,0 +1,170 @@
+"""Coze 聊天機器人的 API 客戶端
+
+所有請求共用一個 keep-alive 的 requests.Session（連線池），不必每個問題重新建立 TCP / TLS 連線；
+stream_chat 以串流模式（Server-Sent Events）逐段回傳回答，頁面可以邊收邊顯示。
+成功的回答保存在行程內所有使用者共用的回答快取中，正規化後相同的問題直接取得保存的回答，
+超過 CACHE_TTL 或 CACHE_MAX 時淘汰。近似比對（正規化後字元 bigram 的 Jaccard 相似度達
+CACHE_SIMILARITY）預設關閉：只差一個數字的問題（例如 RSI 14 與 RSI 6）相似度很高，答案卻不同。
+API 網址、權杖與機器人 ID 可用環境變數 COZE_API_URL、COZE_API_TOKEN、COZE_BOT_ID 設定，
+例如把 COZE_API_URL 指向本地的模擬伺服器測試；COZE_CACHE_SIMILARITY 設為小於 1 的門檻時開啟近似比對。
+
+範例：
+    for text in stream_chat("什麼是 MACD？"):
+        print(text, end="")
+"""
+import os
+import json
+import time
+import threading
+import unicodedata
+from collections import OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_URL = os.environ.get("COZE_API_URL", "https://api.coze.com").rstrip('/') + "/open_api/v2/chat"
+API_TOKEN = os.environ.get("COZE_API_TOKEN", "pat_wpobVTLooW5hcemzSX8eWdBQpmpBJQNNra2G4sv6Ls3AgEWt0Wb0j58R22m2tEBL")
+BOT_ID = os.environ.get("COZE_BOT_ID", "7355203240146829328")
+CONVERSATION_ID = "123"
+USER_ID = "123333333"
+
+# 建立連線的逾時秒數，以及等待下一段回應的最長秒數（串流時是兩段數據之間的間隔）
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 60
+
+# 連線池保留的連線數（可同時進行的請求數，超過時另外建立不保留的連線）
+POOL_SIZE = 8
+
+# 建立連線失敗時的重試次數；請求已送出後不重試（避免重複提問）
+CONNECT_RETRIES = 2
+
+# 回答快取：保留秒數、最多保留的問題數，以及近似問題的相似度門檻（1 為只接受正規化後完全相同的問題）
+CACHE_TTL = 24 * 60 * 60
+CACHE_MAX = 256
+CACHE_SIMILARITY = float(os.environ.get("COZE_CACHE_SIMILARITY", "1"))
+
+_lock = threading.Lock()
+_session = None
+_cache = OrderedDict()  # {正規化的問題: (保存時間, 回答)}，依最近使用排序
+_grams = {}             # {bigram: set(正規化的問題)}，近似比對的索引
+
+
+# 函數：所有請求共用的 Session（第一次呼叫時建立）
+def session():
+    global _session
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE,
+                                  max_retries=Retry(total=CONNECT_RETRIES, read=0, status=0, backoff_factor=0.5))
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+            _session.headers.update({
+                "Authorization": "Bearer " + API_TOKEN,
+                "Accept": "*/*",
+            })
+        return _session
+
+
+def _post(question):
+    payload = {
+        "conversation_id": CONVERSATION_ID,
+        "bot_id": BOT_ID,
+        "user": USER_ID,
+        "query": question,
+        "stream": True,
+    }
+    response = session().post(API_URL, json=payload, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+    response.raise_for_status()
+    return response
+
+
+# 函數：以串流模式提問，逐段產生回答（type 為 answer 的訊息）的文字，收到 done 事件時結束
+# 請求失敗時拋出 requests 的例外，API 回傳錯誤事件時拋出 RuntimeError
+def stream_chat(question):
+    error = None
+    finished = False
+    with _post(question) as response:
+        # SSE 固定為 UTF-8；chunk_size=None 時每收到一段（chunked 編碼的一個區塊）就處理，不等緩衝區填滿
+        response.encoding = 'utf-8'
+        # done 或錯誤事件之後仍然讀到回應結束，連線才會放回連線池
+        for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+            if finished or not line.startswith("data:"):
+                continue
+            event = json.loads(line[len("data:"):])
+            if event.get("event") == "done":
+                finished = True
+            elif event.get("event") == "error":
+                info = event.get("error_information", {})
+                error = RuntimeError("Coze API 錯誤 %s: %s" % (info.get("code"), info.get("msg")))
+                finished = True
+            else:
+                message = event.get("message", {})
+                if message.get("type") == "answer" and message.get("content"):
+                    yield message["content"]
+    if error is not None:
+        raise error
+
+
+# 函數：正規化問題（全形轉半形、英文轉小寫、去掉空白與標點），作為回答快取的鍵
+def normalize(question):
+    text = unicodedata.normalize('NFKC', question).lower()
+    return ''.join(ch for ch in text if ch.isalnum())
+
+
+# 函數：字元 bigram 的集合（只有一個字時為該字本身）
+def _bigrams(text):
+    return {text[i:i + 2] for i in range(len(text) - 1)} or {text}
+
+
+def _forget(key):
+    del _cache[key]
+    for gram in _bigrams(key):
+        keys = _grams[gram]
+        keys.discard(key)
+        if not keys:
+            del _grams[gram]
+
+
+# 函數：取得保存的回答（相同的問題，開啟近似比對時為最相似的問題），沒有時回傳 None
+def cached_answer(question):
+    key = normalize(question)
+    if not key:
+        return None
+    now = time.time()
+    with _lock:
+        grams = _bigrams(key)
+        if key in _cache:
+            candidates = {key}
+        elif CACHE_SIMILARITY < 1:
+            candidates = set().union(*(_grams.get(gram, ()) for gram in grams))
+        else:
+            candidates = set()  # 只接受正規化後完全相同的問題（bigram 集合相同不代表問題相同）
+        best, best_score = None, CACHE_SIMILARITY
+        for candidate in candidates:
+            if now - _cache[candidate][0] > CACHE_TTL:
+                _forget(candidate)
+                continue
+            other = _bigrams(candidate)
+            score = len(grams & other) / len(grams | other)
+            if score >= best_score:
+                best, best_score = candidate, score
+        if best is None:
+            return None
+        _cache.move_to_end(best)
+        return _cache[best][1]
+
+
+# 函數：保存回答，超過 CACHE_MAX 時淘汰最久沒有使用的問題
+def remember(question, answer):
+    key = normalize(question)
+    if not key:
+        return
+    with _lock:
+        if key in _cache:
+            _forget(key)
+        _cache[key] = (time.time(), answer)
+        for gram in _bigrams(key):
+            _grams.setdefault(gram, set()).add(key)
+        while len(_cache) > CACHE_MAX:
+            _forget(next(iter(_cache)))
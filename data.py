@@ -0,0 +1,163 @@
+import time
+import random
+import threading
+import concurrent.futures
+from collections import OrderedDict
+import pandas as pd
+from instrument import span
+
+# 頁面上的 K 線週期選項；日線一次下載，日內週期由 store.py 的本地資料庫逐個分區讀取
+INTERVAL_LABELS = {
+    "1d": "日線",
+    "1h": "1 小時",
+    "30m": "30 分鐘",
+    "15m": "15 分鐘",
+    "5m": "5 分鐘",
+    "1m": "1 分鐘",
+}
+
+# 下載失敗時的重試次數與第一次重試前的等待秒數（之後每次加倍，並加上隨機抖動）
+RETRIES = 3
+BACKOFF_SECONDS = 1.0
+_sleep = time.sleep  # 重試前的等待（測試時替換，不影響其他模組的 time.sleep）
+
+# 背景預先下載：同時下載的數量、結果保留的秒數與最多保留的請求數
+PREFETCH_WORKERS = 4
+PREFETCH_TTL = 15 * 60
+PREFETCH_MAX = 32
+
+
+# 函數：從 Yahoo 下載股票價格
+def _yahoo(symbol, start, end, interval):
+    import yfinance as yf
+    return yf.download(symbol, start=start, end=end, interval=interval, progress=False)
+
+
+# 數據來源：{名稱: (下載函數, 同時進行的下載數量上限)}
+# 下載函數的參數為 (symbol, start, end, interval)，測試時可以用 register_provider 換成本地的假來源
+PROVIDERS = {
+    "yahoo": (_yahoo, 2),
+}
+
+_lock = threading.Lock()
+_inflight = {}     # {請求: Future}，正在進行中的下載
+_semaphores = {}   # {來源: Semaphore}
+_prefetched = OrderedDict()  # {請求: (開始時間, Future)}，背景預先下載的結果
+_prefetch_pool = None
+
+
+# 函數：註冊（或取代）數據來源
+def register_provider(name, fetch, limit=2):
+    with _lock:
+        PROVIDERS[name] = (fetch, limit)
+        _semaphores.pop(name, None)
+
+
+# 函數：依來源的上限同時下載，失敗時以指數退避重試
+# yfinance 在下載失敗或被限流時回傳空表格而不是拋出例外，空的結果同樣重試；
+# 重試後仍然是空的時回傳空表格（呼叫者以 df.empty 判斷），仍然失敗時拋出最後的例外。
+# retry_empty=False 時空的結果直接回傳（例如逐段補齊日內數據時，週末、假日與上市前本來就沒有數據）
+def _fetch(provider, symbol, start, end, interval, retry_empty=True):
+    fetch, limit = PROVIDERS[provider]
+    with _lock:
+        semaphore = _semaphores.setdefault(provider, threading.BoundedSemaphore(limit))
+    for attempt in range(RETRIES):
+        try:
+            with semaphore:
+                df = fetch(symbol, start, end, interval)
+            if df is not None and not df.empty:
+                return df
+            if not retry_empty or attempt == RETRIES - 1:
+                return pd.DataFrame() if df is None else df
+        except Exception:
+            if attempt == RETRIES - 1:
+                raise
+        # 等待時不佔用下載名額
+        _sleep(BACKOFF_SECONDS * 2 ** attempt * random.uniform(1, 1.5))
+
+
+# 函數：相同的請求同時只下載一次，等待中的請求取得同一個結果（或同一個例外）
+def _single_flight(request, load):
+    with _lock:
+        future = _inflight.get(request)
+        owner = future is None
+        if owner:
+            future = _inflight[request] = concurrent.futures.Future()
+    if owner:
+        try:
+            future.set_result(load())
+        except BaseException as error:
+            future.set_exception(error)
+        finally:
+            with _lock:
+                del _inflight[request]
+    return future.result()
+
+
+# 函數：請求的鍵（同一檔股票、期間、週期與來源視為相同的請求）
+def _request(symbol, start, end, interval, provider):
+    return (provider, symbol.strip().upper(), str(pd.Timestamp(start)), str(pd.Timestamp(end)), interval)
+
+
+# 函數：下載並整理為 backtrader PandasData 可以直接使用的格式
+def _load(symbol, start, end, interval, provider, retry_empty=True):
+    df = _fetch(provider, symbol, start, end, interval, retry_empty)
+    # 較新版本的 yfinance 即使只下載一檔股票也會回傳多層欄位
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    return df.dropna()
+
+
+# 函數：背景下載是否已經失敗（拋出例外或沒有數據，例如被限流），失敗的結果不保留
+def _failed(future):
+    return future.done() and (future.exception() is not None or future.result().empty)
+
+
+# 函數：在背景執行緒池預先下載多檔股票，之後以相同參數呼叫 download_prices 時直接取得結果
+# 已在下載中或仍在保留期限內的請求不會重複送出，失敗或沒有數據的請求在下次呼叫時重新下載
+def prefetch(symbols, start, end, interval='1d', provider='yahoo'):
+    global _prefetch_pool
+    now = time.time()
+    with _lock:
+        if _prefetch_pool is None:
+            _prefetch_pool = concurrent.futures.ThreadPoolExecutor(PREFETCH_WORKERS, thread_name_prefix='prefetch')
+        for symbol in symbols:
+            if not symbol.strip():
+                continue
+            request = _request(symbol, start, end, interval, provider)
+            entry = _prefetched.get(request)
+            if entry is not None and now - entry[0] < PREFETCH_TTL and not _failed(entry[1]):
+                _prefetched.move_to_end(request)
+                continue
+            _prefetched[request] = (now, _prefetch_pool.submit(
+                _single_flight, request, lambda symbol=symbol: _load(symbol, start, end, interval, provider)))
+            _prefetched.move_to_end(request)
+        while len(_prefetched) > PREFETCH_MAX:
+            _prefetched.popitem(last=False)
+
+
+# 函數：下載股票價格，統一整理為 backtrader PandasData 可以直接使用的格式
+# 已預先下載時等待（或直接取得）背景下載的結果；多個使用者同時請求同一檔股票與期間時共用一次下載
+# retry_empty=False 時沒有數據不重試（見 _fetch）
+def download_prices(symbol, start, end, interval='1d', provider='yahoo', retry_empty=True):
+    request = _request(symbol, start, end, interval, provider)
+    with _lock:
+        entry = _prefetched.get(request)
+    with span("download", symbol=request[1], prefetched=entry is not None) as s:
+        df = None
+        if entry is not None and time.time() - entry[0] < PREFETCH_TTL:
+            try:
+                df = entry[1].result()
+            except Exception:
+                pass  # 預先下載失敗時重新下載
+            if df is not None and df.empty:
+                df = None  # 預先下載沒有數據（例如被限流）時重新下載
+            if df is None:
+                with _lock:
+                    if _prefetched.get(request) is entry:
+                        del _prefetched[request]
+        if df is None:
+            df = _single_flight(request, lambda: _load(symbol, start, end, interval, provider, retry_empty))
+        s["bars"] = len(df)
+    # 每個呼叫者取得自己的副本，修改時不會影響其他使用者
+    return df.copy()
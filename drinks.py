@@ -0,0 +1,375 @@
+from io import BytesIO
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# 函數：依投資比例、手續費與年回報率對應調酒名稱
+def get_drink_name(investment_ratio, commission, annual_return):
+    if investment_ratio > 0.1:
+        if commission < 0.15:
+            if annual_return <= 2:
+                return "Vodka_Soda"
+            elif annual_return <= 5:
+                return "Vodka_Martini"
+            elif annual_return <= 10:
+                return "Whiskey_Sour"
+            else:
+                return "Whiskey_Neat"
+        else:
+            if annual_return <= 2:
+                return "Moscow_Mule"
+            elif annual_return <= 5:
+                return "Bloody_Mary"
+            elif annual_return <= 10:
+                return "Old_Fashioned"
+            else:
+                return "Manhattan"
+    else:
+        if commission < 0.15:
+            if annual_return <= 2:
+                return "Screwdriver"
+            elif annual_return <= 5:
+                return "Vodka_Collins"
+            elif annual_return <= 10:
+                return "Rob_Roy"
+            else:
+                return "Sazerac"
+        else:
+            if annual_return <= 2:
+                return "Aperol_Spritz"
+            elif annual_return <= 5:
+                return "Cosmopolitan"
+            elif annual_return <= 10:
+                return "Boulevardier"
+            else:
+                return "Vieux_Carré"
+
+# 調酒信息
+drinks_info = {
+    "Vodka_Soda": {
+        "報酬率": 1,
+        "金額大小": 1,
+        "特性": "清新的氣味和輕盈的感覺象徵著保守和穩健的投資風格。適合謹慎型投資者，短期內尋求低風險回報。",
+        "成分": ["伏特加", "蘇打水"],
+        "酒精濃度": 10,
+        "口感": "甘口",
+        "建議杯型": "高球杯",
+        "調製法": "直調法",
+        "風味": "柑橘香",
+        "飲用時間": 5,
+        "飲用溫度": 3,
+        "投資建議": "適合低風險、穩健型的短期投資者，建議選擇穩定性較高的基金或定存。"
+    },
+    "Vodka_Martini": {
+        "報酬率": 2,
+        "金額大小": 1,
+        "特性": "辛辣且微苦的味道代表了適中的風險，投資者具有一定的冒險精神，追求平衡的短期回報。",
+        "成分": ["伏特加", "乾苦艾酒"],
+        "酒精濃度": 30,
+        "口感": "中口",
+        "建議杯型": "馬丁尼杯",
+        "調製法": "攪拌法",
+        "風味": "草本香",
+        "飲用時間": 5,
+        "飲用溫度": 3,
+        "投資建議": "適合中等風險投資者，建議選擇平衡型基金或股票，追求穩健與回報的平衡。"
+    },
+    "Whiskey_Sour": {
+        "報酬率": 3,
+        "金額大小": 1,
+        "特性": "濃烈的味道和多層次的口感象徵著積極進取的投資策略，投資者願意承擔高風險以換取高回報。",
+        "成分": ["威士忌", "檸檬汁", "糖漿"],
+        "酒精濃度": 40,
+        "口感": "中口",
+        "建議杯型": "古典杯",
+        "調製法": "搖盪法",
+        "風味": "柑橘香",
+        "飲用時間": 7,
+        "飲用溫度": 5,
+        "投資建議": "適合高風險、高回報的投資者，建議選擇成長型股票或高收益債券。"
+    },
+    "Whiskey_Neat": {
+        "報酬率": 4,
+        "金額大小": 1,
+        "特性": "強烈且直截了當的風味比喻極端冒險的投資風格，適合非常自信且追求極高回報的投資者。",
+        "成分": ["純飲威士忌"],
+        "酒精濃度": 50,
+        "口感": "辛口",
+        "建議杯型": "威士忌杯",
+        "調製法": "直調法",
+        "風味": "木質香",
+        "飲用時間": 5,
+        "飲用溫度": 20,
+        "投資建議": "適合極高風險承受能力的投資者，建議選擇高波動性的股票或新興市場投資。"
+    },
+    "Moscow_Mule": {
+        "報酬率": 1,
+        "金額大小": 2,
+        "特性": "溫和且帶有薑味的口感象徵著謹慎且穩定的投資策略，適合大額低風險的投資。",
+        "成分": ["伏特加", "薑汁啤酒", "青檸汁"],
+        "酒精濃度": 10,
+        "口感": "甘口",
+        "建議杯型": "銅杯",
+        "調製法": "直調法",
+        "風味": "薑香",
+        "飲用時間": 7,
+        "飲用溫度": 5,
+        "投資建議": "適合大額低風險的投資者，建議選擇國債或高評級的企業債券。"
+    },
+    "Bloody_Mary": {
+        "報酬率": 2,
+        "金額大小": 2,
+        "特性": "豐富且多層次的味道代表著多元化的投資策略，適合大額中等風險的投資者。",
+        "成分": ["伏特加", "番茄汁", "各種調味料"],
+        "酒精濃度": 20,
+        "口感": "中口",
+        "建議杯型": "高球杯",
+        "調製法": "攪拌法",
+        "風味": "番茄香",
+        "飲用時間": 5,
+        "飲用溫度": 3,
+        "投資建議": "適合大額中等風險的投資者，建議選擇多元資產配置的基金或ETF。"
+    },
+    "Old_Fashioned": {
+        "報酬率": 3,
+        "金額大小": 2,
+        "特性": "經典且濃烈的口感象徵著強勢且積極的投資策略，適合大額高風險的投資。",
+        "成分": ["威士忌", "苦味酒", "糖"],
+        "酒精濃度": 40,
+        "口感": "辛口",
+        "建議杯型": "古典杯",
+        "調製法": "攪拌法",
+        "風味": "柑橘香",
+        "飲用時間": 7,
+        "飲用溫度": 5,
+        "投資建議": "適合大額高風險的投資者，建議選擇藍籌股或高收益股票。"
+    },
+    "Manhattan": {
+        "報酬率": 4,
+        "金額大小": 2,
+        "特性": "非常濃烈且複雜的味道象徵著精密且策略性強的投資風格，適合追求極高回報的大額投資者。",
+        "成分": ["威士忌", "甜苦艾酒", "苦味酒"],
+        "酒精濃度": 45,
+        "口感": "辛口",
+        "建議杯型": "馬丁尼杯",
+        "調製法": "攪拌法",
+        "風味": "木質香",
+        "飲用時間": 5,
+        "飲用溫度": 20,
+        "投資建議": "適合極高風險承受能力的大額投資者，建議選擇私募股權或高風險的對沖基金。"
+    },
+    "Screwdriver": {
+        "報酬率": 1,
+        "金額大小": 1,
+        "特性": "清新的橙汁味道代表著穩健和簡單的投資策略，適合保守型投資者，追求長期穩定的回報。",
+        "成分": ["伏特加", "橙汁"],
+        "酒精濃度": 10,
+        "口感": "甘口",
+        "建議杯型": "高球杯",
+        "調製法": "直調法",
+        "風味": "橙香",
+        "飲用時間": 5,
+        "飲用溫度": 3,
+        "投資建議": "適合小額低風險的長期投資者，建議選擇定期存款或保本型理財產品。"
+    },
+    "Vodka_Collins": {
+        "報酬率": 2,
+        "金額大小": 1,
+        "特性": "清爽的口感和適中的甜味象徵著平衡且多元的投資策略，適合希望在長期內獲得穩定回報的投資者。",
+        "成分": ["伏特加", "檸檬汁", "糖漿", "蘇打水"],
+        "酒精濃度": 20,
+        "口感": "中口",
+        "建議杯型": "高球杯",
+        "調製法": "搖盪法",
+        "風味": "柑橘香",
+        "飲用時間": 5,
+        "飲用溫度": 3,
+        "投資建議": "適合小額中等風險的長期投資者，建議選擇混合型基金或債券基金。"
+    },
+    "Rob_Roy": {
+        "報酬率": 3,
+        "金額大小": 1,
+        "特性": "經典而濃烈的口感象徵著經驗豐富的投資者，具有高風險承受能力，追求長期的高回報。",
+        "成分": ["威士忌", "甜苦艾酒", "苦味酒"],
+        "酒精濃度": 40,
+        "口感": "辛口",
+        "建議杯型": "馬丁尼杯",
+        "調製法": "攪拌法",
+        "風味": "木質香",
+        "飲用時間": 5,
+        "飲用溫度": 20,
+        "投資建議": "適合小額高風險的長期投資者，建議選擇高成長股票或國際股票基金。"
+    },
+    "Sazerac": {
+        "報酬率": 4,
+        "金額大小": 1,
+        "特性": "複雜而濃烈的風味象徵著非常精細和策略性的投資風格，適合追求極高回報並願意承擔高風險的投資者。",
+        "成分": ["威士忌", "苦艾酒", "苦味酒"],
+        "酒精濃度": 45,
+        "口感": "辛口",
+        "建議杯型": "古典杯",
+        "調製法": "攪拌法",
+        "風味": "香草香",
+        "飲用時間": 5,
+        "飲用溫度": 20,
+        "投資建議": "適合小額極高風險的長期投資者，建議選擇創投基金或高風險的衍生品。"
+    },
+    "Aperol_Spritz": {
+        "報酬率": 1,
+        "金額大小": 2,
+        "特性": "溫和且帶有薑味的口感象徵著謹慎且穩定的投資策略，適合大額低風險的投資。",
+        "成分": ["Aperol", "蘇打水", "香檳"],
+        "酒精濃度": 8,
+        "口感": "甘口",
+        "建議杯型": "笛型杯",
+        "調製法": "直調法",
+        "風味": "柑橘香",
+        "飲用時間": 5,
+        "飲用溫度": 3,
+        "投資建議": "適合大額低風險的投資者，建議選擇高評級債券或優質藍籌股。"
+    },
+    "Cosmopolitan": {
+        "報酬率": 2,
+        "金額大小": 2,
+        "特性": "帶有水果味的口感代表著平衡且多元的投資策略，適合希望在長期內獲得穩定回報的投資者。",
+        "成分": ["伏特加", "柑橘利口酒", "蔓越莓汁", "青檸汁"],
+        "酒精濃度": 20,
+        "口感": "中口",
+        "建議杯型": "馬丁尼杯",
+        "調製法": "搖盪法",
+        "風味": "果香",
+        "飲用時間": 5,
+        "飲用溫度": 3,
+        "投資建議": "適合大額中等風險的長期投資者，建議選擇多元化的國際股票基金或混合型基金。"
+    },
+    "Boulevardier": {
+        "報酬率": 3,
+        "金額大小": 2,
+        "特性": "濃烈且複雜的口感象徵著強勢且積極的投資策略，適合大額高風險的投資。",
+        "成分": ["威士忌", "甜苦艾酒", "苦味酒"],
+        "酒精濃度": 40,
+        "口感": "辛口",
+        "建議杯型": "古典杯",
+        "調製法": "攪拌法",
+        "風味": "香料香",
+        "飲用時間": 5,
+        "飲用溫度": 20,
+        "投資建議": "適合大額高風險的投資者，建議選擇全球大宗商品或能源股票。"
+    },
+    "Vieux_Carré": {
+        "報酬率": 4,
+        "金額大小": 2,
+        "特性": "非常濃烈且複雜的味道象徵著精密且策略性強的投資風格，適合追求極高回報的大額投資者。",
+        "成分": ["威士忌", "干邑", "甜苦艾酒", "苦味酒"],
+        "酒精濃度": 50,
+        "口感": "辛口",
+        "建議杯型": "古典杯",
+        "調製法": "攪拌法",
+        "風味": "木質香",
+        "飲用時間": 5,
+        "飲用溫度": 20,
+        "投資建議": "適合大額極高風險的投資者，建議選擇私募股權基金或對沖基金。"
+    }
+}
+
+# 雷達圖數據
+radar_data = {
+    "Vodka_Soda": [1, 1, 1, 1, 1],
+    "Vodka_Martini": [2, 2, 2, 2, 1],
+    "Whiskey_Sour": [3, 3, 3, 3, 1],
+    "Whiskey_Neat": [4, 4, 4, 4, 1],
+    "Moscow_Mule": [1, 1, 1, 1, 2],
+    "Bloody_Mary": [2, 2, 2, 2, 2],
+    "Old_Fashioned": [3, 3, 3, 3, 2],
+    "Manhattan": [4, 4, 4, 4, 2],
+    "Screwdriver": [1, 1, 1, 1, 3],
+    "Vodka_Collins": [2, 2, 2, 2, 3],
+    "Rob_Roy": [3, 3, 3, 3, 3],
+    "Sazerac": [4, 4, 4, 4, 3],
+    "Aperol_Spritz": [1, 1, 1, 1, 4],
+    "Cosmopolitan": [2, 2, 2, 2, 4],
+    "Boulevardier": [3, 3, 3, 3, 4],
+    "Vieux_Carré": [4, 4, 4, 4, 4],
+}
+
+# 雷達圖指標標籤
+attribute_labels_extended = [
+    'Volatility', 'Maximum Drawdown', 'Historical Returns',
+    'Expense Ratio', 'Fund Size', 'Sharpe Ratio'
+]
+
+# 進度條欄位：(欄位名稱, 最大值)
+progress_columns = [("酒精濃度", 50), ("飲用時間", 10), ("飲用溫度", 20)]
+
+# 所有資料都是固定的，每款調酒的渲染結果只需產生一次，之後直接由記憶體回傳
+# 快取大小涵蓋全部 16 款調酒
+RENDER_CACHE_SIZE = 32
+
+
+# 函數：產生調酒資訊卡片的 HTML
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def drink_card_html(drink_name):
+    info = drinks_info[drink_name]
+    return f"""
+        <div style="border:2px solid #00BFFF; padding: 10px;">
+            <h2 style="color: #00BFFF;">調酒名稱：<strong>{drink_name}</strong></h2>
+            <p style="font-size: 16px; font-weight: bold;">成分：<span style="font-size: 10pt; color: #FF00FF;">{', '.join(info['成分'])}</span></p>
+            <p style="font-size: 16px; font-weight: bold;">口感：<span style="font-size: 10pt; color: #FF00FF;">{info['口感']}</span></p>
+            <p style="font-size: 16px; font-weight: bold;">建議杯型：<span style="font-size: 10pt; color: #FF00FF;">{info['建議杯型']}</span></p>
+            <p style="font-size: 16px; font-weight: bold;">調製法：<span style="font-size: 10pt; color: #FF00FF;">{info['調製法']}</span></p>
+            <p style="font-size: 16px; font-weight: bold;">風味：<span style="font-size: 10pt; color: #FF00FF;">{info['風味']}</span></p>
+            <p style="font-size: 16px; font-weight: bold;">特性：<span style="font-size: 10pt; color: #FF00FF;">{info['特性']}</span></p>
+            <p style="font-size: 16px; font-weight: bold;">投資建議：<span style="font-size: 10pt; color: #FF00FF;">{info['投資建議']}</span></p>
+        </div>
+        """
+
+
+# 函數：產生酒精濃度、飲用時間和飲用溫度的進度條表格
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def drink_progress_tables(drink_name):
+    tables = []
+    for column, max_value in progress_columns:
+        df = pd.DataFrame({column: [drinks_info[drink_name][column]]})
+        column_config = {
+            column: st.column_config.ProgressColumn(
+                column,
+                help=column,
+                format="%d",
+                min_value=0,
+                max_value=max_value,
+            ),
+        }
+        tables.append((df, column_config))
+    return tables
+
+
+# 函數：繪製雷達圖並輸出為壓縮過的 PNG
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def radar_chart_png(drink_name):
+    stats = radar_data[drink_name]
+    labels = np.array(attribute_labels_extended[:len(stats)])
+    angles = np.linspace(0, 2*np.pi, len(labels), endpoint=False).tolist()
+    stats = stats + stats[:1]
+    angles += angles[:1]
+
+    # matplotlib 只在第一次渲染時才載入
+    from matplotlib.figure import Figure
+
+    # 直接使用 Figure 而不經過 pyplot，不會留下全域狀態，也可以在多個工作階段中同時使用
+    fig = Figure(figsize=(4.8, 4.8), facecolor='black')
+    ax = fig.add_subplot(polar=True)
+    ax.set_facecolor('black')
+    ax.fill(angles, stats, color='magenta', alpha=0.25)
+    ax.plot(angles, stats, color='magenta', linewidth=2)
+
+    ax.set_yticklabels([])
+    ax.set_xticks(angles[:-1])
+    ax.set_xticklabels(labels, color='white', fontsize=10)  # 修改指標標籤顏色和字體大小
+
+    ax.set_title(drink_name, size=10, color='white', y=1.1)  # 修改標題顏色和字體大小
+
+    buffer = BytesIO()
+    fig.savefig(buffer, format='png', dpi=100, bbox_inches='tight', pil_kwargs={'optimize': True})
+    return buffer.getvalue()
+
@@ -0,0 +1,253 @@
+import os
+import array
+import numpy as np
+import pandas as pd
+import backtrader as bt
+
+# backtrader 的日期數值：0001-01-01 為 1，1970-01-01 為 719163
+EPOCH_NUM = 719163.0
+NS_PER_DAY = 86400e9
+
+
+# 函數：把 DatetimeIndex 轉為 backtrader 的日期數值（向量化的 date2num）
+def datetime_to_num(index):
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.values.astype('datetime64[ns]').view('i8') / NS_PER_DAY + EPOCH_NUM
+
+
+# 函數：把 DataFrame 存成每個欄位一個 .npy 檔，之後可以用記憶體映射讀取
+def save_arrays(df, directory):
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, 'datetime.npy'), datetime_to_num(df.index))
+    for column in df.columns:
+        values = np.ascontiguousarray(df[column].to_numpy(dtype=np.float64))
+        np.save(os.path.join(directory, f"{str(column).lower()}.npy"), values)
+
+
+# 函數：以記憶體映射讀取 save_arrays 寫出的欄位，資料在用到時才由作業系統載入
+# 使用寫入時複製（copy-on-write）模式，回測寫入數據線時不會改動檔案
+def load_arrays(directory):
+    arrays = {}
+    for filename in os.listdir(directory):
+        name, ext = os.path.splitext(filename)
+        if ext == '.npy':
+            arrays[name] = np.load(os.path.join(directory, filename), mmap_mode='c')
+    return arrays
+
+
+# 以連續的 NumPy 陣列為來源的數據源
+# dataname 可以是 DataFrame（索引為日期）、{欄位: 陣列} 或 load_arrays 的結果。
+# 預載入時直接把陣列放進數據線，不逐列複製；
+# 有 filters 或不預載入（例如 exactbars）時退回逐列讀取
+class ArrayData(bt.feed.DataBase):
+    params = (
+        ('columns', None),  # {數據線名稱: 欄位名稱}，預設依數據線名稱比對（不分大小寫）
+    )
+
+    def start(self):
+        super(ArrayData, self).start()
+        self._arrays = self._resolve_arrays(self.p.dataname)
+        self._bulk_loaded = False
+
+    def _start_finish(self):
+        # fromdate / todate 在這裡才換算成日期數值
+        super(ArrayData, self)._start_finish()
+        start, self._end = self._bounds()
+        self._idx = start - 1
+
+    # 函數：依數據線名稱取得對應的一維 float64 陣列，找不到的數據線為 None
+    def _resolve_arrays(self, source):
+        if isinstance(source, pd.DataFrame):
+            # yfinance 的多層欄位以第一層（Open、Close ...）為欄位名稱
+            names = source.columns.get_level_values(0) if isinstance(source.columns, pd.MultiIndex) else source.columns
+            columns = {str(name).lower(): column for name, column in zip(names, source.columns)}
+            arrays = {'datetime': datetime_to_num(source.index)}
+            for key, column in columns.items():
+                # 單一 float64 區塊的 DataFrame 取出的是視圖，不會複製
+                arrays[key] = source[column].to_numpy(dtype=np.float64)
+        else:
+            arrays = {str(key).lower(): value for key, value in source.items()}
+
+        mapping = dict(self.p.columns or {})
+        resolved = {}
+        for alias in self.getlinealiases():
+            key = str(mapping.get(alias, alias)).lower()
+            values = arrays.get(key)
+            if values is not None:
+                values = np.asarray(values, dtype=np.float64)
+            resolved[alias] = values
+        return resolved
+
+    # 函數：來源的 K 線數量；不預載入時 buflen() 只是有界緩衝區的大小
+    def source_len(self):
+        if self._arrays is None:
+            return self.buflen()
+        return len(self._arrays['datetime'])
+
+    # 函數：依 fromdate / todate 回傳要載入的範圍（日期需已排序）
+    def _bounds(self):
+        dt = self._arrays['datetime']
+        start = np.searchsorted(dt, self.fromdate, side='left')
+        end = np.searchsorted(dt, self.todate, side='right')
+        return start, end
+
+    def preload(self):
+        if self._ffilters or self._filters or self._tzinput:
+            return super(ArrayData, self).preload()
+
+        start, end = self._bounds()
+        size = end - start
+        for alias in self.getlinealiases():
+            line = getattr(self.lines, alias)
+            values = self._arrays[alias]
+            if values is None:
+                line.array = array.array('d', [float('nan')]) * size
+            else:
+                line.array = values[start:end]
+            line.idx = size - 1
+            line.lencount = size
+
+        self._arrays = None  # 數據線已持有陣列
+        self._bulk_loaded = True
+        self._last()
+        self.home()
+
+    def load(self):
+        # 陣列不能再附加新的 K 線，整批載入後就沒有更多數據。
+        # 逐根載入時也先檢查是否已到結尾：backtrader 讀不到數據時會把指標退回，
+        # 在有界緩衝區（exactbars）下會把最後一根 K 線一起清掉
+        if self._bulk_loaded or not self._has_next():
+            return False
+        return super(ArrayData, self).load()
+
+    # 函數：是否還有下一根 K 線
+    def _has_next(self):
+        return self._idx + 1 < self._end
+
+    def _load(self):
+        self._idx += 1
+        if self._idx >= self._end:
+            return False
+        for alias, values in self._arrays.items():
+            if values is not None:
+                getattr(self.lines, alias)[0] = values[self._idx]
+        return True
+
+
+
+# 依日期分區逐段讀取的數據源（分區由 store.py 管理）
+# dataname 為依日期排序的分區目錄，每個分區是 save_arrays 寫出的一組 .npy 檔。
+# 逐根載入（省記憶體模式）時同一時間只開啟一個分區，記憶體與總長度無關；
+# 預載入時把各分區在 fromdate / todate 內的部分串接後整批載入
+class ChunkedData(ArrayData):
+
+    def start(self):
+        bt.feed.DataBase.start(self)
+        self._partitions = iter(self.p.dataname)
+        self._arrays = None
+        self._bulk_loaded = False
+
+    def _start_finish(self):
+        bt.feed.DataBase._start_finish(self)
+        self._idx, self._end = -1, 0
+
+    # 函數：開啟下一個在日期範圍內有數據的分區
+    def _next_partition(self):
+        for directory in self._partitions:
+            self._arrays = self._resolve_arrays(load_arrays(directory))
+            start, self._end = self._bounds()
+            if self._end > start:
+                self._idx = start - 1
+                return True
+        return False
+
+    def _has_next(self):
+        return self._idx + 1 < self._end or self._next_partition()
+
+    def source_len(self):
+        if self._bulk_loaded:
+            return self.buflen()
+        # 只讀取 .npy 的檔頭，不載入數據
+        return sum(len(np.load(os.path.join(directory, 'datetime.npy'), mmap_mode='r'))
+                   for directory in self.p.dataname)
+
+    def preload(self):
+        chunks = []
+        while self._next_partition():
+            chunks.append({alias: None if values is None else values[self._idx + 1:self._end]
+                           for alias, values in self._arrays.items()})
+            self._idx = self._end
+
+        self._arrays = {}
+        for alias in self.getlinealiases():
+            parts = [chunk[alias] for chunk in chunks]
+            if not parts:
+                self._arrays[alias] = np.empty(0) if alias == 'datetime' else None
+            elif any(part is None for part in parts):
+                self._arrays[alias] = None
+            else:
+                self._arrays[alias] = np.concatenate(parts)
+        start, self._end = self._bounds()
+        self._idx = start - 1
+        super(ChunkedData, self).preload()
+
+
+# 函數：在目前行程中載入一次數據，回傳 (秒數, 讀取來源與載入後增加的 RSS MB)
+def _measure_load(case, bars, directory):
+    import time
+    import resource
+
+    def rss_mb():
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 2 ** 20
+
+    before = rss_mb()
+    if case == 'memmap':
+        source = load_arrays(directory)
+    else:
+        source = pd.DataFrame({name: np.load(os.path.join(directory, f"{name}.npy"))
+                               for name in ('open', 'high', 'low', 'close', 'volume')},
+                              index=pd.to_datetime(np.load(os.path.join(directory, 'datetime.npy')) - EPOCH_NUM,
+                                                   unit='D').round('s'))
+    start_time = time.perf_counter()
+    data = bt.feeds.PandasData(dataname=source) if case == 'pandas' else ArrayData(dataname=source)
+    bt.Cerebro().adddata(data)  # 數據源需要 cerebro 提供交易日曆等環境
+    data._start()
+    data.preload()
+    elapsed = time.perf_counter() - start_time
+    # 讀一遍收盤價，讓記憶體映射的頁面實際載入，與回測時的情況相同
+    float(np.nansum(data.lines.close.array))
+    assert data.buflen() == bars
+    return elapsed, rss_mb() - before
+
+
+# 函數：比較 PandasData、ArrayData（DataFrame）與 ArrayData（記憶體映射）的載入時間與記憶體
+# 每種情況在獨立的行程中執行，避免互相影響 RSS
+def benchmark(bars=200000, directory=None):
+    import tempfile
+    import concurrent.futures
+    import multiprocessing
+
+    directory = directory or tempfile.mkdtemp(prefix='feeds_bench_')
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    df = pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+                       'Volume': rng.integers(1000, 100000, bars).astype(np.float64)},
+                      index=pd.date_range('2000-01-01', periods=bars, freq='min'))
+    save_arrays(df, directory)
+    del df
+
+    rows = []
+    context = multiprocessing.get_context('spawn')
+    for case in ('pandas', 'array', 'memmap'):
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            elapsed, rss = pool.submit(_measure_load, case, bars, directory).result()
+        rows.append({"feed": case, "bars": bars, "load_s": elapsed, "rss_mb": rss})
+    return pd.DataFrame(rows).set_index("feed")
+
+
+if __name__ == "__main__":
+    import sys
+    print(benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200000).round(3))
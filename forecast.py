@@ -0,0 +1,200 @@
+import os
+import re
+import sys
+import time
+import hashlib
+import multiprocessing
+import concurrent.futures
+import numpy as np
+import pandas as pd
+from resources import job
+from instrument import span
+
+# Prophet 預設設定檔（與原本的 Prophet() 行為相同）
+DEFAULT_PROFILE = {
+    "train_years": None,          # 訓練視窗（年），None 代表使用全部歷史資料
+    "weekly": False,              # 是否先將日資料重採樣為週資料
+    "uncertainty_samples": 1000,  # 不確定性區間的取樣數，0 代表關閉
+    "future_only": False,         # 是否只預測未來區間（不重算整段歷史）
+}
+
+# 快速設定檔：適合互動使用，犧牲少量精度換取較短的擬合與預測時間
+FAST_PROFILE = {
+    "train_years": 3,
+    "weekly": True,
+    "uncertainty_samples": 0,
+    "future_only": True,
+}
+
+# 週資料以每週最後一個交易日（週五）為代表
+WEEKLY_FREQ = 'W-FRI'
+
+# 交叉驗證結果的快取目錄（每個股票代碼只保留最新資料版本的結果）
+CV_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'forecast_cv')
+
+# 交叉驗證不使用的設定（以擴張視窗走過完整歷史、只計算點預測），不列入快取鍵
+CV_IGNORED_SETTINGS = ("train_years", "uncertainty_samples")
+
+
+# 函數：依設定檔整理 Prophet 的訓練資料
+def prepare_training_data(data, train_years=None, weekly=False):
+    df_train = data[['Date', 'Close']]
+    df_train = df_train.rename(columns={"Date": "ds", "Close": "y"})
+
+    # 限制訓練視窗，只保留最近 train_years 年的資料
+    if train_years:
+        cutoff = df_train['ds'].max() - pd.DateOffset(years=train_years)
+        df_train = df_train[df_train['ds'] > cutoff]
+
+    # 重採樣為週資料，資料點約減少為原本的五分之一
+    if weekly:
+        df_train = df_train.set_index('ds').resample(WEEKLY_FREQ).last().dropna().reset_index()
+
+    return df_train
+
+
+# 函數：依設定檔建立 Prophet 模型
+def build_model(profile):
+    # Prophet 載入較慢，只在實際擬合時才載入
+    from prophet import Prophet
+    if profile["weekly"]:
+        # 週資料無法估計週內季節性，直接關閉
+        return Prophet(uncertainty_samples=profile["uncertainty_samples"], weekly_seasonality=False)
+    return Prophet(uncertainty_samples=profile["uncertainty_samples"])
+
+
+# 函數：擬合並預測未來 n_years 年，回傳預測結果、模型與耗時（秒）
+def run_forecast(data, n_years, profile=DEFAULT_PROFILE):
+    # 預算不足時排隊，耗時從取得核心後開始計算
+    with span("prophet", rows=len(data)), job("prophet"):
+        start_time = time.perf_counter()
+
+        df_train = prepare_training_data(data, profile["train_years"], profile["weekly"])
+        m = build_model(profile)
+        m.fit(df_train)
+
+        include_history = not profile["future_only"]
+        if profile["weekly"]:
+            future = m.make_future_dataframe(periods=n_years * 52, freq=WEEKLY_FREQ, include_history=include_history)
+        else:
+            future = m.make_future_dataframe(periods=n_years * 365, include_history=include_history)
+        forecast = m.predict(future)
+
+        elapsed = time.perf_counter() - start_time
+    return forecast, m, elapsed
+
+
+# 函數：保留最後 holdout_days 天做驗證，量測單一設定檔的耗時與誤差
+def evaluate_profile(data, n_years, profile, holdout_days=180):
+    cutoff = data['Date'].max() - pd.Timedelta(days=holdout_days)
+    train = data[data['Date'] <= cutoff]
+    holdout = data[data['Date'] > cutoff]
+
+    _, m, elapsed = run_forecast(train, n_years, profile)
+
+    # 直接在驗證區間的實際交易日上預測，週資料模型也能逐日比較
+    predicted = m.predict(pd.DataFrame({"ds": holdout['Date'].values}))
+    actual = holdout['Close'].to_numpy(dtype=float).ravel()
+    yhat = predicted['yhat'].to_numpy()
+    mape = np.mean(np.abs((actual - yhat) / actual)) * 100
+    rmse = np.sqrt(np.mean((actual - yhat) ** 2))
+
+    return {"耗時(秒)": elapsed, "MAPE(%)": mape, "RMSE": rmse}
+
+
+# 函數：比較快速設定檔與預設設定檔的耗時與精度差異
+def compare_profiles(data, n_years, fast_profile=FAST_PROFILE, holdout_days=180):
+    default_result = evaluate_profile(data, n_years, DEFAULT_PROFILE, holdout_days)
+    fast_result = evaluate_profile(data, n_years, fast_profile, holdout_days)
+
+    report = pd.DataFrame([default_result, fast_result], index=["預設", "快速"])
+    report.loc["差異"] = report.loc["快速"] - report.loc["預設"]
+    speedup = default_result["耗時(秒)"] / fast_result["耗時(秒)"] if fast_result["耗時(秒)"] else float('inf')
+    return report, speedup
+
+
+# 函數：計算歷史資料的指紋，資料有任何變動時指紋就會改變
+def data_fingerprint(data):
+    frame = data[['Date', 'Close']]
+    hashed = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    return hashlib.sha1(hashed.tobytes()).hexdigest()[:16]
+
+
+# 函數：建立交叉驗證用的工作行程池，與 Prophet 的 parallel="processes" 使用相同的啟動方式
+def _make_process_pool(max_workers):
+    if sys.platform.startswith("win") or sys.platform == "darwin":
+        ctx = multiprocessing.get_context("spawn")
+    else:
+        ctx = multiprocessing.get_context("forkserver")
+    return concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx)
+
+
+# 函數：依預測天數分組計算 MAPE / RMSE
+def summarize_by_horizon(df_cv, bucket_days=30):
+    horizon_days = (df_cv['ds'] - df_cv['cutoff']).dt.days
+    buckets = ((horizon_days - 1) // bucket_days + 1) * bucket_days
+    errors = df_cv['y'] - df_cv['yhat']
+    frame = pd.DataFrame({
+        "預測天數": buckets,
+        "ape": np.abs(errors / df_cv['y']) * 100,
+        "se": errors ** 2,
+    })
+    grouped = frame.groupby("預測天數")
+    report = pd.DataFrame({
+        "MAPE(%)": grouped["ape"].mean(),
+        "RMSE": np.sqrt(grouped["se"].mean()),
+        "樣本數": grouped.size(),
+    }).reset_index()
+    return report
+
+
+# 函數：滾動起點交叉驗證，各個 cutoff 在多個工作行程中平行計算
+# 結果依股票代碼與資料指紋快取，資料沒有變動時直接讀取快取
+def cross_validate_forecast(ticker, data, profile=DEFAULT_PROFILE, horizon_days=365,
+                            period_days=180, initial_days=3 * 365, max_workers=None):
+    from prophet.diagnostics import cross_validation
+
+    # 快取檔名為「股票代碼_資料指紋_設定」
+    fingerprint = data_fingerprint(data)
+    cv_profile = {name: value for name, value in profile.items() if name not in CV_IGNORED_SETTINGS}
+    settings = repr((sorted(cv_profile.items()), horizon_days, period_days, initial_days))
+    settings_key = hashlib.sha1(settings.encode('utf-8')).hexdigest()[:8]
+    safe_ticker = re.sub(r'[^A-Za-z0-9._-]', '_', ticker)
+    cache_path = os.path.join(CV_CACHE_DIR, f"{safe_ticker}_{fingerprint}_{settings_key}.csv")
+
+    if os.path.exists(cache_path):
+        with span("prophet_cv", cached=True):
+            return pd.read_csv(cache_path), True
+
+    # 工作行程數依資源管理分配（未指定時使用 WORKLOAD_THREADS["prophet_cv"]）
+    with span("prophet_cv", cached=False), job("prophet_cv", threads=max_workers) as workers:
+        # 交叉驗證以擴張視窗走過完整歷史，因此不套用訓練視窗限制
+        df_train = prepare_training_data(data, None, profile["weekly"])
+        # 交叉驗證只需要點預測，關閉不確定性取樣以節省時間
+        m = build_model(dict(profile, uncertainty_samples=0))
+        m.fit(df_train)
+
+        pool = _make_process_pool(workers)
+        try:
+            df_cv = cross_validation(
+                m,
+                initial=f'{initial_days} days',
+                period=f'{period_days} days',
+                horizon=f'{horizon_days} days',
+                parallel=pool,
+            )
+        finally:
+            pool.shutdown(wait=True)
+
+    report = summarize_by_horizon(df_cv)
+
+    # 移除同一股票代碼舊資料版本的結果；目前資料版本其他設定的結果仍然有效，保留
+    os.makedirs(CV_CACHE_DIR, exist_ok=True)
+    cache_pattern = re.compile(re.escape(safe_ticker) + r'_([0-9a-f]{16})_[0-9a-f]{8}\.csv$')
+    for name in os.listdir(CV_CACHE_DIR):
+        match = cache_pattern.match(name)
+        if match and match.group(1) != fingerprint:
+            os.remove(os.path.join(CV_CACHE_DIR, name))
+    report.to_csv(cache_path, index=False)
+
+    return report, False
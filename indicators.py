@@ -0,0 +1,96 @@
+import backtrader as bt
+from feeds import ArrayData
+
+
+# 預先在 DataFrame 中計算好均線的數據源
+# SMA_10 / SMA_20 欄位（見 ml_strategies.get_stock_data）直接當作數據線餵入，
+# short_period / long_period 記錄欄位實際使用的均線週期
+class PrecomputedSMAData(ArrayData):
+    lines = ('sma_10', 'sma_20')
+    params = (
+        ('short_period', None),
+        ('long_period', None),
+    )
+
+    # 函數：回傳可以取代指標的 (數據線, 指標類型, 參數)
+    def precomputed(self):
+        return [
+            (self.lines.sma_10, bt.ind.SMA, dict(period=self.p.short_period)),
+            (self.lines.sma_20, bt.ind.SMA, dict(period=self.p.long_period)),
+        ]
+
+
+# 指標登記表：同一次回測中 (指標類型, 參數, 來源數據線) 相同的指標只建立一次，
+# 同一個 cerebro 中的所有策略（見 backtest.run_comparison）共用
+class IndicatorRegistry:
+    def __init__(self, cerebro):
+        self._indicators = {}
+        # 建立時的策略清單，cerebro 每次執行都會換一個新的清單
+        self.strategies = cerebro.runningstrats
+        # 登記數據源中預先計算好的欄位
+        for data in cerebro.datas:
+            if hasattr(data, 'precomputed'):
+                for line, indicator, params in data.precomputed():
+                    self.register(line, indicator, data.close, **params)
+
+    @staticmethod
+    def _key(indicator, source, params):
+        # 有多條線的物件（數據源、指標）以第一條線為來源，與 backtrader 的預設相同
+        if hasattr(source, 'lines'):
+            source = source.lines[0]
+        # 補上預設值，SMA() 與 SMA(period=30) 視為同一個指標
+        values = tuple((name, params.get(name, default)) for name, default in indicator.params._getitems())
+        return indicator, values, id(source)
+
+    # 函數：登記一條已經存在的數據線
+    def register(self, line, indicator, source, **params):
+        self._indicators.setdefault(self._key(indicator, source, params), line)
+
+    # 函數：取得指標，不存在時才建立
+    def get(self, indicator, source, **params):
+        key = self._key(indicator, source, params)
+        if key not in self._indicators:
+            self._indicators[key] = indicator(source, **params)
+        return self._indicators[key]
+
+
+# 函數：取得物件所屬 cerebro 本次執行的指標登記表（在策略或自訂指標的 __init__ 中呼叫）
+def registry(owner):
+    while not isinstance(owner, bt.Strategy):
+        owner = owner._owner
+    cerebro = owner.env
+    current = getattr(cerebro, '_indicator_registry', None)
+    if current is None or current.strategies is not cerebro.runningstrats:
+        current = cerebro._indicator_registry = IndicatorRegistry(cerebro)
+    return current
+
+
+# 函數：取得共用的指標
+def shared(owner, indicator, source, **params):
+    return registry(owner).get(indicator, source, **params)
+
+
+# 共用的指標可能屬於先建立的其他策略，不能直接綁定為本指標的數據線
+# （backtrader 只在子物件計算完成時複製綁定的數值），以運算複製一份
+
+# MACD：兩條 EMA 由登記表共用
+class MACD(bt.ind.MACD):
+
+    def __init__(self):
+        super(bt.ind.MACD, self).__init__()
+        me1 = shared(self, self.p.movav, self.data, period=self.p.period_me1)
+        me2 = shared(self, self.p.movav, self.data, period=self.p.period_me2)
+        self.lines.macd = me1 - me2
+        self.lines.signal = self.p.movav(self.lines.macd, period=self.p.period_signal)
+
+
+# 布林通道：中軌的 SMA 由登記表共用（例如與三均線的 20 日均線為同一個指標）
+class BollingerBands(bt.ind.BollingerBands):
+
+    def __init__(self):
+        ma = shared(self, self.p.movav, self.data, period=self.p.period)
+        stddev = self.p.devfactor * bt.ind.StdDev(self.data, ma, period=self.p.period, movav=self.p.movav)
+        self.lines.mid = ma * 1.0
+        self.lines.top = ma + stddev
+        self.lines.bot = ma - stddev
+        super(bt.ind.BollingerBands, self).__init__()
@@ -0,0 +1,268 @@
+"""效能量測：把每個階段（下載、建立數據集、訓練、回測、繪圖 ...）包在 span 中計時
+
+每次頁面執行的 span 記錄在使用者自己的 session 中，頁面底部的「效能」面板顯示本次執行的各階段耗時；
+所有使用者的 span 另外以 JSON Lines 附加到 METRICS_PATH（超過 METRICS_MAX_BYTES 時換成新檔，
+只保留一個舊檔），並在記憶體中保留最近 PERCENTILE_WINDOW 個，面板中可以看到各階段耗時的百分位數。
+不在 Streamlit 伺服器中執行時（batch.py、bench.py）只計時，不寫入檔案。
+
+取樣分析（選用）：效能面板中勾選後，之後每次執行都在背景執行緒定時取樣頁面的呼叫堆疊，
+耗時超過門檻時把結果存成火焰圖格式（collapsed stacks，flamegraph.pl、speedscope 可直接讀取）
+與同名的 .json（頁面、耗時、回測設定與各階段耗時）。設定環境變數 PROFILE_THRESHOLD_MS
+時所有使用者的執行都會取樣。
+
+範例：
+    with span("download") as s:
+        df = download_prices(symbol, start, end)
+        s["bars"] = len(df)
+"""
+import os
+import sys
+import json
+import time
+import re
+import threading
+import datetime
+import contextlib
+from collections import deque, Counter
+
+METRICS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'metrics', 'spans.jsonl')
+
+# 量測檔的大小上限，超過時把目前的檔案改名為 METRICS_PATH + '.1'（取代更舊的檔案）
+METRICS_MAX_BYTES = 32 * 2 ** 20
+
+# 每個 session 保留的 span 數，以及計算百分位數時使用的最近 span 數
+MAX_SESSION_SPANS = 500
+PERCENTILE_WINDOW = 20000
+
+# 取樣分析：保存目錄、所有使用者的門檻（毫秒，未設定時只有勾選的 session 取樣）、
+# 面板中的預設門檻、取樣間隔與最長取樣時間
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'profiles')
+PROFILE_THRESHOLD_MS = float(os.environ["PROFILE_THRESHOLD_MS"]) if os.environ.get("PROFILE_THRESHOLD_MS") else None
+DEFAULT_PROFILE_THRESHOLD_MS = 2000
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", 5))
+PROFILE_MAX_SECONDS = 600
+
+# 沒有 session 時（背景執行緒）記錄的頁面名稱
+BACKGROUND_PAGE = "背景"
+
+# 每個 span 固定的欄位，其餘為呼叫者加上的計數
+SPAN_FIELDS = ("time", "page", "run", "span", "ms")
+
+_lock = threading.Lock()
+_recent = None  # 所有使用者最近的 span（deque），第一次使用時由量測檔載入
+
+
+# 函數：目前執行緒的 Streamlit session 狀態，不在頁面執行緒中（或沒有使用 Streamlit）時回傳 None
+def _session():
+    if 'streamlit' not in sys.modules:
+        return None
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    return sys.modules['streamlit'].session_state
+
+
+# 函數：是否在 Streamlit 伺服器中執行（只有這時才寫入量測檔）
+def _serving():
+    if 'streamlit' not in sys.modules:
+        return False
+    from streamlit import runtime
+    return runtime.exists()
+
+
+# 取樣分析器：在背景執行緒定時讀取目標執行緒的呼叫堆疊，累計每個堆疊出現的次數
+class Sampler(threading.Thread):
+
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL_MS / 1000, max_seconds=PROFILE_MAX_SECONDS):
+        super(Sampler, self).__init__(name='perf-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        deadline = time.perf_counter() + self.max_seconds
+        while not self._stopped.wait(self.interval) and time.perf_counter() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append("%s:%s" % (os.path.basename(code.co_filename), code.co_name))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack)).replace(' ', '_')] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    # 函數：火焰圖格式，每行為「以分號分隔的堆疊 次數」
+    def folded(self):
+        return ''.join("%s %d\n" % (stack, count) for stack, count in self.stacks.most_common())
+
+
+# 函數：這個 session 的取樣門檻（毫秒），沒有啟用時回傳 None
+def _profile_threshold(state):
+    if state.get("perf_profile"):
+        return state.get("perf_profile_ms", DEFAULT_PROFILE_THRESHOLD_MS)
+    return PROFILE_THRESHOLD_MS
+
+
+# 函數：頁面開始執行時呼叫，之後的 span 都歸在這次執行之下
+def begin(page):
+    state = _session()
+    if state is None:
+        return
+    # 上一次執行中途停止（例如 st.stop）時沒有結束取樣
+    if state.get("perf_sampler") is not None:
+        state["perf_sampler"].stop()
+    state["perf_page"] = page
+    state["perf_run"] = state.get("perf_run", 0) + 1
+    state["perf_started"] = time.perf_counter()
+    state["perf_params"] = {}
+    if "perf_trace" not in state:
+        state["perf_trace"] = deque(maxlen=MAX_SESSION_SPANS)
+
+    state["perf_sampler"] = None
+    if _profile_threshold(state) is not None:
+        state["perf_sampler"] = Sampler(threading.get_ident())
+        state["perf_sampler"].start()
+
+
+# 函數：記錄這次執行的設定（例如回測的策略、參數與日期範圍），保存取樣結果時一併寫入
+def annotate(**params):
+    state = _session()
+    if state is not None and "perf_params" in state:
+        state["perf_params"].update(params)
+
+
+# 函數：保存取樣結果（火焰圖檔案與同名的 .json），回傳火焰圖檔案的路徑
+def save_profile(sampler, page, elapsed_ms, threshold_ms, params=None, spans=()):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+    base = os.path.join(PROFILE_DIR, "%s_%s_%dms" % (stamp, re.sub(r'[^A-Za-z0-9._-]', '_', page), elapsed_ms))
+    with open(base + '.folded', 'w', encoding='utf-8') as f:
+        f.write(sampler.folded())
+    meta = {
+        "page": page,
+        "elapsed_ms": elapsed_ms,
+        "threshold_ms": threshold_ms,
+        "interval_ms": sampler.interval * 1000,
+        "samples": sum(sampler.stacks.values()),
+        "params": params or {},
+        "spans": [{key: value for key, value in record.items() if key not in ("page", "run")} for record in spans],
+    }
+    with open(base + '.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2, default=str)
+    return base + '.folded'
+
+
+# 函數：結束這次執行的取樣，耗時超過門檻時保存，回傳保存的路徑（沒有保存時為 None）
+def _finish_profile(state, spans):
+    sampler = state.get("perf_sampler")
+    if sampler is None:
+        return None
+    sampler.stop()
+    state["perf_sampler"] = None
+    elapsed_ms = (time.perf_counter() - state["perf_started"]) * 1000
+    threshold_ms = _profile_threshold(state)
+    if threshold_ms is None or elapsed_ms < threshold_ms:
+        return None
+    return save_profile(sampler, state["perf_page"], elapsed_ms, threshold_ms, state.get("perf_params"), spans)
+
+
+# 函數：所有使用者最近的 span，伺服器重新啟動後第一次使用時由量測檔的最後幾行載入（呼叫時需持有 _lock）
+def _recent_spans():
+    global _recent
+    if _recent is None:
+        _recent = deque(maxlen=PERCENTILE_WINDOW)
+        if os.path.exists(METRICS_PATH):
+            with open(METRICS_PATH, encoding='utf-8') as f:
+                _recent.extend(json.loads(line) for line in deque(f, maxlen=PERCENTILE_WINDOW) if line.strip())
+    return _recent
+
+
+# 函數：寫入量測檔（一行一個 span，附加寫入），超過大小上限時換成新檔
+def _append(record):
+    line = json.dumps(record, ensure_ascii=False) + '\n'
+    with _lock:
+        _recent_spans().append(record)
+        os.makedirs(os.path.dirname(METRICS_PATH), exist_ok=True)
+        with open(METRICS_PATH, 'a', encoding='utf-8') as f:
+            f.write(line)
+            full = f.tell() > METRICS_MAX_BYTES
+        if full:
+            os.replace(METRICS_PATH, METRICS_PATH + '.1')
+
+
+# 函數：記錄一個已經量測好的階段（毫秒）
+def record(name, ms, **counters):
+    state = _session()
+    entry = {
+        "time": time.time(),
+        "page": state.get("perf_page", "") if state is not None else BACKGROUND_PAGE,
+        "run": state.get("perf_run", 0) if state is not None else 0,
+        "span": name,
+        "ms": ms,
+        **counters,
+    }
+    if state is not None and "perf_trace" in state:
+        state["perf_trace"].append(entry)
+    if _serving():
+        _append(entry)
+
+
+# 函數：計時一個階段，回傳的 dict 可以加上計數（例如 K 線數、是否命中快取）
+@contextlib.contextmanager
+def span(name, **counters):
+    start_time = time.perf_counter()
+    try:
+        yield counters
+    finally:
+        record(name, (time.perf_counter() - start_time) * 1000, **counters)
+
+
+# 函數：由所有使用者最近的 span 計算各頁面、各階段的耗時百分位數（毫秒）
+def percentiles():
+    import pandas as pd
+    with _lock:
+        df = pd.DataFrame(list(_recent_spans()))
+    if df.empty:
+        return df
+    grouped = df.groupby(["page", "span"])["ms"]
+    return pd.DataFrame({
+        "次數": grouped.size(),
+        "p50": grouped.quantile(0.5),
+        "p90": grouped.quantile(0.9),
+        "p99": grouped.quantile(0.99),
+    }).round(1)
+
+
+# 函數：在頁面底部顯示可展開的效能面板（本次執行的各階段耗時與所有使用者的百分位數）
+def show_panel():
+    import pandas as pd
+    import streamlit as st
+    state = _session()
+    if state is None or "perf_trace" not in state:
+        return
+    run = state["perf_run"]
+    spans = [record for record in state["perf_trace"] if record["run"] == run]
+    profile = _finish_profile(state, spans)
+    with st.expander("效能"):
+        if profile is not None:
+            st.caption("本次執行超過門檻，取樣結果已保存：%s" % profile)
+        if spans:
+            current = pd.DataFrame([{
+                "階段": record["span"],
+                "耗時 (ms)": round(record["ms"], 1),
+                "計數": ", ".join("%s=%s" % (key, value) for key, value in record.items()
+                                if key not in SPAN_FIELDS),
+            } for record in spans])
+            st.dataframe(current, use_container_width=True, hide_index=True)
+        else:
+            st.caption("本次執行沒有記錄的階段")
+        if st.checkbox("顯示所有使用者的耗時百分位數 (ms)", key="perf_percentiles"):
+            st.dataframe(percentiles(), use_container_width=True)
+        if st.checkbox("取樣分析之後的執行（耗時超過門檻時保存火焰圖檔案）", key="perf_profile"):
+            st.number_input("門檻 (ms)", min_value=0, step=500, value=DEFAULT_PROFILE_THRESHOLD_MS, key="perf_profile_ms")
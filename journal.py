@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import backtrader as bt
+
+# 事件種類：0-8 與 backtrader 的訂單狀態相同，另外加上交易開倉與平倉
+EVENT_KINDS = list(bt.Order.Status) + ['TradeOpened', 'TradeClosed']
+TRADE_OPENED = len(bt.Order.Status)
+TRADE_CLOSED = TRADE_OPENED + 1
+
+# 每個事件記錄的欄位
+COLUMNS = ('datetime', 'kind', 'ref', 'size', 'price', 'value', 'comm', 'pnl', 'pnlcomm')
+
+
+# 分析器：把訂單、成交與交易事件依欄位記錄在預先配置的陣列中，取代逐筆 print
+# 只在訂單與交易通知時寫入，不加入 cerebro 時沒有任何成本
+class TradeJournal(bt.Analyzer):
+    params = (
+        ('capacity', 1024),  # 預先配置的事件數量，不足時加倍
+    )
+
+    def start(self):
+        self.count = 0
+        self.events = np.empty((len(COLUMNS), self.p.capacity))
+
+    def _append(self, *row):
+        if self.count == self.events.shape[1]:
+            events = np.empty((len(COLUMNS), self.events.shape[1] * 2))
+            events[:, :self.count] = self.events[:, :self.count]
+            self.events = events
+        self.events[:, self.count] = row
+        self.count += 1
+
+    def notify_order(self, order):
+        # 已成交（含部分成交）時記錄成交價與成交量，其餘狀態記錄下單時的數量與價格
+        if order.status in (order.Partial, order.Completed):
+            info = order.executed
+        else:
+            info = order.created
+        size = info.size if order.isbuy() else -abs(info.size)
+        self._append(self.strategy.datetime[0], order.status, order.ref, size,
+                     info.price or np.nan, info.value, info.comm, np.nan, np.nan)
+
+    def notify_trade(self, trade):
+        if trade.justopened:
+            self._append(self.strategy.datetime[0], TRADE_OPENED, trade.ref, trade.size,
+                         trade.price, trade.value, trade.commission, np.nan, np.nan)
+        elif trade.isclosed:
+            self._append(self.strategy.datetime[0], TRADE_CLOSED, trade.ref, 0,
+                         trade.price, trade.value, trade.commission, trade.pnl, trade.pnlcomm)
+
+    # 函數：從檢查點接續時，以保存的事件取代（檢查點之前沒有執行策略邏輯，也就沒有事件）
+    def restore(self, analysis):
+        count = len(analysis['kind'])
+        self.events = np.empty((len(COLUMNS), max(self.p.capacity, count * 2)))
+        for i, name in enumerate(COLUMNS):
+            self.events[i, :count] = analysis[name]
+        self.count = count
+
+    def get_analysis(self):
+        return {name: self.events[i, :self.count] for i, name in enumerate(COLUMNS)}
+
+
+# 函數：把日誌轉換為表格（可直接顯示或匯出 CSV / Parquet）
+def journal_frame(analysis):
+    df = pd.DataFrame(analysis)
+    df['datetime'] = pd.to_datetime([bt.num2date(value) for value in df['datetime']])
+    df['kind'] = [EVENT_KINDS[int(kind)] for kind in df['kind']]
+    df['ref'] = df['ref'].astype(int)
+    return df
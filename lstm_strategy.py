@@ -0,0 +1,153 @@
+import torch
+import torch.nn as nn
+import backtrader as bt
+from indicators import shared
+from torch.utils.data import TensorDataset, DataLoader
+from ml_strategies import create_dataset
+from resources import job
+from instrument import span
+
+
+# 函数：将股票数据转换为 LSTM 训练用的张量
+def create_lstm_dataset(stock_data, window_size):
+    X, y, scaler = create_dataset(stock_data, window_size)
+    X = torch.from_numpy(X).float()
+    y = torch.from_numpy(y).long()
+    return X, y, scaler
+
+
+# 函数：创建DataLoader
+def create_dataloader(X, y, batch_size):
+    dataset = TensorDataset(X, y)
+    train_loader = DataLoader(dataset, batch_size=batch_size, shuffle=True)
+    return train_loader
+
+
+# LSTM 模型定义
+class SimpleLSTM(nn.Module):
+    def __init__(self, input_size, hidden_size, num_layers, num_classes, dropout_rate=0.2):
+        super(SimpleLSTM, self).__init__()
+        self.hidden_size = hidden_size
+        self.num_layers = num_layers
+        self.lstm = nn.LSTM(input_size, hidden_size, num_layers, batch_first=True)
+        self.fc1 = nn.Linear(hidden_size, hidden_size)
+        self.relu = nn.ReLU()
+        self.dropout = nn.Dropout(dropout_rate)
+        self.bn = nn.BatchNorm1d(hidden_size)
+        self.fc2 = nn.Linear(hidden_size, num_classes)
+        self.sigmoid = nn.Sigmoid()
+
+    def forward(self, x):
+        h0 = torch.zeros(self.num_layers, x.size(0), self.hidden_size)
+        c0 = torch.zeros(self.num_layers, x.size(0), self.hidden_size)
+        out, _ = self.lstm(x, (h0, c0))
+        out = self.fc1(out[:, -1, :])
+        out = self.relu(out)
+        out = self.dropout(out)
+        out = self.bn(out)
+        out = self.fc2(out)
+        out = self.sigmoid(out)
+        return out
+
+
+# 函数：训练 LSTM 模型，on_epoch 每 10 个 epoch 回报一次进度
+def train_lstm_model(X, y, num_epochs=200, batch_size=64, on_epoch=None):
+    train_loader = create_dataloader(X, y, batch_size)
+
+    # 模型参数定义
+    input_size = 3  # 更新為特徵數
+    hidden_size = 128
+    num_layers = 2
+    num_classes = 2
+
+    # LSTM 模型初始化
+    model = SimpleLSTM(input_size, hidden_size, num_layers, num_classes)
+    criterion = nn.CrossEntropyLoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=1e-4)
+
+    # 训练模型（依资源管理分配的核心数设定 torch 线程数，预算不足时排队）
+    with span("train_lstm", samples=len(X), epochs=num_epochs), job("torch"):
+        for epoch in range(num_epochs):
+            for inputs, labels in train_loader:
+                outputs = model(inputs)
+                loss = criterion(outputs, labels)
+                optimizer.zero_grad()
+                loss.backward()
+                optimizer.step()
+
+            if on_epoch is not None and (epoch+1) % 10 == 0:
+                on_epoch(epoch + 1, num_epochs, loss.item())
+
+    return model
+
+
+# 定义策略
+class LSTMStrategy(bt.Strategy):
+    params = (
+        ("window_size", 10),
+        ("scaler", None),
+        ("model", None),
+        ("short_period", 10),
+        ("long_period", 20),
+    )
+
+    def __init__(self):
+        self.data_close = self.datas[0].close
+        # 數據源已有 SMA_10 / SMA_20 欄位時直接使用，不重新計算
+        self.sma10 = shared(self, bt.ind.SMA, self.data_close, period=self.params.short_period)
+        self.sma20 = shared(self, bt.ind.SMA, self.data_close, period=self.params.long_period)
+        self.counter = 1
+        self.buyprice = None
+        self.buycomm = None
+
+    def log(self, txt, dt=None):
+        pass  # 不再记录详细日志
+
+    def qbuffer(self, savemem=0, replaying=False):
+        super().qbuffer(savemem=savemem, replaying=replaying)
+        # 有界緩衝區只依指標需求決定長度，策略本身回看的數據線要另外保留 window_size 根
+        for line in (self.data_close, self.sma10, self.sma20):
+            line.minbuffer(self.params.window_size)
+
+    def notify_order(self, order):
+        if order.status in [order.Submitted, order.Accepted]:
+            return
+
+        if order.status in [order.Completed]:
+            if order.isbuy():
+                self.buyprice = order.executed.price
+                self.buycomm = order.executed.comm
+            self.bar_executed = len(self)
+
+        self.order = None
+
+    def notify_trade(self, trade):
+        pass  # 不再记录详细日志
+
+    def next(self):
+        if self.counter < self.params.window_size:
+            self.counter += 1
+            return
+
+        previous_features = [[self.data_close[-i], self.sma10[-i], self.sma20[-i]] for i in range(0, self.params.window_size)]
+        X = torch.tensor(previous_features).view(1, self.params.window_size, -1).float()
+        X = self.params.scaler.transform(X.numpy().reshape(-1, 3)).reshape(1, self.params.window_size, -1)
+
+        # 將模型設置為評估模式
+        self.params.model.eval()
+        with torch.no_grad():
+            prediction = self.params.model(torch.tensor(X).float())
+
+        max_vals, max_idxs = torch.max(prediction, dim=1)
+        predicted_trend = max_idxs.item()
+
+        if predicted_trend == 1 and not self.position:
+            self.order = self.buy()  # 买入股票
+        elif predicted_trend == 0 and self.position:
+            self.order = self.sell()
+        elif self.position:
+            # 這裡可以添加止損或止盈邏輯
+            if self.data_close[0] < self.buyprice * 0.9:  # 假設止損點為買入價格的90%
+                self.order = self.sell()
+            elif self.data_close[0] > self.buyprice * 1.5:  # 假設止盈點為買入價格的150%
+                self.order = self.sell()
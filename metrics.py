@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+from feeds import EPOCH_NUM
+
+DAYS_PER_YEAR = 365.25
+
+# 顯示用的指標名稱與格式
+METRIC_LABELS = {
+    "final_value": ("最終價值", "{:,.2f}"),
+    "total_return_pct": ("總報酬率 (%)", "{:.2f}"),
+    "cagr_pct": ("年化報酬率 (%)", "{:.2f}"),
+    "volatility_pct": ("年化波動率 (%)", "{:.2f}"),
+    "sharpe": ("Sharpe", "{:.2f}"),
+    "sortino": ("Sortino", "{:.2f}"),
+    "max_drawdown_pct": ("最大回撤 (%)", "{:.2f}"),
+    "max_drawdown_days": ("最長回撤期間 (天)", "{:.0f}"),
+    "exposure_pct": ("持倉時間比例 (%)", "{:.1f}"),
+    "turnover": ("年周轉率 (倍)", "{:.2f}"),
+    "trades": ("已平倉交易", "{:.0f}"),
+    "win_rate_pct": ("勝率 (%)", "{:.1f}"),
+    "profit_factor": ("獲利因子", "{:.2f}"),
+}
+
+
+# 函數：每年的 K 線數量，由實際的日期範圍推算（日線約 252，日內數據依交易時段而定）
+def periods_per_year(datetime):
+    days = datetime[-1] - datetime[0] if len(datetime) > 1 else 0
+    if days <= 0:
+        return np.nan
+    return (len(datetime) - 1) / (days / DAYS_PER_YEAR)
+
+
+# 函數：報酬率序列，第一根 K 線相對初始資金計算
+def returns(equity, initial_cash=None):
+    equity = np.asarray(equity, dtype=float)
+    start = initial_cash if initial_cash else equity[0]
+    values = np.concatenate(([start], equity))
+    return np.diff(values) / values[:-1]
+
+
+# 函數：回撤序列（負值，單位為比例）與每根 K 線距離前一個高點的 K 線數
+def drawdowns(equity):
+    equity = np.asarray(equity, dtype=float)
+    peak = np.maximum.accumulate(equity)
+    index = np.arange(len(equity))
+    last_peak = np.maximum.accumulate(np.where(equity >= peak, index, 0))
+    return equity / peak - 1, index - last_peak
+
+
+# 函數：回測結束時的帳戶摘要（最終價值、現金、盈虧與報酬率），現金 = 總價值 - 持股市值
+def account_summary(analysis, initial_cash):
+    value = analysis["equity"][-1]
+    return {
+        "final_value": value,
+        "cash": value - analysis["position"][-1] * analysis["close"][-1],
+        "pnl": value - initial_cash,
+        "roi_pct": (value - initial_cash) / initial_cash * 100 if initial_cash else float('nan'),
+    }
+
+
+# 函數：由 ChartRecorder 記錄的資產曲線、持倉與交易一次計算績效指標
+def performance(analysis, initial_cash=None, risk_free=0.0):
+    dt = analysis["datetime"]
+    equity = np.asarray(analysis["equity"], dtype=float)
+    if len(equity) == 0:
+        return {}
+    start = initial_cash if initial_cash else equity[0]
+    ppy = periods_per_year(dt)
+    years = (dt[-1] - dt[0]) / DAYS_PER_YEAR if len(dt) > 1 else 0
+
+    r = returns(equity, start)
+    excess = r - risk_free / ppy if ppy > 0 else r
+    std = r.std(ddof=1) if len(r) > 1 else np.nan
+    downside = np.sqrt(np.mean(np.minimum(excess, 0) ** 2))
+    dd, dd_bars = drawdowns(equity)
+    # 回撤期間換算為日曆天數
+    dd_end = int(np.argmax(dd_bars))
+    dd_days = dt[dd_end] - dt[dd_end - dd_bars[dd_end]]
+
+    fills = analysis.get("fills") or []
+    traded = sum(abs(price * size) for _, price, size, _ in fills)
+    trades = np.asarray(analysis.get("trades", []), dtype=float)
+    wins, losses = trades[trades > 0].sum(), -trades[trades < 0].sum()
+    position = analysis.get("position")
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            "final_value": equity[-1],
+            "total_return_pct": (equity[-1] / start - 1) * 100,
+            "cagr_pct": ((equity[-1] / start) ** (1 / years) - 1) * 100 if years > 0 and equity[-1] > 0 else np.nan,
+            "volatility_pct": std * np.sqrt(ppy) * 100,
+            "sharpe": excess.mean() / std * np.sqrt(ppy) if std > 0 else np.nan,
+            "sortino": excess.mean() / downside * np.sqrt(ppy) if downside > 0 else np.nan,
+            "max_drawdown_pct": dd.min() * 100,
+            "max_drawdown_days": dd_days,
+            "exposure_pct": np.mean(position != 0) * 100 if position is not None else np.nan,
+            "turnover": traded / equity.mean() / years if years > 0 else np.nan,
+            "trades": len(trades),
+            "win_rate_pct": np.mean(trades > 0) * 100 if len(trades) else np.nan,
+            "profit_factor": wins / losses if losses > 0 else np.nan,
+        }
+
+
+# 函數：滾動指標（年化報酬、波動率、Sharpe）與回撤，window 為 K 線數
+# 以累積和計算，不逐窗口迴圈
+def rolling(analysis, window, initial_cash=None):
+    dt = analysis["datetime"]
+    r = returns(analysis["equity"], initial_cash)
+    ppy = periods_per_year(dt)
+
+    def window_sum(values):
+        total = np.concatenate(([0.0], np.cumsum(values)))
+        result = np.full(len(values), np.nan)
+        result[window - 1:] = total[window:] - total[:-window]
+        return result
+
+    mean = window_sum(r) / window
+    var = (window_sum(r ** 2) - window * mean ** 2) / (window - 1)
+    std = np.sqrt(np.maximum(var, 0))
+    dd, _ = drawdowns(analysis["equity"])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return pd.DataFrame({
+            "return_pct": mean * ppy * 100,
+            "volatility_pct": std * np.sqrt(ppy) * 100,
+            "sharpe": np.where(std > 0, mean / std * np.sqrt(ppy), np.nan),
+            "drawdown_pct": dd * 100,
+        }, index=pd.to_datetime(np.asarray(dt) - EPOCH_NUM, unit='D').round('s'))
+
+
+# 函數：滾動指標的視窗（約一年的 K 線數），K 線數不足一個視窗時回傳 None
+def rolling_window(datetime):
+    ppy = periods_per_year(datetime)
+    if not np.isfinite(ppy):
+        return None
+    window = max(2, int(round(ppy)))
+    return window if len(datetime) > window else None
+
+
+# 函數：把績效指標轉換為顯示用的表格（指標名稱、數值）
+def metrics_frame(metrics):
+    rows = [(label, fmt.format(metrics[key]) if np.isfinite(metrics[key]) else "-")
+            for key, (label, fmt) in METRIC_LABELS.items() if key in metrics]
+    return pd.DataFrame(rows, columns=["指標", "數值"]).set_index("指標")
+
+
+# 函數：在頁面顯示績效指標表格，show_rolling 為 True 時另外顯示滾動一年的指標圖表
+def show_metrics(analysis, initial_cash=None, show_rolling=False):
+    import streamlit as st
+    st.table(metrics_frame(performance(analysis, initial_cash)))
+    if not show_rolling:
+        return
+    window = rolling_window(analysis["datetime"])
+    if window is None:
+        st.caption("回測期間不足一年，沒有滾動指標")
+        return
+    from charts import build_rolling_chart
+    st.plotly_chart(build_rolling_chart(analysis, window, initial_cash), use_container_width=True)
@@ -0,0 +1,137 @@
+import numpy as np
+import backtrader as bt
+from indicators import shared
+from resources import job
+from instrument import span
+from sklearn.preprocessing import MinMaxScaler
+
+# 模型使用的特徵欄位
+FEATURE_COLUMNS = ['Close', 'SMA_10', 'SMA_20']
+
+
+# 函數：獲取股票數據並加上短期與長期均線，下載失敗時回傳 None
+def get_stock_data(code, start_date, end_date, short_period, long_period):
+    from data import download_prices
+    df = download_prices(code, start_date, end_date)
+    if df.empty:
+        return None
+    with span("indicators", bars=len(df)):
+        df = df.sort_index(ascending=True)
+        df['SMA_10'] = df['Close'].rolling(window=short_period).mean()
+        df['SMA_20'] = df['Close'].rolling(window=long_period).mean()
+        df = df.dropna()
+    return df
+
+
+# 函數：將股票數據轉換為模型訓練數據集
+def create_dataset(stock_data, window_size):
+    with span("create_dataset", bars=len(stock_data)):
+        X = []
+        y = []
+        scaler = MinMaxScaler()
+        stock_data_normalized = scaler.fit_transform(stock_data[FEATURE_COLUMNS].values)
+
+        for i in range(len(stock_data) - window_size - 2):
+            X.append(stock_data_normalized[i:i + window_size])
+            if stock_data.iloc[i + window_size + 2]['Close'] > stock_data.iloc[i + window_size - 1]['Close']:
+                y.append(1)
+            else:
+                y.append(0)
+
+        X, y = np.array(X), np.array(y)
+    return X, y, scaler
+
+
+# 函數：訓練隨機森林模型
+def train_random_forest_model(X, y):
+    from sklearn.ensemble import RandomForestClassifier
+    # 依資源管理分配的核心數平行建樹（random_state 固定，結果與核心數無關）
+    with span("train_rf", samples=len(X)), job("sklearn") as threads:
+        rf_model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=threads)
+        rf_model.fit(X.reshape(X.shape[0], -1), y)
+    # 回測時每根 K 線只預測一筆，平行預測的額外成本大於效益
+    rf_model.n_jobs = None
+    return rf_model
+
+
+# 函數：訓練SVM模型
+def train_svm_model(X, y):
+    from sklearn.svm import SVC
+    svm_model = SVC(kernel='rbf', C=1, gamma='scale')
+    # libsvm 只使用一個執行緒
+    with span("train_svm", samples=len(X)), job("sklearn", threads=1):
+        svm_model.fit(X.reshape(X.shape[0], -1), y)
+    return svm_model
+
+
+# 定義隨機森林策略（以 scikit-learn 分類器預測均線特徵的漲跌）
+class RFStrategy(bt.Strategy):
+    params = (
+        ("window_size", 10),
+        ("scaler", None),
+        ("model", None),
+        ("short_period", 10),
+        ("long_period", 20),
+    )
+
+    def __init__(self):
+        self.data_close = self.datas[0].close
+        # 數據源已有 SMA_10 / SMA_20 欄位時直接使用，不重新計算
+        self.sma10 = shared(self, bt.ind.SMA, self.data_close, period=self.params.short_period)
+        self.sma20 = shared(self, bt.ind.SMA, self.data_close, period=self.params.long_period)
+        self.counter = 1
+        self.buyprice = None
+        self.buycomm = None
+
+    def log(self, txt, dt=None):
+        pass
+
+    def qbuffer(self, savemem=0, replaying=False):
+        super().qbuffer(savemem=savemem, replaying=replaying)
+        # 有界緩衝區只依指標需求決定長度，策略本身回看的數據線要另外保留 window_size 根
+        for line in (self.data_close, self.sma10, self.sma20):
+            line.minbuffer(self.params.window_size)
+
+    def notify_order(self, order):
+        if order.status in [order.Submitted, order.Accepted]:
+            return
+
+        if order.status in [order.Completed]:
+            if order.isbuy():
+                self.buyprice = order.executed.price
+                self.buycomm = order.executed.comm
+            self.bar_executed = len(self)
+
+        self.order = None
+
+    def notify_trade(self, trade):
+        pass
+
+    def next(self):
+        if self.counter < self.params.window_size:
+            self.counter += 1
+            return
+
+        previous_features = [[self.data_close[-i], self.sma10[-i], self.sma20[-i]] for i in range(0, self.params.window_size)]
+        X = np.array(previous_features).reshape(self.params.window_size, -1)
+
+        X = self.params.scaler.transform(X)
+        X = X.reshape(1, -1)  # 將 X 重新調整為 2D 數組
+
+        prediction = self.params.model.predict(X)
+        predicted_trend = prediction[0]
+
+        if predicted_trend == 1 and not self.position:
+            self.order = self.buy()
+        elif predicted_trend == 0 and self.position:
+            self.order = self.sell()
+        elif self.position:
+            if self.data_close[0] < self.buyprice * 0.9:
+                self.order = self.sell()
+            elif self.data_close[0] > self.buyprice * 1.5:
+                self.order = self.sell()
+
+
+# 定義SVM策略（交易邏輯與隨機森林策略相同，只有模型不同）
+class SVMStrategy(RFStrategy):
+    pass
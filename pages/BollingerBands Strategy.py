@@ -1,33 +1,11 @@
 import streamlit as st
-import yfinance as yf
-import backtrader as bt
-import pandas as pd
+from instrument import begin, show_panel
+from backtest import run_page_backtest, show_backtest_results
+from data import INTERVAL_LABELS
 from datetime import datetime
-import matplotlib.pyplot as plt
-from dateutil.relativedelta import relativedelta
-import matplotlib
-matplotlib.use('Agg')
 
-# 定義布林通道策略
-class BollingerBandsStrategy(bt.Strategy):
-    params = (
-        ('period', None),
-        ('devfactor', None),
-        ('trade_amount', None),  # 每次交易的固定投入金額
-    )
-
-    def __init__(self):
-        self.bollinger = bt.indicators.BollingerBands(
-            self.data.close, period=self.params.period, devfactor=self.params.devfactor)
-
-    def next(self):
-        if not self.position:  # 沒有持倉
-            if self.data.close < self.bollinger.lines.bot:
-                size = self.params.trade_amount // self.data.close[0]
-                self.buy(size=size)  # 價格低於下軌線，買入
-        else:
-            if self.data.close > self.bollinger.lines.top:
-                self.sell(size=self.position.size)  # 價格高於上軌線，賣出
+# 效能量測：本次執行的各階段耗時顯示在頁面底部的效能面板
+begin("Bollinger")
 
 # Streamlit 應用程式
 st.title("布林通道股票交易策略")
@@ -59,35 +37,22 @@ st.markdown("""
 symbol = st.text_input("股票符號", "AAPL")
 start_date = st.date_input("開始日期", datetime(2020, 1, 1))
 end_date = st.date_input("結束日期", datetime.today())
+interval = st.selectbox("K 線週期", list(INTERVAL_LABELS), format_func=INTERVAL_LABELS.get)
 period = st.slider("布林通道週期", 1, 50, 20)
 devfactor = st.slider("標準差倍數", 1.0, 5.0, 2.0)
 initial_cash = st.slider("初始现金", min_value=0, max_value=10000000, step=10000, value=10000)
 trade_amount = st.slider("每次交易金额", min_value=0, max_value=50000, step=1000, value=1000)
 commission = st.slider('交易手續費 (%)', min_value=0.0, max_value=1.0, step=0.01, value=0.1)
 
-if st.button("開始回測"):
-    # 獲取股票數據
-    data = yf.download(symbol, start=start_date, end=end_date)
-    data = bt.feeds.PandasData(dataname=data)
-
-    # 創建回測引擎
-    cerebro = bt.Cerebro()
-    cerebro.adddata(data)
-    cerebro.addstrategy(BollingerBandsStrategy, period=period, devfactor=devfactor, trade_amount=trade_amount)
-    cerebro.broker.set_cash(initial_cash)
-    cerebro.broker.setcommission(commission=commission / 100)  # 設置手續費
-
-    # 運行回測
-    st.write("開始回測...")
-    initial_portfolio_value = cerebro.broker.getvalue()
-    cerebro.run()
-    final_portfolio_value = cerebro.broker.getvalue()
+lean_mode = st.checkbox("省記憶體模式", help="適用於很長的歷史或分鐘數據：指標只保留計算所需的最近幾根 K 線，記憶體不隨歷史長度增加")
+record_journal = st.checkbox("記錄交易日誌", help="記錄每筆訂單、成交與交易，回測後以表格顯示並可下載 CSV")
+show_rolling = st.checkbox("顯示滾動指標", help="回測後另外顯示滾動一年的年化報酬率、波動率、Sharpe 與回撤")
 
-    # 顯示結果
-    st.write(f"初始投資組合價值: ${initial_portfolio_value:.2f}")
-    st.write(f"最終投資組合價值: ${final_portfolio_value:.2f}")
-    st.write(f"盈虧: ${final_portfolio_value - initial_portfolio_value:.2f}")
+if st.button("開始回測"):
+    analysis, journal_analysis = run_page_backtest(
+        "Bollinger", dict(period=period, devfactor=devfactor, trade_amount=trade_amount),
+        symbol, start_date, end_date, interval, initial_cash, commission, lean=lean_mode, journal=record_journal)
+    show_backtest_results(analysis, journal_analysis, symbol, initial_cash, show_rolling)
 
-    # 繪製回測結果
-    fig = cerebro.plot(style='candlestick')[0][0]
-    st.pyplot(fig)
\ No newline at end of file
+# 效能面板
+show_panel()
\ No newline at end of file
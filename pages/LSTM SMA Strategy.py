@@ -1,228 +1,10 @@
 import streamlit as st
-import backtrader as bt
-import yfinance as yf
-import torch
-import torch.nn as nn
-import numpy as np
-from torch.utils.data import TensorDataset, DataLoader
-from sklearn.preprocessing import MinMaxScaler
+from instrument import begin, show_panel
+from backtest import run_page_backtest, show_backtest_results
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib
-import time  # 添加这一行
-matplotlib.use('Agg')
 
-# 函数：获取股票数据
-def get_stock_data(code, start_date, end_date):
-    df = yf.download(code, start=start_date, end=end_date)
-    df = df.sort_index(ascending=True)
-    df['SMA_10'] = df['Close'].rolling(window=short_period).mean()
-    df['SMA_20'] = df['Close'].rolling(window=long_period).mean()
-    df = df.dropna()
-    return df
-
-# 函数：将股票数据转换为模型训练数据集
-def create_dataset(stock_data, window_size):
-    X = []
-    y = []
-    scaler = MinMaxScaler()
-    stock_data_normalized = scaler.fit_transform(stock_data.values)
-
-    for i in range(len(stock_data) - window_size - 2):
-        X.append(stock_data_normalized[i:i + window_size])
-        if stock_data.iloc[i + window_size + 2]['Close'] > stock_data.iloc[i + window_size - 1]['Close']:
-            y.append(1)
-        else:
-            y.append(0)
-
-    X, y = np.array(X), np.array(y)
-    X = torch.from_numpy(X).float()
-    y = torch.from_numpy(y).long()
-    return X, y, scaler
-
-# 函数：创建DataLoader
-def create_dataloader(X, y, batch_size):
-    dataset = TensorDataset(X, y)
-    train_loader = DataLoader(dataset, batch_size=batch_size, shuffle=True)
-    return train_loader
-
-# LSTM 模型定义
-class SimpleLSTM(nn.Module):
-    def __init__(self, input_size, hidden_size, num_layers, num_classes, dropout_rate=0.2):
-        super(SimpleLSTM, self).__init__()
-        self.hidden_size = hidden_size
-        self.num_layers = num_layers
-        self.lstm = nn.LSTM(input_size, hidden_size, num_layers, batch_first=True)
-        self.fc1 = nn.Linear(hidden_size, hidden_size)
-        self.relu = nn.ReLU()
-        self.dropout = nn.Dropout(dropout_rate)
-        self.bn = nn.BatchNorm1d(hidden_size)
-        self.fc2 = nn.Linear(hidden_size, num_classes)
-        self.sigmoid = nn.Sigmoid()
-
-    def forward(self, x):
-        h0 = torch.zeros(self.num_layers, x.size(0), self.hidden_size)
-        c0 = torch.zeros(self.num_layers, x.size(0), self.hidden_size)
-        out, _ = self.lstm(x, (h0, c0))
-        out = self.fc1(out[:, -1, :])
-        out = self.relu(out)
-        out = self.dropout(out)
-        out = self.bn(out)
-        out = self.fc2(out)
-        out = self.sigmoid(out)
-        return out
-
-# 定义策略
-class LSTMStrategy(bt.Strategy):
-    params = (
-        ("window_size", 10),
-        ("scaler", None),
-        ("model", None),
-    )
-
-    def __init__(self):
-        self.data_close = self.datas[0].close
-        self.sma10 = bt.indicators.SimpleMovingAverage(self.datas[0], period=short_period)
-        self.sma20 = bt.indicators.SimpleMovingAverage(self.datas[0], period=long_period)
-        self.counter = 1
-        self.buyprice = None
-        self.buycomm = None
-
-    def log(self, txt, dt=None):
-        pass  # 不再记录详细日志
-
-    def notify_order(self, order):
-        if order.status in [order.Submitted, order.Accepted]:
-            return
-
-        if order.status in [order.Completed]:
-            if order.isbuy():
-                self.buyprice = order.executed.price
-                self.buycomm = order.executed.comm
-            self.bar_executed = len(self)
-
-        self.order = None
-
-    def notify_trade(self, trade):
-        pass  # 不再记录详细日志
-
-    def next(self):
-        if self.counter < self.params.window_size:
-            self.counter += 1
-            return
-
-        previous_features = [[self.data_close[-i], self.sma10[-i], self.sma20[-i]] for i in range(0, self.params.window_size)]
-        X = torch.tensor(previous_features).view(1, self.params.window_size, -1).float()
-        X = self.params.scaler.transform(X.numpy().reshape(-1, 3)).reshape(1, self.params.window_size, -1)
-
-        # 將模型設置為評估模式
-        self.params.model.eval()
-        with torch.no_grad():
-            prediction = self.params.model(torch.tensor(X).float())
-
-        max_vals, max_idxs = torch.max(prediction, dim=1)
-        predicted_trend = max_idxs.item()
-
-        if predicted_trend == 1 and not self.position:
-            self.order = self.buy()  # 买入股票
-        elif predicted_trend == 0 and self.position:
-            self.order = self.sell()
-        elif self.position:
-            # 這裡可以添加止損或止盈邏輯
-            if self.data_close[0] < self.buyprice * 0.9:  # 假設止損點為買入價格的90%
-                self.order = self.sell()
-            elif self.data_close[0] > self.buyprice * 1.5:  # 假設止盈點為買入價格的150%
-                self.order = self.sell()
-
-# 定义训练LSTM模型的函数
-def train_lstm():
-    global input_size, hidden_size, num_layers, num_classes, scaler, lstm_model_ready, trained_model
-    with st.spinner("Start training LSTM..."):
-        start_time = time.time()
-        max_training_time = 300  
-        # 最大训练时间为300秒（5分钟）
-
-        # 获取股票数据
-        stock_data = get_stock_data(symbol, start_date, end_date)
-
-        # 将股票数据转换为模型训练数据集
-        window_size = 10
-        X, y, scaler = create_dataset(stock_data[['Close', 'SMA_10', 'SMA_20']], window_size)
-
-        # 定义批量大小和DataLoader
-        batch_size = 64
-        train_loader = create_dataloader(X, y, batch_size)
-
-        # 模型参数定义
-        input_size = 3  # 更新為特徵數
-        hidden_size = 128
-        num_layers = 2
-        num_classes = 2
-
-        # LSTM 模型初始化
-        model = SimpleLSTM(input_size, hidden_size, num_layers, num_classes)
-        criterion = nn.CrossEntropyLoss()
-        optimizer = torch.optim.Adam(model.parameters(), lr=1e-4)
-        num_epochs = 200
-
-        # 训练模型
-        for epoch in range(num_epochs):
-            for inputs, labels in train_loader:
-                outputs = model(inputs)
-                loss = criterion(outputs, labels)
-                optimizer.zero_grad()
-                loss.backward()
-                optimizer.step()
-
-            if (epoch+1) % 10 == 0:
-                st.write(f'Epoch [{epoch+1}/{num_epochs}], Loss: {loss.item():.4f}')
-
-        # 保存训练好的模型到內存
-        trained_model = model
-        lstm_model_ready = True
-
-# 定义backtrader相关的函数
-def run_backtrader():
-    global input_size, hidden_size, num_layers, num_classes, scaler, lstm_model_ready, trained_model
-    with st.spinner("Running backtrader..."):
-        while not lstm_model_ready:
-            time.sleep(10)
-
-        st.write("LSTM model loaded successfully.")
-
-        # 获取股票数据
-        stock_data = get_stock_data(symbol, start_date, end_date)
-
-        # 创建Backtrader引擎
-        cerebro = bt.Cerebro()
-
-        # 设置初始资金
-        cerebro.broker.set_cash(initial_cash)
-        cerebro.broker.setcommission(commission=commission/100)
-
-        # 添加策略并传递scaler和model
-        cerebro.addstrategy(LSTMStrategy, scaler=scaler, model=trained_model)
-
-        # 将数据添加到引擎中
-        data = bt.feeds.PandasData(dataname=stock_data)
-        cerebro.adddata(data)
-
-        # 运行策略
-        results = cerebro.run()
-
-        # 打印最终的投资组合价值
-        portvalue = cerebro.broker.getvalue()
-        pnl = portvalue - initial_cash  # 初始资金为用户输入的值
-        st.write(f'Final Portfolio Value: ${portvalue:.2f}')
-        st.write(f'P/L: ${pnl:.2f}')
-
-        # 計算投資報酬率（ROI）
-        roi = (portvalue - initial_cash) / initial_cash * 100
-        st.write(f'ROI: {roi:.2f}%')
-
-        # 绘制回测结果
-        fig = cerebro.plot(style='candlestick')[0][0]  # 获取 Matplotlib 图形对象
-        st.pyplot(fig)  # 将图形嵌入到 Streamlit 页面中
+# 效能量測：本次執行的各階段耗時顯示在頁面底部的效能面板
+begin("LSTM")
 
 # Streamlit 應用
 st.title("LSTM 股票交易策略")
@@ -283,10 +65,15 @@ commission = st.slider('交易手續费 (%)', min_value=0.0, max_value=0.5, step
 trade_amount = st.slider("每次交易金额", min_value=0, max_value=50000, step=1000, value=1000)
 initial_cash = st.slider("初始现金", min_value=0, max_value=10000000, step=10000, value=10000)
 
+lean_mode = st.checkbox("省記憶體模式", help="適用於很長的歷史或分鐘數據：指標只保留計算所需的最近幾根 K 線，記憶體不隨歷史長度增加")
+record_journal = st.checkbox("記錄交易日誌", help="記錄每筆訂單、成交與交易，回測後以表格顯示並可下載 CSV")
+show_rolling = st.checkbox("顯示滾動指標", help="回測後另外顯示滾動一年的年化報酬率、波動率、Sharpe 與回撤")
+
 if st.button("開始回测"):
-    lstm_model_ready = False
-    trained_model = None
-    
-    # 執行訓練和回測
-    train_lstm()
-    run_backtrader()
\ No newline at end of file
+    analysis, journal_analysis = run_page_backtest(
+        "LSTM", dict(short_period=short_period, long_period=long_period),
+        symbol, start_date, end_date, "1d", initial_cash, commission, lean=lean_mode, journal=record_journal)
+    show_backtest_results(analysis, journal_analysis, symbol, initial_cash, show_rolling)
+
+# 效能面板
+show_panel()
\ No newline at end of file
@@ -1,161 +1,10 @@
 import streamlit as st
-import backtrader as bt
-import yfinance as yf
-import numpy as np
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.svm import SVC
+from instrument import begin, show_panel
+from backtest import run_page_backtest, show_backtest_results
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib
-import time
-
-matplotlib.use('Agg')
-
-# 函數：獲取股票數據
-def get_stock_data(code, start_date, end_date, short_period, long_period):
-    df = yf.download(code, start=start_date, end=end_date)
-    if df.empty:
-        st.error(f"無法下載股票代碼 {code} 的數據，請檢查股票代碼和日期範圍。")
-        return None
-    df = df.sort_index(ascending=True)
-    df['SMA_10'] = df['Close'].rolling(window=short_period).mean()
-    df['SMA_20'] = df['Close'].rolling(window=long_period).mean()
-    df = df.dropna()
-    return df
-
-def create_dataset(stock_data, window_size):
-    X = []
-    y = []
-    scaler = MinMaxScaler()
-    stock_data_normalized = scaler.fit_transform(stock_data[['Close', 'SMA_10', 'SMA_20']].values)
-
-    for i in range(len(stock_data) - window_size - 2):
-        X.append(stock_data_normalized[i:i + window_size])
-        if stock_data.iloc[i + window_size + 2]['Close'] > stock_data.iloc[i + window_size - 1]['Close']:
-            y.append(1)
-        else:
-            y.append(0)
-
-    X, y = np.array(X), np.array(y)
-    return X, y, scaler
-
-# 定義SVM策略
-class SVMStrategy(bt.Strategy):
-    params = (
-        ("window_size", 10),
-        ("scaler", None),
-        ("model", None),
-        ("short_period", 10),
-        ("long_period", 20),
-    )
-
-    def __init__(self):
-        self.data_close = self.datas[0].close
-        self.sma10 = bt.indicators.SimpleMovingAverage(self.datas[0], period=self.params.short_period)
-        self.sma20 = bt.indicators.SimpleMovingAverage(self.datas[0], period=self.params.long_period)
-        self.counter = 1
-        self.buyprice = None
-        self.buycomm = None
-
-    def log(self, txt, dt=None):
-        pass
-
-    def notify_order(self, order):
-        if order.status in [order.Submitted, order.Accepted]:
-            return
-
-        if order.status in [order.Completed]:
-            if order.isbuy():
-                self.buyprice = order.executed.price
-                self.buycomm = order.executed.comm
-            self.bar_executed = len(self)
-
-        self.order = None
-
-    def notify_trade(self, trade):
-        pass
-
-    def next(self):
-        if self.counter < self.params.window_size:
-            self.counter += 1
-            return
-
-        previous_features = [[self.data_close[-i], self.sma10[-i], self.sma20[-i]] for i in range(0, self.params.window_size)]
-        X = np.array(previous_features).reshape(self.params.window_size, -1)
-
-        print("Shape of X before scaling (SVM):", X.shape)
-
-        X = self.params.scaler.transform(X)
-        X = X.reshape(1, -1)  # 將 X 重新調整為 2D 數組
-
-        prediction = self.params.model.predict(X)
-        predicted_trend = prediction[0]
-
-        if predicted_trend == 1 and not self.position:
-            self.order = self.buy()
-        elif predicted_trend == 0 and self.position:
-            self.order = self.sell()
-        elif self.position:
-            if self.data_close[0] < self.buyprice * 0.9:
-                self.order = self.sell()
-            elif self.data_close[0] > self.buyprice * 1.5:
-                self.order = self.sell()
-
-# 函數：訓練SVM模型
-def train_svm():
-    global svm_model_ready, trained_svm_model, scaler
-    with st.spinner("開始訓練SVM..."):
-        stock_data = get_stock_data(symbol, start_date, end_date, short_period, long_period)
-        if stock_data is None:
-            return
-
-        window_size = 10
-        X, y, scaler = create_dataset(stock_data[['Close', 'SMA_10', 'SMA_20']], window_size)
-
-        print(X.shape)
-
-        X = X.reshape(X.shape[0], -1)
-
-        svm_model = SVC(kernel='rbf', C=1, gamma='scale')
-        svm_model.fit(X, y)
-
-        trained_svm_model = svm_model
-        svm_model_ready = True
-
-# 函數：運行Backtrader
-def run_backtrader():
-    global scaler, svm_model_ready, trained_svm_model
-    with st.spinner("運行Backtrader..."):
-        while not svm_model_ready:
-            time.sleep(1)
 
-        st.write("SVM模型加載成功。")
-
-        stock_data = get_stock_data(symbol, start_date, end_date, short_period, long_period)
-        if stock_data is None:
-            return
-
-        cerebro = bt.Cerebro()
-        cerebro.broker.set_cash(initial_cash)
-        cerebro.broker.setcommission(commission=commission/100)
-
-        cerebro.addstrategy(SVMStrategy, scaler=scaler, model=trained_svm_model, short_period=short_period, long_period=long_period)
-
-        data = bt.feeds.PandasData(dataname=stock_data)
-        cerebro.adddata(data)
-
-        results = cerebro.run()
-
-        portvalue = cerebro.broker.getvalue()
-        pnl = portvalue - initial_cash
-        st.write(f'最終投資組合價值: ${portvalue:.2f}')
-        st.write(f'盈虧: ${pnl:.2f}')
-
-        roi = (portvalue - initial_cash) / initial_cash * 100
-        st.write(f'投資報酬率: {roi:.2f}%')
-
-        fig = cerebro.plot(style='candlestick')[0][0]
-        st.pyplot(fig)
+# 效能量測：本次執行的各階段耗時顯示在頁面底部的效能面板
+begin("SVM")
 
 # Streamlit 應用
 st.title("SVM股票交易策略")
@@ -211,10 +60,15 @@ commission = st.slider('交易手續費 (%)', min_value=0.0, max_value=0.5, step
 trade_amount = st.slider("每次交易金額", min_value=0, max_value=50000, step=1000, value=1000)
 initial_cash = st.slider("初始現金", min_value=0, max_value=10000000, step=10000, value=10000)
 
+lean_mode = st.checkbox("省記憶體模式", help="適用於很長的歷史或分鐘數據：指標只保留計算所需的最近幾根 K 線，記憶體不隨歷史長度增加")
+record_journal = st.checkbox("記錄交易日誌", help="記錄每筆訂單、成交與交易，回測後以表格顯示並可下載 CSV")
+show_rolling = st.checkbox("顯示滾動指標", help="回測後另外顯示滾動一年的年化報酬率、波動率、Sharpe 與回撤")
+
 if st.button("開始回測"):
-    svm_model_ready = False
-    trained_svm_model = None
-    scaler = None
+    analysis, journal_analysis = run_page_backtest(
+        "SVM", dict(short_period=short_period, long_period=long_period),
+        symbol, start_date, end_date, "1d", initial_cash, commission, lean=lean_mode, journal=record_journal)
+    show_backtest_results(analysis, journal_analysis, symbol, initial_cash, show_rolling)
 
-    train_svm()
-    run_backtrader()
\ No newline at end of file
+# 效能面板
+show_panel()
\ No newline at end of file
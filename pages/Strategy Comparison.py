@@ -0,0 +1,81 @@
+import streamlit as st
+import pandas as pd
+from data import download_prices
+from backtest import run_comparison, STRATEGY_DEFAULTS
+from charts import ChartRecorder, build_comparison_chart
+from metrics import performance
+from instrument import begin, span, show_panel
+
+# 效能量測：本次執行的各階段耗時顯示在頁面底部的效能面板
+begin("Comparison")
+
+# Streamlit 用户界面
+st.title("策略比較")
+
+st.markdown("""
+在同一份股價數據上同時執行多個策略，並排比較資產曲線與績效。
+- 數據只下載、載入一次，所有策略在同一次回測中逐根 K 線一起執行。
+- 相同的指標只計算一次，例如布林通道與三均線共用同一條 20 日均線。
+- 每個策略使用獨立的資金帳戶，互不影響。
+""")
+
+# 可比較的策略（需要訓練模型的策略請使用各自的頁面）
+STRATEGY_LABELS = {
+    "MACD": "MACD",
+    "RSI": "RSI",
+    "Bollinger": "布林通道",
+    "TripleMA": "三均線",
+}
+
+# 用户输入参数
+symbol = st.text_input("股票符號", "AAPL")
+start_date = st.date_input("開始日期", pd.to_datetime("2020-01-01"))
+end_date = st.date_input("结束日期", pd.to_datetime("today"))
+
+selected = st.multiselect("比較的策略", list(STRATEGY_LABELS), default=list(STRATEGY_LABELS),
+                          format_func=STRATEGY_LABELS.get)
+commission = st.slider('交易手續费 (%)', min_value=0.0, max_value=0.5, step=0.0005, format="%.4f", value=0.001)
+trade_amount = st.slider("每次交易金额", min_value=0, max_value=50000, step=1000, value=1000)
+initial_cash = st.slider("初始现金", min_value=0, max_value=10000000, step=10000, value=10000)
+
+if st.button("開始比較"):
+    if not selected:
+        st.warning("請至少選擇一個策略")
+        st.stop()
+
+    df = download_prices(symbol, start_date, end_date)
+    if df.empty:
+        st.error("無法獲取股票數據，請檢查股票代碼或日期範圍")
+        st.stop()
+
+    # 各策略沿用預設參數，只替換每次交易金額
+    params_by_name = {name: dict(STRATEGY_DEFAULTS[name], trade_amount=trade_amount) for name in selected}
+    with st.spinner("回測中..."):
+        with span("backtest", strategies=len(selected), bars=len(df)):
+            results, elapsed = run_comparison(selected, df, params_by_name, initial_cash, commission,
+                                              analyzers=[(ChartRecorder, 'chart')])
+
+    analyses = {STRATEGY_LABELS[name]: strat.analyzers.chart.get_analysis() for name, strat in results.items()}
+    rows = []
+    for label, analysis in analyses.items():
+        metrics = performance(analysis, initial_cash)
+        rows.append({
+            "策略": label,
+            "最終價值": metrics["final_value"],
+            "報酬率 (%)": metrics["total_return_pct"],
+            "Sharpe": metrics["sharpe"],
+            "最大回撤 (%)": metrics["max_drawdown_pct"],
+            "勝率 (%)": metrics["win_rate_pct"],
+            "成交次數": len(analysis["fills"]),
+        })
+    st.dataframe(pd.DataFrame(rows).set_index("策略").style.format(
+                     "{:.2f}", subset=["最終價值", "報酬率 (%)", "Sharpe", "最大回撤 (%)", "勝率 (%)"]),
+                 use_container_width=True)
+    st.caption("共 %d 根 K 線，%d 個策略，耗時 %.2f 秒" % (len(df), len(selected), elapsed))
+
+    with span("chart"):
+        fig = build_comparison_chart(analyses)
+        st.plotly_chart(fig, use_container_width=True)
+
+# 效能面板
+show_panel()
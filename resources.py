@@ -0,0 +1,101 @@
+"""CPU 資源管理：同一個伺服器行程中的重量級計算共用一個核心預算
+
+LSTM 訓練（torch）、隨機森林 / SVM 擬合（sklearn）與 Prophet 擬合（Stan）
+預設都會盡量使用所有核心，多個使用者同時執行時會互相搶占，反而每個人都變慢。
+每種工作依 WORKLOAD_THREADS 使用固定的執行緒數，開始前先向全域預算申請同樣數量的核心，
+預算不足時依先後順序排隊；NumPy 的 BLAS 執行緒則固定為 WORKLOAD_THREADS["blas"]。
+
+範例：
+    with job("sklearn") as threads:
+        model = RandomForestClassifier(n_jobs=threads).fit(X, y)
+"""
+import os
+import time
+import threading
+import contextlib
+from collections import deque
+from instrument import record
+
+# 全域核心預算，可用環境變數 CPU_BUDGET 調整（例如與其他服務共用機器時）
+TOTAL_CORES = max(1, int(os.environ.get("CPU_BUDGET", os.cpu_count() or 1)))
+
+# 每種工作使用的執行緒數（同時也是向預算申請的核心數）
+WORKLOAD_THREADS = {
+    "torch": max(1, TOTAL_CORES // 2),       # LSTM 訓練（torch intra-op 執行緒）
+    "sklearn": max(1, TOTAL_CORES // 2),     # 隨機森林（n_jobs）；SVC 本身只用一個執行緒
+    "prophet": 1,                            # Stan 擬合為單執行緒
+    "prophet_cv": max(1, TOTAL_CORES // 2),  # Prophet 交叉驗證的工作行程數
+    "blas": 1,                               # NumPy / SciPy 的 BLAS 執行緒（全域設定，不申請預算）
+}
+
+# 排隊超過這個秒數時記錄在效能量測中
+WAIT_RECORD_SECONDS = 0.01
+
+_cond = threading.Condition()
+_queue = deque()   # 排隊中的工作：(票號, 種類, 核心數)
+_running = {}      # {票號: (種類, 核心數, 開始時間)}
+_local = threading.local()
+_configured = False
+
+
+# 函數：第一次執行工作時限制 BLAS 執行緒（threadpoolctl 的設定對整個行程有效）
+def _configure():
+    global _configured
+    if not _configured:
+        _configured = True
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=WORKLOAD_THREADS["blas"], user_api='blas')
+
+
+# 函數：使用中的核心數
+def _in_use():
+    return sum(threads for _, threads, _ in _running.values())
+
+
+# 函數：執行一個重量級工作，回傳可使用的執行緒數
+# 預算不足時依先後順序等待；同一個執行緒中巢狀的工作沿用外層的預算
+@contextlib.contextmanager
+def job(kind, threads=None):
+    if getattr(_local, 'threads', None) is not None:
+        yield _local.threads
+        return
+
+    threads = min(threads or WORKLOAD_THREADS[kind], TOTAL_CORES)
+    ticket = object()
+    wait_start = time.perf_counter()
+    with _cond:
+        _queue.append((ticket, kind, threads))
+        while _queue[0][0] is not ticket or _in_use() + threads > TOTAL_CORES:
+            _cond.wait()
+        _queue.popleft()
+        _running[ticket] = (kind, threads, time.time())
+        _cond.notify_all()  # 下一個排隊的工作可能也放得下
+    waited = time.perf_counter() - wait_start
+
+    _local.threads = threads
+    try:
+        if waited > WAIT_RECORD_SECONDS:
+            record("cpu_queue", waited * 1000, kind=kind, threads=threads)
+        _configure()
+        if kind == 'torch':
+            # torch 的 intra-op 執行緒數是全域設定，所有 LSTM 訓練使用相同的數量
+            import torch
+            torch.set_num_threads(threads)
+        yield threads
+    finally:
+        _local.threads = None
+        with _cond:
+            del _running[ticket]
+            _cond.notify_all()
+
+
+# 函數：目前的使用狀況（總核心數、使用中的核心數、排隊的工作數與執行中的工作）
+def utilization():
+    now = time.time()
+    with _cond:
+        return {
+            "cores": TOTAL_CORES,
+            "in_use": _in_use(),
+            "queued": len(_queue),
+            "jobs": [(kind, threads, now - started) for kind, threads, started in _running.values()],
+        }
@@ -0,0 +1,201 @@
+"""回測結果庫：相同設定的回測只執行一次，之後直接讀取保存的結果
+
+以策略、參數、股票代碼、日期範圍、週期、資金與手續費的雜湊為鍵（內容定址），
+鍵中另外包含策略與回測引擎原始碼的雜湊，修改策略邏輯後舊的結果不會再被使用；
+所有使用者共用同一份結果。索引與小型欄位存在 SQLite，
+每根 K 線的陣列（價格、資產曲線、持倉、指標）、成交與交易日誌各存成一個 Parquet 檔。
+超過保存期限（TTL）的結果視為過期，總大小超過上限時先刪除最久沒有讀取的結果。
+"""
+import os
+import json
+import contextlib
+import time
+import sqlite3
+import hashlib
+import datetime
+import functools
+import numpy as np
+import pandas as pd
+from journal import COLUMNS as JOURNAL_COLUMNS
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'results')
+DB_PATH = os.path.join(RESULTS_DIR, 'results.sqlite')
+
+# 結果保存期限（秒）與總大小上限（位元組）
+TTL_SECONDS = 7 * 24 * 3600
+MAX_BYTES = 512 * 2 ** 20
+
+# 每筆結果的檔案：{種類: 檔名後綴}
+PARTS = {"bars": ".parquet", "fills": ".fills.parquet", "journal": ".journal.parquet"}
+
+# 回測結果依賴的原始碼：所有策略共用的回測引擎，以及各策略所在的模組（未列出的策略在 strategies.py）
+ENGINE_MODULES = ("backtest", "feeds", "indicators", "charts", "journal")
+STRATEGY_MODULES = {
+    "LSTM": ("lstm_strategy", "ml_strategies"),
+    "RF": ("ml_strategies",),
+    "SVM": ("ml_strategies",),
+}
+DEFAULT_STRATEGY_MODULES = ("strategies",)
+
+
+# 函數：數據版本；結束日期在今天之後的數據每天都會新增，以今天的日期區分版本
+def data_version(end):
+    today = datetime.date.today()
+    end = pd.Timestamp(end).date()
+    return "closed" if end < today else today.isoformat()
+
+
+# 函數：原始碼檔案的雜湊（依修改時間快取，檔案修改後重新計算）
+@functools.lru_cache(maxsize=64)
+def _source_digest(path, mtime_ns):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+# 函數：策略的程式碼版本（策略模組與回測引擎原始碼的雜湊），不需要載入策略模組
+def code_version(strategy):
+    base = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha1()
+    for module in ENGINE_MODULES + STRATEGY_MODULES.get(strategy, DEFAULT_STRATEGY_MODULES):
+        path = os.path.join(base, module + '.py')
+        digest.update(_source_digest(path, os.stat(path).st_mtime_ns).encode('ascii'))
+    return digest.hexdigest()[:16]
+
+
+# 函數：回測設定（策略、參數、股票代碼、日期範圍、週期、資金、手續費，以及數據與程式碼版本）
+def result_config(strategy, params, symbol, start, end, interval="1d", initial_cash=10000, commission=0.001):
+    return {
+        "strategy": strategy,
+        "params": {name: params[name] for name in sorted(params)},
+        "symbol": symbol.strip().upper(),
+        "start": pd.Timestamp(start).date().isoformat(),
+        "end": pd.Timestamp(end).date().isoformat(),
+        "interval": interval,
+        "initial_cash": float(initial_cash),
+        "commission": float(commission),
+        "data_version": data_version(end),
+        "code_version": code_version(strategy),
+    }
+
+
+# 函數：回測設定的雜湊鍵
+def result_key(config):
+    text = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+# 函數：開啟索引資料庫（多個行程同時讀寫時等待鎖定），離開時提交並關閉
+@contextlib.contextmanager
+def _connect():
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""CREATE TABLE IF NOT EXISTS results (
+            key TEXT PRIMARY KEY,
+            created REAL NOT NULL,
+            accessed REAL NOT NULL,
+            bytes INTEGER NOT NULL,
+            meta TEXT NOT NULL
+        )""")
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _path(key, part):
+    return os.path.join(RESULTS_DIR, key + PARTS[part])
+
+
+# 函數：刪除結果的索引與檔案
+def _delete(conn, keys):
+    for key in keys:
+        conn.execute("DELETE FROM results WHERE key = ?", (key,))
+        for part in PARTS:
+            try:
+                os.remove(_path(key, part))
+            except FileNotFoundError:
+                pass
+
+
+# 函數：刪除過期的結果，總大小超過上限時再刪除最久沒有讀取的結果
+def evict(ttl=TTL_SECONDS, max_bytes=MAX_BYTES):
+    with _connect() as conn:
+        expired = [key for key, in conn.execute("SELECT key FROM results WHERE created < ?", (time.time() - ttl,))]
+        _delete(conn, expired)
+        total = 0
+        stale = []
+        for key, size in conn.execute("SELECT key, bytes FROM results ORDER BY accessed DESC"):
+            total += size
+            if total > max_bytes:
+                stale.append(key)
+        _delete(conn, stale)
+    return len(expired) + len(stale)
+
+
+# 函數：保存一次回測的結果
+# analysis 為 ChartRecorder 的結果，journal 為 TradeJournal 的結果（沒有記錄時為 None）
+def save_result(key, analysis, journal=None):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    bars = pd.DataFrame({name: analysis[name] for name in ("datetime", "close", "equity", "position")})
+    for i, (_, _, _, values) in enumerate(analysis["indicators"]):
+        bars[f"indicator_{i}"] = values
+    fills = pd.DataFrame(analysis["fills"], columns=["datetime", "price", "size", "isbuy"])
+
+    # 先寫暫存檔再換名，讀取中的使用者不會讀到寫到一半的檔案
+    frames = {"bars": bars, "fills": fills}
+    if journal is not None:
+        frames["journal"] = pd.DataFrame(journal)
+    size = 0
+    for part, frame in frames.items():
+        tmp = _path(key, part) + '.tmp'
+        frame.to_parquet(tmp, index=False)
+        os.replace(tmp, _path(key, part))
+        size += os.path.getsize(_path(key, part))
+
+    meta = {
+        "indicators": [(label, name, subplot) for label, name, subplot, _ in analysis["indicators"]],
+        "trades": [float(pnl) for pnl in analysis["trades"]],
+        "journal": journal is not None,
+    }
+    now = time.time()
+    with _connect() as conn:
+        conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                     (key, now, now, size, json.dumps(meta)))
+    evict()
+
+
+# 函數：讀取保存的結果，回傳 (analysis, journal)；沒有結果、已過期，
+# 或需要交易日誌但當時沒有記錄時回傳 None
+def load_result(key, journal=False, ttl=TTL_SECONDS):
+    if not os.path.exists(DB_PATH):
+        return None
+    with _connect() as conn:
+        row = conn.execute("SELECT created, meta FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        created, meta = row
+        meta = json.loads(meta)
+        if created < time.time() - ttl:
+            _delete(conn, [key])
+            return None
+        if journal and not meta["journal"]:
+            return None
+        try:
+            bars = pd.read_parquet(_path(key, "bars"))
+            fills = pd.read_parquet(_path(key, "fills"))
+            events = pd.read_parquet(_path(key, "journal")) if journal else None
+        except (FileNotFoundError, OSError):
+            _delete(conn, [key])
+            return None
+        conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+
+    analysis = {name: bars[name].to_numpy() for name in ("datetime", "close", "equity", "position")}
+    analysis["indicators"] = [(label, name, subplot, bars[f"indicator_{i}"].to_numpy())
+                              for i, (label, name, subplot) in enumerate(meta["indicators"])]
+    analysis["fills"] = list(fills.itertuples(index=False, name=None))
+    analysis["trades"] = np.array(meta["trades"])
+    if events is not None:
+        events = {name: events[name].to_numpy() for name in JOURNAL_COLUMNS}
+    return analysis, events
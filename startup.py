@@ -0,0 +1,36 @@
+import statistics
+from collections import deque
+import streamlit as st
+from resources import utilization
+from instrument import record
+
+# 本模組只會在伺服器行程中載入一次，用來保存 homepage.py 的冷啟動與每次重跑耗時
+
+# 第一次執行（含載入所有模組）的耗時
+cold_start_seconds = None
+# 最近的重跑耗時（秒）
+rerun_seconds = deque(maxlen=100)
+
+
+# 函數：記錄一次腳本執行的耗時（從 homepage.py 第一行開始計算）
+# 伺服器行程中的第一次執行為冷啟動，包含第一次載入所有模組的時間，同時記錄在效能量測中
+def record_run(elapsed):
+    global cold_start_seconds
+    if cold_start_seconds is None:
+        cold_start_seconds = elapsed
+        record("cold_start", elapsed * 1000)
+    else:
+        rerun_seconds.append(elapsed)
+
+
+# 函數：在側邊欄顯示冷啟動與重跑耗時
+def show_timings():
+    with st.sidebar:
+        if cold_start_seconds is not None:
+            st.caption(f"冷啟動: {cold_start_seconds * 1000:.0f} ms")
+        if rerun_seconds:
+            st.caption(f"本次重跑: {rerun_seconds[-1] * 1000:.0f} ms，"
+                       f"中位數: {statistics.median(rerun_seconds) * 1000:.0f} ms（最近 {len(rerun_seconds)} 次）")
+        # 重量級計算的核心使用狀況（見 resources.py）
+        usage = utilization()
+        st.caption(f"CPU: {usage['in_use']}/{usage['cores']} 核心使用中，{usage['queued']} 個工作排隊")
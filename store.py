@@ -0,0 +1,213 @@
+"""本地 K 線資料庫：分鐘與小時 K 線依月份分區存放
+
+目錄結構：.cache/bars/<股票代碼>/<週期>/<YYYY-MM>/*.npy（每個欄位一個檔案，見 feeds.save_arrays）。
+回測時以 feeds.ChunkedData 逐個分區讀取，不需要把整段歷史放進記憶體。
+
+範例（匯入自行取得的一分鐘 K 線 CSV，第一欄為時間）：
+    python store.py import AAPL 1m aapl_1m.csv
+"""
+import os
+import re
+import sys
+import time
+import shutil
+import datetime
+import numpy as np
+import pandas as pd
+import backtrader as bt
+from feeds import ChunkedData, save_arrays, load_arrays, EPOCH_NUM
+from data import download_prices
+from instrument import span
+
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'bars')
+
+# 支援的日內週期：{名稱: (pandas 頻率, 分鐘數)}
+INTERVALS = {
+    "1m": ("1min", 1),
+    "5m": ("5min", 5),
+    "15m": ("15min", 15),
+    "30m": ("30min", 30),
+    "1h": ("60min", 60),
+}
+
+# 重新取樣的來源週期
+BASE_INTERVAL = "1m"
+
+# Yahoo 的日內數據限制：{週期: (單次請求最多天數, 最多可回溯天數)}
+YAHOO_LIMITS = {
+    "1m": (7, 30),
+    "5m": (60, 60),
+    "15m": (60, 60),
+    "30m": (60, 60),
+    "1h": (730, 730),
+}
+
+PARTITION_PATTERN = re.compile(r'^\d{4}-\d{2}$')
+
+# 目前月份仍在增加新的 K 線；在這個秒數內下載過時不重新下載
+REFRESH_SECONDS = 5 * 60
+
+
+# 函數：股票代碼與週期對應的目錄
+def _interval_dir(symbol, interval):
+    return os.path.join(STORE_DIR, os.path.basename(symbol), interval)
+
+
+# 函數：把分區讀回 DataFrame（欄位名稱為小寫）
+def _read_partition(directory):
+    arrays = load_arrays(directory)
+    index = pd.to_datetime(np.asarray(arrays.pop('datetime')) - EPOCH_NUM, unit='D').round('s')
+    return pd.DataFrame({name: np.asarray(values) for name, values in arrays.items()}, index=index)
+
+
+# 函數：寫入分區，先寫到暫存目錄再換名，讀取中的回測不會看到寫到一半的檔案
+def _write_partition(directory, df):
+    tmp = directory + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    save_arrays(df, tmp)
+    if os.path.exists(directory):
+        old = directory + '.old'
+        shutil.rmtree(old, ignore_errors=True)
+        os.replace(directory, old)
+        os.replace(tmp, directory)
+        shutil.rmtree(old, ignore_errors=True)
+    else:
+        os.replace(tmp, directory)
+
+
+# 函數：把 K 線依月份寫入資料庫，與既有分區合併（相同時間以新數據為準）
+def write_bars(symbol, interval, df):
+    if df.empty:
+        return
+    df = df.copy()
+    df.columns = [str(column).lower() for column in df.columns]
+    if df.index.tz is not None:
+        df.index = df.index.tz_localize(None)
+    base = _interval_dir(symbol, interval)
+    for month, chunk in df.groupby(df.index.to_period('M')):
+        directory = os.path.join(base, str(month))
+        if os.path.exists(directory):
+            chunk = pd.concat([_read_partition(directory), chunk])
+        chunk = chunk[~chunk.index.duplicated(keep='last')].sort_index()
+        _write_partition(directory, chunk)
+
+
+# 函數：列出日期範圍內的分區目錄（依月份排序）
+def partitions(symbol, interval, start=None, end=None):
+    base = _interval_dir(symbol, interval)
+    if not os.path.isdir(base):
+        return []
+    first = pd.Period(start, 'M') if start is not None else None
+    last = pd.Period(end, 'M') if end is not None else None
+    result = []
+    for name in sorted(os.listdir(base)):
+        if not PARTITION_PATTERN.match(name):
+            continue
+        month = pd.Period(name, 'M')
+        if (first is None or month >= first) and (last is None or month <= last):
+            result.append(os.path.join(base, name))
+    return result
+
+
+# 函數：需要的月份
+def _months(start, end):
+    return [str(month) for month in pd.period_range(pd.Period(start, 'M'), pd.Period(end, 'M'), freq='M')]
+
+
+# 函數：從 Yahoo 下載日內 K 線寫入資料庫（受 Yahoo 可回溯期間限制，超出的部分略過）
+def fetch(symbol, interval, start, end):
+    step_days, max_days = YAHOO_LIMITS[interval]
+    start = max(pd.Timestamp(start), pd.Timestamp(datetime.date.today()) - pd.Timedelta(days=max_days - 1))
+    end = pd.Timestamp(end) + pd.Timedelta(days=1)
+    while start < end:
+        stop = min(start + pd.Timedelta(days=step_days), end)
+        # 週末、假日與上市前的區段本來就沒有數據，空的結果不重試
+        write_bars(symbol, interval, download_prices(symbol, start, stop, interval=interval, retry_empty=False))
+        start = stop
+
+
+# 函數：把一分鐘 K 線重新取樣為較長的週期，結果依分區快取
+# 快取的分區比來源舊時才重新計算；週期不超過一小時，分區的月份邊界不會切開 K 線
+def resample(symbol, interval, start=None, end=None):
+    freq, _ = INTERVALS[interval]
+    target = _interval_dir(symbol, f"{interval}_from_{BASE_INTERVAL}")
+    result = []
+    for source in partitions(symbol, BASE_INTERVAL, start, end):
+        directory = os.path.join(target, os.path.basename(source))
+        source_mtime = os.path.getmtime(os.path.join(source, 'datetime.npy'))
+        cached = os.path.join(directory, 'datetime.npy')
+        if not os.path.exists(cached) or os.path.getmtime(cached) < source_mtime:
+            df = _read_partition(source)
+            bars = df.resample(freq, label='left', closed='left').agg(
+                {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'})
+            os.makedirs(target, exist_ok=True)
+            _write_partition(directory, bars.dropna(subset=['close']))
+        result.append(directory)
+    return result
+
+
+# 函數：記錄目前月份最後一次下載時間的檔案（以修改時間記錄，下載不到新 K 線時分區本身不會更新）
+def _fetched_marker(symbol, interval, month):
+    return os.path.join(_interval_dir(symbol, interval), '.fetched-%s' % month)
+
+
+# 函數：下載缺少的月份；目前月份超過 REFRESH_SECONDS 沒有下載時重新下載
+# 直接讀取的週期與重新取樣的一分鐘來源都以這個規則更新
+def _update(symbol, interval, start, end):
+    months = _months(start, end)
+    existing = {os.path.basename(directory) for directory in partitions(symbol, interval, start, end)}
+    current = str(pd.Period(datetime.date.today(), 'M'))
+    marker = _fetched_marker(symbol, interval, current)
+    fresh = os.path.exists(marker) and time.time() - os.path.getmtime(marker) < REFRESH_SECONDS
+    missing = [month for month in months if month not in existing or (month == current and not fresh)]
+    if not missing:
+        return
+    fetch(symbol, interval, pd.Period(missing[0], 'M').start_time,
+          min(pd.Period(missing[-1], 'M').end_time, pd.Timestamp(end)))
+    if current in missing:
+        os.makedirs(os.path.dirname(marker), exist_ok=True)
+        with open(marker, 'a'):
+            os.utime(marker)
+
+
+# 函數：取得日期範圍內的分區，必要時重新取樣或下載
+# 一分鐘數據涵蓋所有月份時由一分鐘數據重新取樣，否則使用（或下載）該週期本身的數據
+def ensure_partitions(symbol, interval, start, end):
+    if interval != BASE_INTERVAL:
+        base = partitions(symbol, BASE_INTERVAL, start, end)
+        if [os.path.basename(directory) for directory in base] == _months(start, end):
+            _update(symbol, BASE_INTERVAL, start, end)
+            return resample(symbol, interval, start, end)
+    _update(symbol, interval, start, end)
+    return partitions(symbol, interval, start, end)
+
+
+# 函數：建立逐個分區讀取的日內數據源，沒有數據時回傳 None
+def intraday_feed(symbol, interval, start, end):
+    with span("intraday_partitions", symbol=symbol, interval=interval) as s:
+        directories = ensure_partitions(symbol, interval, start, end)
+        s["partitions"] = len(directories)
+    if not directories:
+        return None
+    _, minutes = INTERVALS[interval]
+    return ChunkedData(dataname=directories,
+                       fromdate=pd.Timestamp(start).to_pydatetime(),
+                       todate=(pd.Timestamp(end) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)).to_pydatetime(),
+                       timeframe=bt.TimeFrame.Minutes, compression=minutes)
+
+
+# 函數：從 CSV 匯入 K 線（第一欄為時間，其餘欄位為 Open、High、Low、Close、Volume）
+def import_csv(symbol, interval, path):
+    df = pd.read_csv(path, index_col=0, parse_dates=True)
+    write_bars(symbol, interval, df)
+    return len(df)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 5 or sys.argv[1] != 'import':
+        print(__doc__, file=sys.stderr)
+        sys.exit(2)
+    _, _, symbol, interval, path = sys.argv
+    if interval not in INTERVALS:
+        sys.exit("不支援的週期: %s（可用: %s）" % (interval, ', '.join(INTERVALS)))
+    print("已匯入 %d 根 K 線" % import_csv(symbol, interval, path), file=sys.stderr)
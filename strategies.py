@@ -0,0 +1,272 @@
+import backtrader as bt
+from indicators import shared, MACD, BollingerBands
+
+# 定期定額投資策略
+class PeriodicInvestmentStrategy(bt.Strategy):
+    params = (
+        ('monthly_investment', None),  # 每期投資金額
+        ('commission', None),  # 手續費
+        ('investment_day', None),  # 投資日
+        ('printlog', False),  # 是否打印交易日誌
+    )
+
+    def __init__(self, **kwargs):
+        self.order = None
+        self.add_timer(
+            when=bt.Timer.SESSION_START,
+            monthdays=[self.params.investment_day],  # 每月的特定日期投資
+            monthcarry=True,  # 如果特定日期不是交易日，則延至下一個交易日
+        )
+
+        # 從kwargs中獲取初始資金
+        self.initial_cash = kwargs.get('initial_cash', 10000)  # 初始資金設置為10000
+
+    def notify_timer(self, timer, when, *args, **kwargs):
+        self.log('進行定期投資')
+        # 獲取當前價格
+        price = self.data.close[0]
+        # 計算購買數量
+        investment_amount = self.params.monthly_investment / price
+        # 檢查資金是否足夠
+        if self.broker.get_cash() >= self.params.monthly_investment:
+            # 執行購買
+            self.order = self.buy(size=investment_amount)
+
+    def log(self, txt, dt=None):
+        ''' 日誌函數 '''
+        dt = dt or self.datas[0].datetime.date(0)
+        if self.params.printlog:
+            print('%s, %s' % (dt.isoformat(), txt))
+
+    def notify_order(self, order):
+        if order.status in [order.Completed]:
+            if order.isbuy():
+                cost = order.executed.price * order.executed.size
+                commission = cost * self.params.commission / 100  # 將百分比轉換為小數
+                self.log('買入執行, 價格: %.2f, 成本: %.2f, 手續費: %.2f' %
+                        (order.executed.price, cost, commission))
+
+            elif order.issell():
+                self.log('賣出執行, 價格: %.2f, 成本: %.2f, 手續費: %.2f' %
+                        (order.executed.price,
+                        order.executed.value,
+                        order.executed.comm))
+
+            self.bar_executed = len(self)
+
+        elif order.status in [order.Canceled, order.Margin, order.Rejected]:
+            self.log('訂單 取消/保證金不足/拒絕')
+
+        self.order = None
+
+# 定義MACD策略
+class MACDStrategy(bt.Strategy):
+    params = (
+        ('printlog', False),
+        ('fast', None),
+        ('slow', None),
+        ('signal', None),
+    )
+
+    def __init__(self):
+        macd = MACD(self.data.close, 
+                    period_me1=self.params.fast, 
+                    period_me2=self.params.slow, 
+                    period_signal=self.params.signal)
+        self.macd = macd.macd
+        self.signal = macd.signal
+        self.crossover = bt.indicators.CrossOver(self.macd, self.signal)
+
+    def log(self, txt, dt=None, doprint=False):
+        if self.params.printlog or doprint:
+            dt = dt or self.datas[0].datetime.date(0)
+            print("%s, %s" % (dt.isoformat(), txt))
+
+    def notify_order(self, order):
+        if order.status in [order.Submitted, order.Accepted]:
+            return
+        if order.status in [order.Completed]:
+            if order.isbuy():
+                self.log(
+                    "BUY EXECUTED, Price: %.2f, Cost: %.2f, Comm %.2f"
+                    % (order.executed.price, order.executed.value, order.executed.comm)
+                )
+                self.buyprice = order.executed.price
+                self.buycomm = order.executed.comm
+            elif order.issell():
+                self.log(
+                    "SELL EXECUTED, Price: %.2f, Cost: %.2f, Comm %.2f"
+                    % (order.executed.price, order.executed.value, order.executed.comm)
+                )
+            self.bar_executed = len(self)
+        elif order.status in [order.Canceled, order.Margin, order.Rejected]:
+            self.log("Order Canceled/Margin/Rejected")
+        self.order = None
+
+    def notify_trade(self, trade):
+        if not trade.isclosed:
+            return
+        self.log("OPERATION PROFIT, GROSS %.2f, NET %.2f" % (trade.pnl, trade.pnlcomm))
+
+    def next(self):
+        if self.crossover > 0:  # 買入信號
+            if not self.position:
+                self.log("BUY CREATE, %.2f" % self.data.close[0])
+                self.buy()
+        elif self.crossover < 0:  # 賣出信號
+            if self.position:
+                self.log("SELL CREATE, %.2f" % self.data.close[0])
+                self.sell()
+
+    def stop(self):
+        self.log("Ending Value %.2f" % (self.broker.getvalue()))
+
+# 自定义Sizer，根據每次交易的金額計算股數
+class FixedCashSizer(bt.Sizer):
+    params = (('cash', None),)
+
+    def _getsizing(self, comminfo, cash, data, isbuy):
+        if isbuy:
+            return self.params.cash // data.close[0]
+        return self.broker.getposition(data).size
+
+# 定義 RSI 策略
+class RSIStrategy(bt.Strategy):
+    params = (
+        ('printlog', False),
+        ('rsi_period', None),
+        ('rsi_overbought', None),
+        ('rsi_oversold', None),
+        ('trade_amount', None),  # 每次交易的固定投入金額
+    )
+
+    def __init__(self):
+        self.rsi = bt.indicators.RelativeStrengthIndex(
+            self.data.close, period=self.params.rsi_period)
+
+    def next(self):
+        if not self.position:  # 沒有持倉
+            if self.rsi < self.params.rsi_oversold:
+                size = self.params.trade_amount // self.data.close[0]
+                self.buy(size=size)  # RSI 低於超賣區域，買入
+        else:
+            if self.rsi > self.params.rsi_overbought:
+                self.sell(size=self.position.size)  # RSI 高於超買區域，賣出
+
+# 定義布林通道策略
+class BollingerBandsStrategy(bt.Strategy):
+    params = (
+        ('period', None),
+        ('devfactor', None),
+        ('trade_amount', None),  # 每次交易的固定投入金額
+    )
+
+    def __init__(self):
+        self.bollinger = BollingerBands(
+            self.data.close, period=self.params.period, devfactor=self.params.devfactor)
+
+    def next(self):
+        if not self.position:  # 沒有持倉
+            if self.data.close < self.bollinger.lines.bot:
+                size = self.params.trade_amount // self.data.close[0]
+                self.buy(size=size)  # 價格低於下軌線，買入
+        else:
+            if self.data.close > self.bollinger.lines.top:
+                self.sell(size=self.position.size)  # 價格高於上軌線，賣出
+
+# 自定义指标
+class MySignal(bt.Indicator):
+    lines = ("signal",)
+    params = dict(short_period=None, median_period=None, long_period=None)
+
+    def __init__(self):
+        # 均線由策略共用，不重複計算
+        self.s_ma = shared(self, bt.ind.SMA, self.data.close, period=self.p.short_period)
+        self.m_ma = shared(self, bt.ind.SMA, self.data.close, period=self.p.median_period)
+        self.l_ma = shared(self, bt.ind.SMA, self.data.close, period=self.p.long_period)
+        self.signal1 = bt.And(self.m_ma > self.l_ma, self.s_ma > self.m_ma)
+        self.buy_signal = bt.If((self.signal1 - self.signal1(-1)) > 0, 1, 0)
+        self.sell_signal = bt.ind.CrossDown(self.s_ma, self.m_ma)
+        self.lines.signal = bt.Sum(self.buy_signal, self.sell_signal * (-1))
+
+# 自定义Sizer
+class FixedAmountSizer(bt.Sizer):
+    params = (("amount", None),)
+
+    def _getsizing(self, comminfo, cash, data, isbuy):
+        if isbuy:
+            size = self.p.amount // data.close[0]
+            return size
+        return self.broker.getposition(data).size
+
+# 三均線策略
+class TestStrategy(bt.Strategy):
+    params = dict(
+        printlog=False,
+        short_period=None,
+        median_period=None,
+        long_period=None,
+        initial_cash=None,
+    )
+
+    def log(self, txt, dt=None, doprint=False):
+        if self.params.printlog or doprint:
+            dt = dt or self.datas[0].datetime.date(0)
+            print("%s, %s" % (dt.isoformat(), txt))
+
+    def __init__(self):
+        self.dataclose = self.datas[0].close
+        self.order = None
+        self.buyprice = None
+        self.buycomm = None
+        # 先建立均線，MySignal 直接取用同一組均線
+        self.s_ma = shared(self, bt.ind.SMA, self.dataclose, period=self.params.short_period)
+        self.m_ma = shared(self, bt.ind.SMA, self.dataclose, period=self.params.median_period)
+        self.l_ma = shared(self, bt.ind.SMA, self.dataclose, period=self.params.long_period)
+        self.signal = MySignal(
+            self.datas[0],
+            short_period=self.params.short_period,
+            median_period=self.params.median_period,
+            long_period=self.params.long_period
+        )
+
+    def notify_order(self, order):
+        if order.status in [order.Submitted, order.Accepted]:
+            return
+        if order.status in [order.Completed]:
+            if order.isbuy():
+                self.log(
+                    "BUY EXECUTED, Price: %.2f, Cost: %.2f, Comm %.2f"
+                    % (order.executed.price, order.executed.value, order.executed.comm)
+                )
+                self.buyprice = order.executed.price
+                self.buycomm = order.executed.comm
+            elif order.issell():
+                self.log(
+                    "SELL EXECUTED, Price: %.2f, Cost: %.2f, Comm %.2f"
+                    % (order.executed.price, order.executed.value, order.executed.comm)
+                )
+            self.bar_executed = len(self)
+        elif order.status in [order.Canceled, order.Margin, order.Rejected]:
+            self.log("Order Canceled/Margin/Rejected")
+        self.order = None
+
+    def notify_trade(self, trade):
+        if not trade.isclosed:
+            return
+        self.log("OPERATION PROFIT, GROSS %.2f, NET %.2f" % (trade.pnl, trade.pnlcomm))
+
+    def next(self):
+        if self.order:
+            return
+        if not self.position:
+            if self.signal.lines.signal[0] == 1:
+                self.log("BUY CREATE, %.2f" % self.dataclose[0])
+                self.order = self.buy()
+        else:
+            if self.signal.lines.signal[0] == -1:
+                self.log("SELL CREATE, %.2f" % self.dataclose[0])
+                self.order = self.sell()
+
+    def stop(self):
+        self.log("Ending Value %.2f" % (self.broker.getvalue()))
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+import backtrader as bt
+from bench import synthetic_ohlcv
+from charts import ChartRecorder
+import backtest
+from feeds import ArrayData, save_arrays, load_arrays
+from indicators import shared
+from backtest import make_cerebro, add_strategy, run_backtest, run_comparison
+
+# PeriodicInvestment 放在第一個：它以計時器下單，只能動用自己的帳戶
+RULE_STRATEGIES = ("PeriodicInvestment", "MACD", "RSI", "Bollinger", "TripleMA")
+ANALYZERS = ((ChartRecorder, 'chart'),)
+
+
+@pytest.fixture(scope="module")
+def df():
+    return synthetic_ohlcv(1500, seed=7)
+
+
+def equity(strat):
+    return strat.analyzers.chart.get_analysis()["equity"]
+
+
+# 函數：以指定的數據源執行回測，回傳資產曲線
+def run_feed(name, feed, df, lean=False):
+    cerebro = make_cerebro(lean)
+    cerebro.addanalyzer(ChartRecorder, _name='chart')
+    add_strategy(cerebro, name, df)
+    cerebro.adddata(feed)
+    cerebro.broker.setcash(10000)
+    cerebro.broker.setcommission(commission=0.001 / 100)
+    return equity(cerebro.run()[0])
+
+
+@pytest.mark.parametrize("name", RULE_STRATEGIES)
+def test_array_data_matches_pandas_data(df, name):
+    expected = run_feed(name, bt.feeds.PandasData(dataname=df), df)
+    np.testing.assert_allclose(run_feed(name, ArrayData(dataname=df), df), expected, rtol=1e-12)
+
+
+def test_array_data_from_memory_mapped_arrays(df, tmp_path):
+    save_arrays(df, tmp_path)
+    expected = run_feed("MACD", bt.feeds.PandasData(dataname=df), df)
+    np.testing.assert_allclose(run_feed("MACD", ArrayData(dataname=load_arrays(tmp_path)), df), expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize("name", RULE_STRATEGIES)
+def test_lean_mode_matches_full_run(df, name, monkeypatch):
+    monkeypatch.setattr(backtest, "PRUNE_EVERY_BARS", 16)  # 回測期間多次清除訂單與交易
+    summary, strat = run_backtest(name, df, analyzers=ANALYZERS)
+    lean_summary, lean = run_backtest(name, df, analyzers=ANALYZERS, lean=True)
+    assert len(equity(lean)) == len(df)
+    np.testing.assert_allclose(equity(lean), equity(strat), rtol=1e-12)
+    assert lean_summary["final_value"] == pytest.approx(summary["final_value"], rel=1e-12)
+    np.testing.assert_allclose(lean.analyzers.chart.get_analysis()["trades"],
+                               strat.analyzers.chart.get_analysis()["trades"])
+
+
+def test_comparison_matches_individual_runs(df):
+    results, _ = run_comparison(RULE_STRATEGIES, df, analyzers=ANALYZERS)
+    assert list(results) == list(RULE_STRATEGIES)
+    for name, strat in results.items():
+        _, single = run_backtest(name, df, analyzers=ANALYZERS)
+        np.testing.assert_allclose(equity(strat), equity(single), rtol=1e-12, err_msg=name)
+
+
+def test_comparison_shares_indicators(df):
+    results, _ = run_comparison(["Bollinger", "TripleMA"], df)
+    bollinger, triple = results["Bollinger"], results["TripleMA"]
+    # 三均線的 20 日均線就是布林通道中軌使用的 SMA
+    assert shared(bollinger, bt.ind.SMA, bollinger.data.close, period=20) is triple.m_ma
+
+
+def test_comparison_rejects_ml_strategies(df):
+    with pytest.raises(ValueError):
+        run_comparison(["MACD", "LSTM"], df)
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+import batch
+import data
+import result_store
+from bench import synthetic_ohlcv
+from backtest import broker_commission, run_page_backtest
+
+
+def job(strategy, params, commission):
+    return {
+        "symbol": "AAPL",
+        "strategy": strategy,
+        "params": params,
+        "start": "2015-01-01",
+        "end": "2021-01-01",
+        "initial_cash": 100000,
+        "commission": commission,
+        "lean": False,
+        "checkpoint": None,
+    }
+
+
+@pytest.fixture(autouse=True)
+def results(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_store, "RESULTS_DIR", str(tmp_path))
+    monkeypatch.setattr(result_store, "DB_PATH", str(tmp_path / "results.sqlite"))
+
+
+def test_periodic_investment_matches_homepage(monkeypatch):
+    df = synthetic_ohlcv(1500, seed=4)
+    monkeypatch.setattr(data, "download_prices", lambda *args, **kwargs: df)
+    commission = 0.01
+    params = {"monthly_investment": 2000, "investment_day": 5}
+    row = batch.run_job(job("PeriodicInvestment", params, commission))
+    assert row["error"] is None
+
+    # 首頁 Run Backtest 使用的頁面回測流程
+    analysis, _ = run_page_backtest("PeriodicInvestment", params, "AAPL", "2015-01-01", "2021-01-01",
+                                    initial_cash=100000, commission=commission, daily=lambda: df)
+    assert row["final_value"] == pytest.approx(analysis["equity"][-1], rel=1e-12)
+
+
+def test_page_backtest_reuses_saved_result(monkeypatch):
+    df = synthetic_ohlcv(800, seed=5)
+    monkeypatch.setattr(data, "download_prices", lambda *args, **kwargs: df)
+    first, journal = run_page_backtest("MACD", {"trade_amount": 2000}, "AAPL", "2015-01-01", "2018-01-01",
+                                       journal=True)
+    assert journal is not None
+
+    # 第二次不再載入數據，直接讀取保存的結果
+    monkeypatch.setattr(data, "download_prices", lambda *args, **kwargs: pytest.fail("數據不應重新下載"))
+    second, _ = run_page_backtest("MACD", {"trade_amount": 2000}, "AAPL", "2015-01-01", "2018-01-01",
+                                  journal=True)
+    np.testing.assert_allclose(second["equity"], first["equity"])
+
+
+def test_rule_pages_enter_commission_in_percent():
+    assert broker_commission("macd", 0.5) == pytest.approx(0.005)
+    assert broker_commission("Triple MA", 0.5) == pytest.approx(0.005)
+    assert broker_commission("PeriodicInvestment", 0.5) == 0.5
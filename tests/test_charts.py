@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from charts import lttb, downsample
+
+
+@pytest.mark.parametrize("n, n_out", [(10000, 1500), (1001, 100), (50, 3)])
+def test_lttb_keeps_endpoints_and_one_point_per_bucket(n, n_out):
+    rng = np.random.default_rng(n)
+    x = np.arange(n, dtype=float)
+    y = np.cumsum(rng.standard_normal(n))
+
+    idx = lttb(x, y, n_out)
+
+    assert len(idx) == n_out
+    assert idx[0] == 0 and idx[-1] == n - 1
+    assert np.all(np.diff(idx) > 0)
+    # 中間每個桶恰好選出一個點
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    for i, index in enumerate(idx[1:-1]):
+        assert edges[i] <= index < edges[i + 1]
+
+
+def test_lttb_keeps_extremes():
+    y = np.zeros(1000)
+    y[300], y[700] = 50.0, -50.0
+    idx = lttb(np.arange(1000, dtype=float), y, 20)
+    assert 300 in idx and 700 in idx
+
+
+def test_lttb_short_series_unchanged():
+    assert list(lttb(np.arange(5.0), np.arange(5.0), 10)) == list(range(5))
+    assert list(lttb(np.arange(5.0), np.arange(5.0), 2)) == list(range(5))
+
+
+def test_downsample_skips_warmup_nan():
+    x = np.arange(3000, dtype=float)
+    y = np.sin(x / 50)
+    y[:100] = np.nan
+    xs, ys = downsample(x, y, 500)
+    assert len(xs) == 500
+    assert xs[0] == 100 and xs[-1] == 2999
+    assert not np.isnan(ys).any()
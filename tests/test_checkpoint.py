@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from bench import synthetic_ohlcv
+from charts import ChartRecorder
+from journal import TradeJournal
+from backtest import run_backtest, update_backtest
+
+RULE_STRATEGIES = ("PeriodicInvestment", "MACD", "RSI", "Bollinger", "TripleMA")
+ANALYZERS = ((ChartRecorder, 'chart'), (TradeJournal, 'journal'))
+
+
+@pytest.fixture(scope="module")
+def df():
+    return synthetic_ohlcv(1500, seed=11)
+
+
+@pytest.mark.parametrize("name", RULE_STRATEGIES)
+def test_resume_matches_full_run(df, name, tmp_path):
+    path = str(tmp_path / "checkpoint.pkl")
+    update_backtest(path, name, df.iloc[:1000], analyzers=ANALYZERS)
+    summary, resumed = update_backtest(path, name, df, analyzers=ANALYZERS)
+    full_summary, full = run_backtest(name, df, analyzers=ANALYZERS)
+
+    assert summary["resumed_bars"] == 1000
+    assert summary["final_value"] == pytest.approx(full_summary["final_value"], rel=1e-12)
+    chart, expected = resumed.analyzers.chart.get_analysis(), full.analyzers.chart.get_analysis()
+    np.testing.assert_allclose(chart["equity"], expected["equity"], rtol=1e-12)
+    np.testing.assert_array_equal(chart["position"], expected["position"])
+    assert chart["fills"] == expected["fills"]
+    # 訂單編號是行程內的流水號，不比較
+    journal, expected = resumed.analyzers.journal.get_analysis(), full.analyzers.journal.get_analysis()
+    for column in ("datetime", "kind", "size", "price", "pnlcomm"):
+        np.testing.assert_allclose(journal[column], expected[column], rtol=1e-12, equal_nan=True)
+
+
+def test_changed_history_runs_from_start(df, tmp_path):
+    path = str(tmp_path / "checkpoint.pkl")
+    update_backtest(path, "MACD", df.iloc[:1000])
+    adjusted = df.copy()
+    adjusted.iloc[:500, :4] *= 0.98  # 例如除權息調整了過去的價格
+    summary, _ = update_backtest(path, "MACD", adjusted)
+    assert summary["resumed_bars"] == 0
+
+
+def test_changed_params_runs_from_start(df, tmp_path):
+    path = str(tmp_path / "checkpoint.pkl")
+    update_backtest(path, "MACD", df.iloc[:1000])
+    summary, _ = update_backtest(path, "MACD", df, params={"fast": 10})
+    assert summary["resumed_bars"] == 0
@@ -0,0 +1,99 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+import coze
+
+
+# 本地的模擬伺服器：以 chunked 編碼逐段送出 SSE 事件（event: 與 data: 兩行為一個事件）
+class MockCoze(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    events = []
+    clients = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.clients.append(self.client_address)
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        assert body["stream"] is True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for name, payload in self.events:
+            frame = ("event:%s\ndata:%s\n\n" % (name, json.dumps(payload, ensure_ascii=False))).encode('utf-8')
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(frame), frame))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def answer(text):
+    return "message", {"event": "message", "is_finish": False,
+                       "message": {"role": "assistant", "type": "answer", "content": text}}
+
+
+DONE = ("done", {"event": "done"})
+
+
+@pytest.fixture
+def server(monkeypatch):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), MockCoze)
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    monkeypatch.setattr(coze, "API_URL", "http://127.0.0.1:%d/open_api/v2/chat" % httpd.server_port)
+    monkeypatch.setattr(coze, "_session", None)
+    MockCoze.events = []
+    MockCoze.clients = []
+    yield MockCoze
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_deltas_arrive_in_order(server):
+    server.events = [answer("你好"), answer("，"), answer("這是"), answer("回答"),
+                     ("message", {"event": "message", "message": {"type": "follow_up", "content": "下一題？"}}),
+                     DONE]
+    assert list(coze.stream_chat("hi")) == ["你好", "，", "這是", "回答"]
+
+
+def test_stream_ends_at_done_event(server):
+    server.events = [answer("完成"), DONE, answer("之後的內容")]
+    assert list(coze.stream_chat("hi")) == ["完成"]
+
+
+def test_error_event_raises_after_partial_answer(server):
+    server.events = [answer("部分"), ("error", {"event": "error", "error_information": {"code": 700, "msg": "bad"}})]
+    received = []
+    with pytest.raises(RuntimeError, match="700"):
+        for text in coze.stream_chat("hi"):
+            received.append(text)
+    assert received == ["部分"]
+
+
+def test_pooled_session_is_reused(server):
+    server.events = [answer("a"), DONE]
+    for _ in range(3):
+        assert list(coze.stream_chat("hi")) == ["a"]
+    assert len(server.clients) == 3
+    assert len(set(server.clients)) == 1
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(coze, "_cache", coze.OrderedDict())
+    monkeypatch.setattr(coze, "_grams", {})
+
+
+def test_cache_matches_only_the_same_question_by_default(cache):
+    coze.remember("RSI 14 怎麼用", "十四天")
+    assert coze.cached_answer("rsi14怎麼用？") == "十四天"
+    assert coze.cached_answer("RSI 6 怎麼用") is None
+    assert coze.cached_answer("RSI 141 怎麼用") is None
+
+
+def test_fuzzy_matching_is_opt_in(cache, monkeypatch):
+    monkeypatch.setattr(coze, "CACHE_SIMILARITY", 0.8)
+    coze.remember("請問 MACD 指標怎麼使用", "看交叉")
+    assert coze.cached_answer("請問MACD指標怎麼使用呢") == "看交叉"
@@ -0,0 +1,144 @@
+import time
+import itertools
+import concurrent.futures
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+import data
+
+_names = itertools.count()
+
+
+def prices(rows=5):
+    index = pd.date_range("2020-01-01", periods=rows, freq="B", name="Date")
+    close = np.linspace(100, 110, rows)
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                         "Volume": np.ones(rows)}, index=index)
+
+
+# 註冊一個本地的假數據來源，responses 依序為每次下載的結果（例外則拋出）
+def stub_provider(responses, limit=2, gate=None):
+    calls = []
+    name = "stub%d" % next(_names)
+    responses = iter(responses)
+
+    def fetch(symbol, start, end, interval):
+        calls.append((symbol, start, end, interval))
+        if gate is not None:
+            gate.wait(5)
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    data.register_provider(name, fetch, limit)
+    return name, calls
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(data, "_sleep", recorded.append)
+    return recorded
+
+
+def test_concurrent_requests_share_one_fetch():
+    gate = threading.Event()
+    provider, calls = stub_provider(itertools.repeat(prices()), gate=gate)
+    barrier = threading.Barrier(10)
+    results = [None] * 10
+
+    def request(i):
+        barrier.wait()
+        results[i] = data.download_prices("aapl ", "2020-01-01", "2020-02-01", provider=provider)
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.3)  # 所有請求都在等待同一個下載
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert all(result.equals(results[0]) for result in results)
+    # 每個呼叫者取得自己的副本
+    assert len({id(result) for result in results}) == 10
+
+
+def test_empty_result_is_retried(sleeps):
+    provider, calls = stub_provider([pd.DataFrame(), None, prices()])
+    df = data.download_prices("AAPL", "2020-01-01", "2020-02-01", provider=provider)
+    assert len(calls) == 3
+    assert len(df) == 5
+    assert len(sleeps) == 2
+
+
+def test_empty_result_not_retried_when_disabled(sleeps):
+    provider, calls = stub_provider([pd.DataFrame(), prices()])
+    df = data.download_prices("AAPL", "2020-01-04", "2020-01-06", provider=provider, retry_empty=False)
+    assert df.empty
+    assert len(calls) == 1
+    assert sleeps == []
+
+
+def test_exception_is_retried_then_raised(sleeps):
+    provider, calls = stub_provider([ConnectionError("throttled")] * data.RETRIES)
+    with pytest.raises(ConnectionError):
+        data.download_prices("AAPL", "2020-01-01", "2020-02-01", provider=provider)
+    assert len(calls) == data.RETRIES
+    assert len(sleeps) == data.RETRIES - 1
+
+
+def test_empty_after_all_retries_returns_empty_frame(sleeps):
+    provider, calls = stub_provider([pd.DataFrame()] * data.RETRIES)
+    df = data.download_prices("AAPL", "2020-01-01", "2020-02-01", provider=provider)
+    assert df.empty
+    assert len(calls) == data.RETRIES
+
+
+def test_backoff_doubles_with_jitter(sleeps):
+    provider, _ = stub_provider([ValueError("boom"), pd.DataFrame(), prices()])
+    data.download_prices("AAPL", "2020-01-01", "2020-02-01", provider=provider)
+    for attempt, seconds in enumerate(sleeps):
+        base = data.BACKOFF_SECONDS * 2 ** attempt
+        assert base <= seconds <= base * 1.5
+
+
+# 等待背景預先下載完成
+def wait_prefetched(provider):
+    for request, (_, future) in list(data._prefetched.items()):
+        if request[0] == provider:
+            concurrent.futures.wait([future], 5)
+
+
+def test_prefetched_result_is_reused():
+    provider, calls = stub_provider([prices()])
+    data.prefetch(["AAPL"], "2020-01-01", "2020-02-01", provider=provider)
+    wait_prefetched(provider)
+    data.prefetch(["AAPL"], "2020-01-01", "2020-02-01", provider=provider)
+    df = data.download_prices("AAPL", "2020-01-01", "2020-02-01", provider=provider)
+    assert len(calls) == 1
+    assert len(df) == 5
+
+
+def test_empty_prefetch_is_not_kept(sleeps):
+    provider, calls = stub_provider([pd.DataFrame()] * data.RETRIES + [prices()])
+    data.prefetch(["AAPL"], "2020-01-01", "2020-02-01", provider=provider)
+    wait_prefetched(provider)
+    df = data.download_prices("AAPL", "2020-01-01", "2020-02-01", provider=provider)
+    assert len(calls) == data.RETRIES + 1
+    assert len(df) == 5
+    assert not any(request[0] == provider for request in data._prefetched)
+
+
+def test_empty_prefetch_is_submitted_again(sleeps):
+    provider, calls = stub_provider([pd.DataFrame()] * data.RETRIES + [prices()])
+    data.prefetch(["AAPL"], "2020-01-01", "2020-02-01", provider=provider)
+    wait_prefetched(provider)
+    data.prefetch(["AAPL"], "2020-01-01", "2020-02-01", provider=provider)
+    wait_prefetched(provider)
+    assert len(calls) == data.RETRIES + 1
+    assert len(data.download_prices("AAPL", "2020-01-01", "2020-02-01", provider=provider)) == 5
+    assert len(calls) == data.RETRIES + 1
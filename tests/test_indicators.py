@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+import backtrader as bt
+from bench import synthetic_ohlcv
+from feeds import ArrayData
+from indicators import MACD, BollingerBands
+
+
+class Both(bt.Strategy):
+
+    def __init__(self):
+        self.pairs = [
+            (MACD(self.data.close), bt.ind.MACD(self.data.close)),
+            (BollingerBands(self.data.close), bt.ind.BollingerBands(self.data.close)),
+        ]
+
+
+@pytest.mark.parametrize("lean", [False, True])
+def test_shared_indicators_match_backtrader(lean):
+    cerebro = bt.Cerebro(stdstats=False, exactbars=lean)
+    cerebro.adddata(ArrayData(dataname=synthetic_ohlcv(800, seed=5)))
+    cerebro.addstrategy(Both)
+    strat = cerebro.run()[0]
+    for ours, theirs in strat.pairs:
+        for i in range(ours.lines.size()):
+            if lean:
+                assert ours.lines[i][0] == pytest.approx(theirs.lines[i][0], rel=1e-12)
+            else:
+                np.testing.assert_allclose(np.asarray(ours.lines[i].array), np.asarray(theirs.lines[i].array),
+                                           rtol=1e-12, equal_nan=True)
@@ -0,0 +1,81 @@
+import os
+import numpy as np
+import pytest
+from bench import synthetic_ohlcv
+from charts import ChartRecorder
+from journal import TradeJournal
+from backtest import run_backtest
+import result_store
+from result_store import result_config, result_key, save_result, load_result, evict
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_store, "RESULTS_DIR", str(tmp_path))
+    monkeypatch.setattr(result_store, "DB_PATH", str(tmp_path / "results.sqlite"))
+    return tmp_path
+
+
+@pytest.fixture(scope="module")
+def run():
+    _, strat = run_backtest("MACD", synthetic_ohlcv(800, seed=3),
+                            analyzers=((ChartRecorder, 'chart'), (TradeJournal, 'journal')))
+    return strat.analyzers.chart.get_analysis(), strat.analyzers.journal.get_analysis()
+
+
+def config(**params):
+    params = dict(dict(fast=12, slow=26, signal=9, trade_amount=1000), **params)
+    return result_config("MACD", params, " aapl", "2020-01-01", "2021-01-01")
+
+
+def test_round_trip(run):
+    analysis, journal = run
+    key = result_key(config())
+    save_result(key, analysis, journal)
+
+    loaded, events = load_result(key, journal=True)
+    for name in ("datetime", "close", "equity", "position", "trades"):
+        np.testing.assert_array_equal(loaded[name], analysis[name])
+    assert [row[:3] for row in loaded["indicators"]] == [row[:3] for row in analysis["indicators"]]
+    for (_, _, _, values), (_, _, _, expected) in zip(loaded["indicators"], analysis["indicators"]):
+        np.testing.assert_array_equal(values, expected)
+    assert loaded["fills"] == [tuple(fill) for fill in analysis["fills"]]
+    for name, values in journal.items():
+        np.testing.assert_array_equal(events[name], values)
+
+
+def test_missing_journal_and_unknown_key(run):
+    analysis, _ = run
+    key = result_key(config())
+    save_result(key, analysis)
+    assert load_result(key)[1] is None
+    assert load_result(key, journal=True) is None
+    assert load_result(result_key(config(unused=1))) is None
+
+
+def test_expired_result_is_deleted(run, store):
+    key = result_key(config())
+    save_result(key, run[0])
+    assert load_result(key, ttl=-1) is None
+    assert not any(name.startswith(key) for name in os.listdir(store))
+
+
+def test_evict_keeps_most_recently_read(run):
+    keys = [result_key(config(fast=fast)) for fast in (8, 10, 12)]
+    for key in keys:
+        save_result(key, run[0])
+    load_result(keys[0])
+    size = sum(os.path.getsize(result_store._path(keys[0], part)) for part in ("bars", "fills"))
+
+    assert evict(max_bytes=size) == 2
+    assert load_result(keys[0]) is not None
+    assert load_result(keys[1]) is None and load_result(keys[2]) is None
+
+
+def test_key_covers_config():
+    base = config()
+    assert base["symbol"] == "AAPL"
+    assert result_key(base) == result_key(config())
+    assert result_key(base) != result_key(config(fast=10))
+    assert base["code_version"] == result_store.code_version("MACD")
+    assert result_store.code_version("MACD") != result_store.code_version("LSTM")
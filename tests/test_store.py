@@ -0,0 +1,30 @@
+import datetime
+import numpy as np
+import pandas as pd
+import store
+
+
+def minute_bars(start, stop):
+    index = pd.date_range(start, stop, freq="1min", inclusive="left")
+    index = index[(index.dayofweek < 5) & (index.hour >= 14) & (index.hour < 21)]
+    close = np.linspace(100, 101, len(index))
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close,
+                         "Volume": np.ones(len(index))}, index=index)
+
+
+def test_fetch_does_not_retry_empty_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "STORE_DIR", str(tmp_path))
+    calls = []
+
+    def download(symbol, start, end, interval='1d', retry_empty=True):
+        calls.append(retry_empty)
+        return minute_bars(start, end)
+
+    monkeypatch.setattr(store, "download_prices", download)
+    today = datetime.date.today()
+    store.fetch("AAPL", "1m", today - datetime.timedelta(days=20), today)
+
+    # 逐段下載（每段最多 7 天），沒有交易日的區段不重試
+    assert len(calls) >= 3
+    assert not any(calls)
+    assert store.partitions("AAPL", "1m")